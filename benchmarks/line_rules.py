@@ -0,0 +1,85 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""line_rules.py - Benchmark of the rules with a line_regex or a token_regex.
+
+Times each rule searching the text, or its tokens, with its own regex
+against a single search of the text with the alternation of all the
+regexes, which is the least a combined matcher would cost. Python's regex engine only skips ahead to
+the literal prefix of a regex, which the alternation of several regexes
+does not have.
+
+Usage: python -m benchmarks.line_rules [--lines N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import timeit
+
+from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from j2lint.utils import get_line_index, search_lines
+
+BLOCK = """{% for interface in interfaces %}
+interface {{ interface.name }}
+    description {{ interface.description }}
+{% if interface.shutdown is arista.avd.defined(true) %}
+    shutdown
+{% endif %}
+    mtu {{interface.mtu}}
+\tno switchport
+{% endfor %}
+"""
+
+
+def main() -> None:
+    """Runs the benchmark and prints the timings"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    text = BLOCK * (options.lines // BLOCK.count("\n"))
+    line_index = get_line_index(text)
+    collection = RulesCollection.create_from_directory(str(DEFAULT_RULE_DIR), [], [])
+    regexes = {
+        rule: regex
+        for rule in collection.rules
+        if (regex := rule.line_regex or rule.token_regex) is not None
+    }
+    rules = sorted(regexes, key=lambda rule: rule.rule_id)
+    combined = re.compile("|".join(regexes[rule].pattern for rule in rules))
+
+    def separately() -> list[int]:
+        return sorted(
+            {
+                error.line_number
+                for rule in rules
+                for error in rule.checkrule("b.j2", text)
+            }
+        )
+
+    def together() -> list[int]:
+        return list(search_lines(combined, line_index))
+
+    assert separately() == together(), "the regexes do not match the same lines"
+    print(
+        f"{', '.join(rule.rule_id for rule in rules)} on {len(line_index)} lines, "
+        f"{len(together())} lines with errors"
+    )
+    for rule in rules:
+        best = min(
+            timeit.repeat(
+                lambda rule=rule: rule.checkrule("b.j2", text),
+                number=1,
+                repeat=options.repeat,
+            )
+        )
+        print(f"{rule.rule_id:>10}: {best * 1000:.1f} ms")
+    for name, function in [("separately", separately), ("combined", together)]:
+        best = min(timeit.repeat(function, number=1, repeat=options.repeat))
+        print(f"{name:>10}: {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
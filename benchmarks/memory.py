@@ -0,0 +1,170 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""memory.py - Benchmark of the memory used by the indentation rule.
+
+Lints a corpus of generated templates with S3, which builds a node for each
+statement, keeping the errors found as the runner does. Prints the time
+taken, the peak of the memory allocated while linting and the memory held by
+the errors, with the size of the objects built for each statement and error.
+
+Each measure is taken twice: with the baseline classes, which store their
+attributes in a dict and split the words of each statement eagerly as
+before __slots__, and with the current classes.
+
+Usage: python -m benchmarks.memory [--files N] [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import re
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from typing import Any
+from unittest import mock
+
+from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from j2lint.linter.error import LinterError
+from j2lint.linter.indenter import node as node_module
+from j2lint.linter.indenter.node import Node
+from j2lint.linter.rule import Rule
+from j2lint.utils import Statement
+
+TEMPLATE = """{% for interface in interfaces %}
+{% if interface.shutdown %}
+    {{interface.name}}
+  {% set description = interface.description|default('none') %}
+{% elif interface.mtu %}
+    mtu {{ interface.mtu }}
+{% endif %}
+{% endfor %}
+"""
+
+
+class BaselineStatement:
+    """JinjaStatement before __slots__, with its derived fields computed eagerly"""
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    def __init__(self, line: Statement) -> None:
+        whitespaces = re.findall(r"\s*", line[0])
+
+        self.begin: int = len(whitespaces[0])
+        self.line: str = line[0]
+        self.words: list[str] = line[0].split()
+        self.start_line_no: int = line[1]
+        self.end_line_no: int = line[2]
+        self.start_delimiter: str = line[3]
+        self.end_delimiter: str = line[4]
+
+
+def without_slots(cls: type) -> type:
+    """Returns a copy of a class storing its attributes in a dict"""
+    slots = getattr(cls, "__slots__", ())
+    namespace = {
+        name: value
+        for name, value in vars(cls).items()
+        if name not in ("__slots__", "__dict__", "__weakref__", *slots)
+    }
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+BaselineNode = without_slots(Node)
+BaselineLinterError = without_slots(LinterError)
+
+
+@contextlib.contextmanager
+def baseline(rule: Rule) -> Iterator[None]:
+    """Makes the rule and the nodes use the baseline classes"""
+    with mock.patch.multiple(
+        node_module, Node=BaselineNode, JinjaStatement=BaselineStatement
+    ), mock.patch.dict(
+        type(rule).checkfile.__globals__, {"LinterError": BaselineLinterError}
+    ):
+        yield
+
+
+def object_size(obj: Any) -> int:
+    """Returns the size of an object with its attribute dict, if any"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def lint(rule: Rule, texts: list[str]) -> list[LinterError]:
+    """Runs the rule on all the texts and returns the errors"""
+    return [
+        error
+        for file_no, text in enumerate(texts)
+        for error in rule.checkrule(f"{file_no}.j2", text)
+    ]
+
+
+def measure(rule: Rule, texts: list[str], repeat: int) -> dict[str, float]:
+    """Lints the texts with the classes in use and returns the measures"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        errors = lint(rule, texts)
+        best = min(best, time.perf_counter() - start)
+        del errors
+        gc.collect()
+
+    tracemalloc.start()
+    errors = lint(rule, texts)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    node = node_module.Node().create_node(("  if a ", 1, 1, "{%", "%}"), 0)
+    return {
+        "errors": len(errors),
+        "time": best * 1000,
+        "peak": peak / 2**20,
+        "held": held / 2**20,
+        "Node": object_size(node),
+        "Statement": object_size(node.statement),
+        "LinterError": object_size(errors[0]),
+    }
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+
+    # Each file is different so that no scan is shared between the files
+    texts = [
+        f"{{# file {file_no} #}}\n" + TEMPLATE * 20 for file_no in range(options.files)
+    ]
+    collection = RulesCollection.create_from_directory(str(DEFAULT_RULE_DIR), [], [])
+    rule = next(rule for rule in collection.rules if rule.rule_id == "S3")
+
+    with baseline(rule):
+        before = measure(rule, texts, options.repeat)
+    after = measure(rule, texts, options.repeat)
+
+    print(f"{options.files} files, {after['errors']} errors")
+    print(f"{'':13}{'baseline':<11}{'new':<11}{'saved':>6}")
+    for name, unit, digits in [
+        ("time", "ms", 0),
+        ("peak", "MiB", 1),
+        ("held", "MiB", 1),
+        ("Node", "B", 0),
+        ("Statement", "B", 0),
+        ("LinterError", "B", 0),
+    ]:
+        saved = 1 - after[name] / before[name]
+        print(
+            f"{name:>11}: {before[name]:>6.{digits}f} {unit:<3} "
+            f"{after[name]:>6.{digits}f} {unit:<3} {saved:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
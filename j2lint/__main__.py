@@ -7,11 +7,11 @@
 import sys
 import traceback
 
-from j2lint.cli import run
+from j2lint.client import main
 
 if __name__ == "__main__":
     try:
-        sys.exit(run())
+        sys.exit(main())
     except Exception:
         print(traceback.format_exc())
         raise SystemExit from BaseException
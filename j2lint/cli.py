@@ -11,16 +11,38 @@ import logging
 import os
 import sys
 import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
 
 from rich.console import Console
 from rich.tree import Tree
 
 from . import DESCRIPTION, NAME, VERSION
+from .client import DEFAULT_IDLE_TIMEOUT, DEFAULT_SOCKET, forward
+from .linter.budget import LintBudget
+from .linter.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, ResultCache
 from .linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from .linter.diff import DiffIndex, read_diff
+from .linter.environment import (
+    AST_CACHE,
+    DEFAULT_JINJA_EXTENSIONS,
+    parse_jinja_extension,
+)
 from .linter.error import LinterError
+from .linter.git import INDEX, GitBlobReader, GitError, get_changed_files
+from .linter.parallel import ParallelRunner
+from .linter.reader import DEFAULT_PREFETCH_FILES, PrefetchReader
 from .linter.runner import Runner
+from .linter.schedule import order_files
+from .linter.shard import (
+    merge_partial_results,
+    parse_shard,
+    select_shard,
+    write_partial_results,
+)
+from .linter.watchdog import Watchdog
 from .logger import add_handler, logger
-from .utils import get_files
+from .utils import available_cpus, iter_files
 
 IGNORE_RULES = WARN_RULES = [
     "jinja-syntax-error",
@@ -126,10 +148,203 @@ def create_parser() -> argparse.ArgumentParser:
         default=[],
         help="rules to warn, use `--` after this option to enter FILES",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of parallel processes, default is the number of available CPUs",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_PREFETCH_FILES,
+        help="number of files to read ahead while linting, 0 disables prefetching, "
+        f"default is {DEFAULT_PREFETCH_FILES}",
+    )
+    parser.add_argument(
+        "--recent-first",
+        dest="recent_first",
+        default=False,
+        action="store_true",
+        help="lint the most recently modified files first instead of the largest ones",
+    )
+    parser.add_argument(
+        "--max-errors",
+        dest="max_errors",
+        type=int,
+        default=None,
+        metavar="N",
+        help="stop linting once N errors are found",
+    )
+    parser.add_argument(
+        "--time-budget",
+        dest="time_budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="stop linting after SECONDS and report the files not checked",
+    )
+    parser.add_argument(
+        "--rule-timeout",
+        dest="rule_timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="interrupt a rule running longer than SECONDS on a file and report "
+        "a timeout error",
+    )
+    parser.add_argument(
+        "--file-timeout",
+        dest="file_timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="interrupt the rules running longer than SECONDS in total on a file "
+        "and report a timeout error",
+    )
+    parser.add_argument(
+        "--cache",
+        default=False,
+        action="store_true",
+        help="reuse the results of the previous runs for unchanged files",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"cache directory, default is '{DEFAULT_CACHE_DIR}'",
+    )
+    parser.add_argument(
+        "--cache-size",
+        dest="cache_size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+        help="maximum size of the cache directory in MiB, default is "
+        f"{DEFAULT_CACHE_SIZE // (1024 * 1024)}",
+    )
+    parser.add_argument(
+        "--changed-since",
+        dest="changed_since",
+        default=None,
+        metavar="REF",
+        help="only lint the files changed in git since the commit REF",
+    )
+    git_source = parser.add_mutually_exclusive_group()
+    git_source.add_argument(
+        "--staged",
+        default=False,
+        action="store_true",
+        help="lint the content of the files in the git index, only the files "
+        "changed since REF if --changed-since is given, since HEAD otherwise",
+    )
+    git_source.add_argument(
+        "--revision",
+        default=None,
+        metavar="REV",
+        help="lint the content of the files in the git commit or tree REV "
+        "without checking it out, only the files changed since REF if "
+        "--changed-since is given",
+    )
+    parser.add_argument(
+        "--include-dependents",
+        dest="include_dependents",
+        default=False,
+        action="store_true",
+        help="with --changed-since or --staged, also lint the files which "
+        "include, import or extend a changed file",
+    )
+    parser.add_argument(
+        "--diff",
+        default=None,
+        metavar="FILE|-",
+        help="only report the issues on the lines added or modified by the "
+        "unified diff in FILE, - to read it from the standard input",
+    )
+    parser.add_argument(
+        "--jinja-extension",
+        dest="jinja_extensions",
+        type=parse_jinja_extension,
+        action="append",
+        default=[],
+        metavar="EXTENSION",
+        help="import path of a jinja2 extension to parse the templates with, "
+        f"in addition to {', '.join(DEFAULT_JINJA_EXTENSIONS)}, can be repeated",
+    )
+    parser.add_argument(
+        "--daemon",
+        default=False,
+        action="store_true",
+        help="run as a daemon keeping the rules loaded for the --client commands",
+    )
+    parser.add_argument(
+        "--client",
+        default=False,
+        action="store_true",
+        help="forward the command to the daemon, run it locally if the daemon "
+        "is not running",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help=f"daemon socket path, default is '{DEFAULT_SOCKET}'",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        dest="idle_timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="seconds without request after which the daemon exits, default is "
+        f"{DEFAULT_IDLE_TIMEOUT}",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="only lint the files of shard I out of N, the files are assigned to "
+        "the shards by a hash of their path",
+    )
+    parser.add_argument(
+        "--partial-results",
+        dest="partial_results",
+        default=None,
+        metavar="PATH",
+        help="write the results to PATH to be combined with `j2lint merge`",
+    )
 
     return parser
 
 
+def create_merge_parser() -> argparse.ArgumentParser:
+    """Initializes the argument parser of the merge command
+
+    Returns:
+        ArgumentParser: Argument parser object
+    """
+    parser = argparse.ArgumentParser(
+        prog=f"{NAME} merge",
+        description="Combine the partial results of all the shards of a run "
+        "and print them as a full run would.",
+    )
+    parser.add_argument(
+        dest="files",
+        metavar="FILE",
+        nargs="+",
+        help="partial results files written with --partial-results",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        default=False,
+        action="store_true",
+        help="verbose output for lint issues",
+    )
+    parser.add_argument(
+        "-j", "--json", default=False, action="store_true", help="enable JSON output"
+    )
+    return parser
+
+
 def sort_issues(issues: list[LinterError]) -> list[LinterError]:
     """Sorted list of issues
 
@@ -145,32 +360,276 @@ def sort_issues(issues: list[LinterError]) -> list[LinterError]:
     return issues
 
 
+def build_collection(
+    options: argparse.Namespace, diff: DiffIndex | None = None
+) -> RulesCollection:
+    """Collect the rules from the configuration
+
+    This is a module level function so it can be pickled and sent to the
+    worker processes when running in parallel.
+
+    Args:
+        options (Namespace): parsed command line arguments
+        diff (DiffIndex, optional): the diff read from --diff, which cannot be
+                                    read again by the worker processes when
+                                    it is read from the standard input
+
+    Returns:
+        RulesCollection: the collection of rules to run
+    """
+    collection = RulesCollection(options.verbose)
+    collection.diff = diff
+    for rules_dir in options.rules_dir:
+        collection.extend(
+            RulesCollection.create_from_directory(
+                rules_dir, options.ignore, options.warn
+            ).rules
+        )
+    collection.jinja_extensions = DEFAULT_JINJA_EXTENSIONS + tuple(
+        options.jinja_extensions
+    )
+    if options.cache:
+        collection.cache = ResultCache(
+            options.cache_dir,
+            options.cache_size * 1024 * 1024,
+            options.jinja_extensions,
+        )
+    if (revision := get_revision(options)) is not None:
+        collection.git_reader = GitBlobReader(revision)
+    if options.rule_timeout is not None or options.file_timeout is not None:
+        collection.watchdog = Watchdog(options.rule_timeout, options.file_timeout)
+    return collection
+
+
+def get_revision(options: argparse.Namespace) -> str | None:
+    """Returns the git revision the files are read from
+
+    Args:
+        options (Namespace): parsed command line arguments
+
+    Returns:
+        string: INDEX with --staged, the --revision value or None to read the
+                files from the disk
+    """
+    return INDEX if options.staged else options.revision
+
+
+def select_files(
+    file_or_dir_names: list[str],
+    options: argparse.Namespace,
+    diff: DiffIndex | None = None,
+) -> Iterable[str]:
+    """Gets the files to lint, from git with --changed-since, --staged or
+    --revision, from the diff otherwise if one is given
+
+    The directories are otherwise walked by a generator, the files are given
+    as they are found.
+
+    Args:
+        file_or_dir_names (list): list of directories and files
+        options (Namespace): parsed command line arguments
+        diff (DiffIndex, optional): the diff read from --diff
+
+    Returns:
+        iterable: the file paths
+
+    Raises:
+        GitError: if the changed files cannot be listed
+    """
+    revision = get_revision(options)
+    if options.changed_since is None and revision is None:
+        if diff is not None:
+            return diff.select_files(file_or_dir_names, options.extensions)
+        return iter_files(file_or_dir_names, options.extensions)
+    ref = options.changed_since
+    if ref is None and options.staged:
+        ref = "HEAD"
+    return get_changed_files(
+        file_or_dir_names,
+        options.extensions,
+        ref,
+        revision,
+        options.include_dependents,
+    )
+
+
+def shard_files(
+    found_files: Iterable[str], options: argparse.Namespace
+) -> tuple[list[str], Iterable[str]]:
+    """Selects the files of the shard given with --shard
+
+    The files found are only listed before linting when they are sharded or
+    when the partial results, which record the position of the files among
+    all of them, are written. They are linted as they are found otherwise.
+
+    Args:
+        found_files (iterable): the files found by select_files
+        options (Namespace): parsed command line arguments
+
+    Returns:
+        tuple(list, iterable): all the files, empty if they are not listed, and
+                               the files to lint
+    """
+    if options.shard is None and options.partial_results is None:
+        return [], found_files
+    all_files = list(found_files)
+    if options.shard is None:
+        return all_files, all_files
+    return all_files, select_shard(all_files, *options.shard)
+
+
 def get_linting_issues(
-    files: list[str], collection: RulesCollection, checked_files: list[str]
+    files: Iterable[str],
+    collection: RulesCollection,
+    checked_files: list[str],
+    parallel_runner: ParallelRunner | None = None,
+    prefetch: int = 0,
+    recent_first: bool = False,
+    budget: LintBudget | None = None,
 ) -> tuple[dict[str, list[LinterError]], dict[str, list[LinterError]]]:
-    """checking errors and warnings"""
+    """checking errors and warnings
+
+    When a parallel_runner is given, the files are linted by its worker
+    processes, otherwise the next `prefetch` files are read in the background
+    while the current one is being linted. The issues are returned in the
+    order of the files whatever the order the files are linted in.
+
+    The files may be given by a generator, they are linted as they are found
+    unless a parallel_runner is given or recent_first is set, which need all
+    of them first.
+
+    When a budget is given, linting stops once it runs out and the files not
+    linted are recorded in budget.not_checked.
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
     lint_errors: dict[str, list[LinterError]] = {}
     lint_warnings: dict[str, list[LinterError]] = {}
 
-    # Get linting issues
-    for file_name in files:
-        runner = Runner(collection, file_name, checked_files)
-        if file_name not in lint_errors:
-            lint_errors[file_name] = []
-        if file_name not in lint_warnings:
-            lint_warnings[file_name] = []
-        j2_errors, j2_warnings = runner.run()
-        lint_errors[file_name].extend(sort_issues(j2_errors))
-        lint_warnings[file_name].extend(sort_issues(j2_warnings))
+    # All the files in order without duplicates, and the ones not checked yet
+    all_files: dict[str, None] = {}
+    pending_files: list[str] = []
+
+    def select_pending(file_names: Iterable[str]) -> Iterator[str]:
+        for file_name in file_names:
+            if file_name not in all_files:
+                all_files[file_name] = None
+                if file_name not in checked_files:
+                    pending_files.append(file_name)
+                    yield file_name
+
+    new_files = select_pending(files)
+    results: dict[str, tuple[list[LinterError], list[LinterError]]] = {}
+    if parallel_runner is not None:
+        results = {
+            file_name: (j2_errors, j2_warnings)
+            for file_name, j2_errors, j2_warnings in parallel_runner.run(
+                list(new_files), budget
+            )
+        }
+        checked_files.extend(results)
+    else:
+        if recent_first:
+            new_files = iter(
+                [file_name for file_name, _ in order_files(list(new_files), True)]
+            )
+        # Get linting issues
+        with PrefetchReader(new_files, max_files=prefetch) as reader:
+            for file_name in reader:
+                if budget is not None and budget.is_exhausted():
+                    break
+                runner = Runner(collection, file_name, checked_files, reader)
+                results[file_name] = runner.run()
+                if budget is not None:
+                    budget.add_errors(len(results[file_name][0]))
+
+    if budget is not None:
+        # The files not found yet when the budget ran out are not checked either
+        for _ in new_files:
+            pass
+        budget.not_checked = [
+            file_name for file_name in pending_files if file_name not in results
+        ]
+
+    for file_name in all_files:
+        lint_errors[file_name] = []
+        lint_warnings[file_name] = []
+        if file_name in results:
+            j2_errors, j2_warnings = results.pop(file_name)
+            lint_errors[file_name].extend(sort_issues(j2_errors))
+            lint_warnings[file_name].extend(sort_issues(j2_warnings))
     return lint_errors, lint_warnings
 
 
+def lint_files(
+    files: Iterable[str],
+    collection: RulesCollection,
+    checked_files: list[str],
+    options: argparse.Namespace,
+    budget: LintBudget | None = None,
+) -> tuple[dict[str, list[LinterError]], dict[str, list[LinterError]]]:
+    """Lints the files with a pool of processes when more than one job is
+    requested and there is more than one file, otherwise in this process
+
+    A single process lints the files given by a generator as they are found,
+    the pool needs all of them to submit the largest ones first.
+    """
+    jobs = options.jobs if options.jobs is not None else available_cpus()
+    # The files read from git are not prefetched from the disk
+    prefetch = options.prefetch if collection.git_reader is None else 0
+    # The pool needs all the files to submit the largest ones first
+    file_list = list(files) if jobs > 1 else None
+    if file_list is not None and len(file_list) > 1:
+        logger.debug("Linting %s files with %s processes", len(file_list), jobs)
+        with ParallelRunner(
+            collection,
+            partial(build_collection, options, collection.diff),
+            min(jobs, len(file_list)),
+            prefetch,
+            options.recent_first,
+        ) as parallel_runner:
+            return get_linting_issues(
+                file_list, collection, checked_files, parallel_runner, budget=budget
+            )
+    return get_linting_issues(
+        files if file_list is None else file_list,
+        collection,
+        checked_files,
+        prefetch=prefetch,
+        recent_first=options.recent_first,
+        budget=budget,
+    )
+
+
+def release_resources(collection: RulesCollection) -> None:
+    """Closes the git reader and prunes the cache once the files are linted
+
+    Args:
+        collection (RulesCollection): the collection the files were linted with
+    """
+    if collection.git_reader is not None:
+        # A later run, by the daemon, may be in another directory and see
+        # another index
+        collection.git_reader.close()
+    logger.debug(
+        "Parsed templates cache: %s hits, %s misses", AST_CACHE.hits, AST_CACHE.misses
+    )
+    if collection.cache is not None:
+        collection.cache.prune()
+
+
 def print_json_output(
     lint_errors: dict[str, list[LinterError]],
     lint_warnings: dict[str, list[LinterError]],
+    not_checked: list[str] | None = None,
 ) -> tuple[int, int]:
-    """printing json output"""
+    """printing json output
+
+    The files not checked because the linting stopped early are listed
+    under NOT_CHECKED.
+    """
     json_output: dict[str, list[str]] = {"ERRORS": [], "WARNINGS": []}
+    if not_checked:
+        json_output["NOT_CHECKED"] = not_checked
     for _, errors in lint_errors.items():
         for error in errors:
             json_output["ERRORS"].append(json.loads(str(error.to_json())))
@@ -239,20 +698,94 @@ def print_json_rules(collection: RulesCollection) -> None:
     CONSOLE.print_json(collection.to_json())
 
 
-def run(args: list[str] | None = None) -> int:
+def print_not_checked(budget: LintBudget) -> None:
+    """Print the files not checked because the linting stopped early"""
+    CONSOLE.print(
+        f"\nLinting stopped early ({budget.reason}), "
+        f"{len(budget.not_checked)} file(s) not checked:",
+        style="yellow",
+    )
+    for file_name in budget.not_checked:
+        CONSOLE.print(file_name, style="yellow", highlight=False)
+
+
+def print_output(
+    lint_errors: dict[str, list[LinterError]],
+    lint_warnings: dict[str, list[LinterError]],
+    options: argparse.Namespace,
+    budget: LintBudget | None = None,
+) -> int:
+    """Prints the linting issues in the format selected by the options
+
+    Returns:
+        int: the exit code, 3 if the budget ran out before all the files were
+             checked, 2 if there are errors, 0 otherwise
+    """
+    not_checked = budget.not_checked if budget is not None else []
+    if options.json:
+        logger.debug("JSON output enabled")
+        total_lint_errors, _ = print_json_output(
+            lint_errors, lint_warnings, not_checked
+        )
+    else:
+        total_lint_errors, _ = print_string_output(
+            lint_errors, lint_warnings, options.verbose
+        )
+        if budget is not None and not_checked:
+            print_not_checked(budget)
+    if not_checked:
+        return 3
+    return 2 if total_lint_errors else 0
+
+
+def merge(args: list[str]) -> int:
+    """Runs the merge command
+
+    Args:
+        args ([string]): Command line arguments after `merge`
+
+    Returns:
+        int: the exit code a full run would have returned, 1 if the partial
+             results cannot be merged
+    """
+    options = create_merge_parser().parse_args(args)
+    try:
+        lint_errors, lint_warnings, budget = merge_partial_results(options.files)
+    except ValueError as err:
+        CONSOLE.print(str(err), style="red")
+        return 1
+    return print_output(lint_errors, lint_warnings, options, budget)
+
+
+def run(
+    args: list[str] | None = None,
+    collection_provider: Callable[[argparse.Namespace], RulesCollection] | None = None,
+) -> int:
     """Runs jinja2 linter
 
     Args:
         args ([string], optional): Command line arguments. Defaults to None.
+        collection_provider (callable, optional): returns the rules collection
+                                                  for the options, used by the
+                                                  daemon to reuse the loaded rules.
+                                                  Defaults to build_collection.
 
     Returns:
         int: 0 on success
     """
-    # pylint: disable=too-many-branches
+    # pylint: disable=too-many-branches,too-many-locals,too-many-return-statements
     # given the number of input parameters, it is acceptable to keep these many branches.
 
     parser = create_parser()
-    options = parser.parse_args(args if args is not None else sys.argv[1:])
+    argv = args if args is not None else sys.argv[1:]
+    if argv[:1] == ["merge"]:
+        return merge(argv[1:])
+    options = parser.parse_args(argv)
+    if options.stdin and options.diff == "-":
+        parser.error("--diff - cannot be used with --stdin, both read stdin")
+
+    if options.client and (exit_code := forward(argv, options.socket)) is not None:
+        return exit_code
 
     # Enable logs
 
@@ -268,8 +801,16 @@ def run(args: list[str] | None = None) -> int:
 
     logger.debug("Lint options selected %s", options)
 
+    if options.daemon:
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        # the daemon module imports this module
+        from .daemon import LintDaemon
+
+        return LintDaemon(options.socket, options.idle_timeout).serve()
+
     stdin_filename = None
-    file_or_dir_names: list[str] = list(set(options.files))
+    # Keeping the order of the command line so the output order is stable
+    file_or_dir_names: list[str] = list(dict.fromkeys(options.files))
     checked_files: list[str] = []
 
     if options.stdin and not sys.stdin.isatty():
@@ -280,14 +821,7 @@ def run(args: list[str] | None = None) -> int:
             stdin_filename = stdin_tmpfile.name
             file_or_dir_names.append(stdin_filename)
 
-    # Collect the rules from the configuration
-    collection = RulesCollection(options.verbose)
-    for rules_dir in options.rules_dir:
-        collection.extend(
-            RulesCollection.create_from_directory(
-                rules_dir, options.ignore, options.warn
-            ).rules
-        )
+    collection = (collection_provider or build_collection)(options)
 
     # List lint rules
     if options.list:
@@ -307,20 +841,40 @@ def run(args: list[str] | None = None) -> int:
         parser.print_help(file=sys.stderr)
         return 1
 
-    files = get_files(file_or_dir_names, options.extensions)
+    budget = (
+        LintBudget(options.max_errors, options.time_budget)
+        if options.max_errors is not None or options.time_budget is not None
+        else None
+    )
+    try:
+        collection.diff = read_diff(options.diff) if options.diff is not None else None
+        all_files, files = shard_files(
+            select_files(file_or_dir_names, options, collection.diff), options
+        )
+    except (GitError, OSError, ValueError) as err:
+        CONSOLE.print(str(err), style="red", markup=False)
+        return 1
 
-    lint_errors, lint_warnings = get_linting_issues(files, collection, checked_files)
+    lint_errors, lint_warnings = lint_files(
+        files, collection, checked_files, options, budget
+    )
 
-    if options.json:
-        logger.debug("JSON output enabled")
-        total_lint_errors, _ = print_json_output(lint_errors, lint_warnings)
-    else:
-        total_lint_errors, _ = print_string_output(
-            lint_errors, lint_warnings, options.verbose
+    release_resources(collection)
+
+    if options.partial_results is not None:
+        write_partial_results(
+            options.partial_results,
+            options.shard or (1, 1),
+            all_files,
+            lint_errors,
+            lint_warnings,
+            budget,
         )
 
+    exit_code = print_output(lint_errors, lint_warnings, options, budget)
+
     # Remove temporary file
     if stdin_filename is not None:
         remove_temporary_file(stdin_filename)
 
-    return 2 if total_lint_errors else 0
+    return exit_code
@@ -0,0 +1,194 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""client.py - Thin client forwarding the command line to the j2lint daemon.
+
+This module only uses the standard library so that forwarding a command to a
+running daemon does not pay for importing rich, jinja2 and the rules.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import socket
+import sys
+import tempfile
+from typing import Any
+
+
+def get_default_socket() -> str:
+    """Returns the default daemon socket path
+
+    The socket is in $XDG_RUNTIME_DIR if it is set, otherwise in a j2lint-<uid>
+    directory of the temporary directory which the daemon creates with 0700
+    permissions.
+
+    Returns:
+        string: socket path
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isabs(runtime_dir):
+        return os.path.join(runtime_dir, "j2lint.sock")
+    user = getattr(os, "getuid", lambda: "user")()
+    return os.path.join(tempfile.gettempdir(), f"j2lint-{user}", "j2lint.sock")
+
+
+def is_owned_by_user(path: str) -> bool:
+    """Checks a file is owned by the current user, without following links
+
+    Args:
+        path (string): file path
+
+    Returns:
+        boolean: True if the file exists and is owned by the current user, or
+                 exists on a platform without user ids
+    """
+    try:
+        stat = os.lstat(path)
+    except OSError:
+        return False
+    return not hasattr(os, "getuid") or stat.st_uid == os.getuid()
+
+
+DEFAULT_SOCKET = get_default_socket()
+DEFAULT_IDLE_TIMEOUT = 600
+STDIN_OPTION = re.compile(r"--stdin|-[a-zA-Z]*s[a-zA-Z]*")
+
+
+def reads_stdin(argv: list[str]) -> bool:
+    """Returns True if the command line reads the standard input, with
+    --stdin or with --diff -
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        boolean: True if the standard input is to be forwarded to the daemon
+    """
+    for index, arg in enumerate(argv):
+        if STDIN_OPTION.fullmatch(arg) or arg == "--diff=-":
+            return True
+        if arg == "--diff" and index + 1 < len(argv) and argv[index + 1] == "-":
+            return True
+    return False
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]) -> None:
+    """Sends a message as a JSON line
+
+    Args:
+        sock (socket): connected socket
+        message (dict): message to send
+    """
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def receive_message(sock: socket.socket) -> dict[str, Any]:
+    """Receives a message sent with send_message
+
+    Args:
+        sock (socket): connected socket
+
+    Returns:
+        dict: the message received
+    """
+    with sock.makefile("rb") as stream:
+        message: dict[str, Any] = json.loads(stream.readline())
+    return message
+
+
+def get_socket_path(argv: list[str]) -> str:
+    """Returns the daemon socket path given with --socket or the default one
+
+    Args:
+        argv (list): command line arguments
+
+    Returns:
+        string: socket path
+    """
+    for index, arg in enumerate(argv):
+        if arg == "--socket" and index + 1 < len(argv):
+            return argv[index + 1]
+        if arg.startswith("--socket="):
+            return arg.split("=", 1)[1]
+    return DEFAULT_SOCKET
+
+
+def forward(argv: list[str], socket_path: str) -> int | None:
+    """Forwards a command line to the daemon and prints its output
+
+    Args:
+        argv (list): command line arguments, --client is removed
+        socket_path (string): daemon socket path
+
+    Returns:
+        int: the exit code of the command or None if the daemon is not running
+             or its socket is not owned by the current user
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    if not is_owned_by_user(socket_path):
+        if os.path.lexists(socket_path):
+            # Another user could receive the command and spoof the results
+            sys.stderr.write(
+                f"Not using the daemon socket {socket_path}, "
+                "it is not owned by the current user\n"
+            )
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+
+    with sock:
+        argv = [arg for arg in argv if arg != "--client"]
+        stdin = None
+        if reads_stdin(argv) and not sys.stdin.isatty():
+            stdin = sys.stdin.read()
+        isatty = sys.stdout.isatty()
+        send_message(
+            sock,
+            {
+                "argv": argv,
+                "cwd": os.getcwd(),
+                "stdin": stdin,
+                "isatty": isatty,
+                "width": shutil.get_terminal_size().columns if isatty else None,
+            },
+        )
+        response = receive_message(sock)
+
+    sys.stdout.write(response["stdout"])
+    sys.stdout.flush()
+    sys.stderr.write(response["stderr"])
+    sys.stderr.flush()
+    return int(response["exit_code"])
+
+
+def main(args: list[str] | None = None) -> int:
+    """j2lint entry point
+
+    With --client, the command is forwarded to the daemon without importing
+    the linter. If the daemon is not running, the command is run locally.
+
+    Args:
+        args ([string], optional): Command line arguments. Defaults to None.
+
+    Returns:
+        int: the exit code
+    """
+    argv = args if args is not None else sys.argv[1:]
+    if "--client" in argv:
+        exit_code = forward(argv, get_socket_path(argv))
+        if exit_code is not None:
+            return exit_code
+
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    # Importing the linter only when the command is not forwarded
+    from j2lint.cli import run
+
+    return run(argv)
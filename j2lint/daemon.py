@@ -0,0 +1,283 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""daemon.py - Long lived process linting templates for the j2lint clients.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import io
+import logging
+import os
+import socket
+import struct
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Tuple
+
+from rich.console import Console
+
+from j2lint import cli
+from j2lint.client import (
+    DEFAULT_IDLE_TIMEOUT,
+    is_owned_by_user,
+    receive_message,
+    send_message,
+)
+from j2lint.linter.collection import RulesCollection
+from j2lint.logger import logger
+
+# Using Tuple from typing for 3.8 support
+# (path, mtime_ns, size) of each rule module
+RulesSignature = Tuple[Tuple[str, int, int], ...]
+
+
+class _TtyStdin(io.StringIO):
+    """Stands for the client stdin when it is a terminal"""
+
+    def isatty(self) -> bool:
+        return True
+
+
+def get_rules_signature(rules_dirs: list[str]) -> RulesSignature:
+    """Returns the stat of the rule modules to detect when they change
+
+    Args:
+        rules_dirs (list): rules directories
+
+    Returns:
+        tuple: a tuple of (path, mtime_ns, size) for each rule module
+    """
+    signature = []
+    for rules_dir in rules_dirs:
+        for plugin_file in sorted(
+            glob.glob(os.path.join(os.path.expanduser(rules_dir), "[A-Za-z_]*.py"))
+        ):
+            try:
+                stat = os.stat(plugin_file)
+            except OSError:
+                continue
+            signature.append((plugin_file, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def is_same_user(conn: socket.socket) -> bool:
+    """Checks the client of a connection runs as the current user
+
+    The peer credentials are only known on Linux, the permissions of the
+    socket and of its directory are relied on otherwise.
+
+    Args:
+        conn (socket): accepted connection
+
+    Returns:
+        boolean: False if the client runs as another user
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    credentials = conn.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    return bool(uid == os.getuid())
+
+
+class LintDaemon:
+    """Class serving the j2lint clients on a Unix socket
+
+    The rules collections are kept loaded between the requests and reloaded
+    when a file in their rules directories changes. The files are linted in
+    the daemon process. The daemon exits when no
+    request was received for idle_timeout seconds.
+    """
+
+    def __init__(
+        self, socket_path: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT
+    ) -> None:
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.collections: dict[
+            tuple[Any, ...], tuple[RulesSignature, RulesCollection]
+        ] = {}
+
+    def get_collection(self, options: argparse.Namespace) -> RulesCollection:
+        """Returns the loaded collection for the options, loading it if it is
+        not loaded yet or if its rules changed
+
+        The files are then linted in the daemon process with this collection,
+        --jobs is ignored as each worker of a pool would load the rules again.
+
+        Args:
+            options (Namespace): parsed command line arguments
+
+        Returns:
+            RulesCollection: the collection of rules to run
+        """
+        options.jobs = 1
+        key = (
+            tuple(str(rules_dir) for rules_dir in options.rules_dir),
+            tuple(options.ignore),
+            tuple(options.warn),
+            options.verbose,
+            options.cache,
+            options.cache_dir,
+            options.cache_size,
+            options.rule_timeout,
+            options.file_timeout,
+            tuple(options.jinja_extensions),
+            options.staged,
+            options.revision,
+        )
+        signature = get_rules_signature(options.rules_dir)
+        if (cached := self.collections.get(key)) is not None and cached[0] == signature:
+            return cached[1]
+        if cached is not None:
+            logger.info("Rules changed, reloading the collection")
+        collection = cli.build_collection(options)
+        self.collections[key] = (signature, collection)
+        return collection
+
+    def _run(self, argv: list[str]) -> int:
+        """Runs the command line with the loaded collections"""
+        try:
+            return cli.run(argv, collection_provider=self.get_collection)
+        except SystemExit as exc:
+            # argparse errors and --help
+            return exc.code if isinstance(exc.code, int) else 1
+        except Exception:  # pylint: disable=broad-exception-caught
+            traceback.print_exc()
+            return 1
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Runs the command line of a client request
+
+        Args:
+            request (dict): the client request with the command line arguments
+                            in argv, its working directory, stdin and terminal
+
+        Returns:
+            dict: the response with the stdout, stderr and exit code
+        """
+        argv = request["argv"]
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        if "--daemon" in argv:
+            return {
+                "stdout": "",
+                "stderr": "--daemon cannot be forwarded to the daemon\n",
+                "exit_code": 1,
+            }
+
+        fake_stdin = (
+            _TtyStdin() if request["stdin"] is None else io.StringIO(request["stdin"])
+        )
+        saved_cwd = os.getcwd()
+        saved_console = cli.CONSOLE
+        saved_stdin = sys.stdin
+        saved_handlers = logger.handlers[:]
+        saved_level = logger.level
+        try:
+            os.chdir(request["cwd"])
+            cli.CONSOLE = Console(
+                file=stdout, force_terminal=request["isatty"], width=request["width"]
+            )
+            sys.stdin = fake_stdin
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                exit_code = self._run(argv)
+        finally:
+            os.chdir(saved_cwd)
+            cli.CONSOLE = saved_console
+            sys.stdin = saved_stdin
+            logger.handlers[:] = saved_handlers
+            logger.setLevel(saved_level)
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+
+        return {
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "exit_code": exit_code,
+        }
+
+    def _check_directory(self) -> None:
+        """Creates the directory of the socket only the user can access, or
+        checks it is not owned by another user
+
+        Raises:
+            OSError: if the directory cannot be created or is owned by another
+                     user who could replace the socket
+        """
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+            return
+        # The system directories, e.g. /tmp, are owned by root
+        if hasattr(os, "getuid") and os.stat(directory).st_uid not in (os.getuid(), 0):
+            raise OSError(f"The socket directory {directory} is owned by another user")
+
+    def _bind(self) -> socket.socket:
+        """Binds the Unix socket, replacing a stale socket file
+
+        Raises:
+            OSError: if another daemon is listening on the socket or the socket
+                     is owned by another user
+        """
+        self._check_directory()
+        if os.path.lexists(self.socket_path):
+            if not is_owned_by_user(self.socket_path):
+                raise OSError(f"The socket {self.socket_path} is owned by another user")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(self.socket_path)
+                except OSError:
+                    os.unlink(self.socket_path)
+                else:
+                    raise OSError(
+                        f"A daemon is already listening on {self.socket_path}"
+                    )
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen()
+        return server
+
+    def serve(self) -> int:
+        """Serves the clients until no request is received for idle_timeout seconds
+
+        Returns:
+            int: 0 on success
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            cli.CONSOLE.print("The j2lint daemon requires Unix sockets", style="red")
+            return 1
+        try:
+            server = self._bind()
+        except OSError as err:
+            cli.CONSOLE.print(str(err), style="red")
+            return 1
+
+        logger.info("j2lint daemon listening on %s", self.socket_path)
+        server.settimeout(self.idle_timeout)
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    logger.info("No request for %s seconds, exiting", self.idle_timeout)
+                    break
+                with conn:
+                    conn.settimeout(None)
+                    if not is_same_user(conn):
+                        logger.warning("Refusing a client of another user")
+                        continue
+                    try:
+                        send_message(conn, self.handle(receive_message(conn)))
+                    except (OSError, ValueError) as err:
+                        logger.warning("Failed to serve a client - %s", err)
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        return 0
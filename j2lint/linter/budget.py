@@ -0,0 +1,61 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""budget.py - Class to stop linting once enough errors are found or the time
+is up.
+"""
+from __future__ import annotations
+
+import time
+
+
+class LintBudget:
+    """Class tracking the errors found and the time spent to stop linting early
+
+    The budget is only checked between two files, the files which were not
+    linted when the budget ran out are recorded in not_checked.
+    """
+
+    def __init__(
+        self, max_errors: int | None = None, time_budget: float | None = None
+    ) -> None:
+        """
+        Args:
+            max_errors (int, optional): stop once this number of errors is found
+            time_budget (float, optional): stop once this number of seconds
+                                           elapsed since the budget was created
+        """
+        self.max_errors = max_errors
+        # time.monotonic is system wide so the worker processes can use it
+        self.deadline = (
+            time.monotonic() + time_budget if time_budget is not None else None
+        )
+        self.error_count = 0
+        self.reason: str | None = None
+        self.not_checked: list[str] = []
+
+    def add_errors(self, count: int) -> None:
+        """Records errors found in a file
+
+        Args:
+            count (int): number of errors
+        """
+        self.error_count += count
+
+    def remaining_time(self) -> float | None:
+        """Returns the number of seconds left or None without time budget"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def is_exhausted(self) -> bool:
+        """Returns True when no more files should be linted
+
+        The reason is recorded the first time the budget runs out.
+        """
+        if self.reason is None:
+            if self.max_errors is not None and self.error_count >= self.max_errors:
+                self.reason = f"{self.error_count} error(s) found"
+            elif self.deadline is not None and time.monotonic() >= self.deadline:
+                self.reason = "time budget exceeded"
+        return self.reason is not None
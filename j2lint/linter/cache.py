@@ -0,0 +1,275 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""cache.py - Class to store the linting results on disk between runs.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, List, Tuple, Union
+
+import jinja2
+
+from j2lint import VERSION
+from j2lint.logger import logger
+
+if TYPE_CHECKING:
+    from .rule import Rule
+
+# The j2lint package, whose helpers the rules rely on
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_CACHE_DIR = ".j2lint_cache"
+DEFAULT_CACHE_SIZE = 100 * 1024 * 1024
+
+# A file modified less than this many nanoseconds before it was hashed could be
+# modified again without its mtime changing, its stat is not trusted then
+RACY_STAT_DELAY = 2 * 10**9
+
+# Using Tuple from typing for 3.8 support
+# CachedError is a LinterError without the rule and filename
+# (line_number, line, message)
+CachedError = Tuple[int, str, str]
+# (mtime_ns, size, inode, content_hash)
+StatEntry = List[Union[int, str]]
+
+
+def hash_text(text: str) -> str:
+    """Returns the hash used to identify a file content
+
+    Args:
+        text (string): file content
+
+    Returns:
+        string: hexadecimal sha256 of the content
+    """
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def hash_package(directory: str = PACKAGE_DIR) -> str:
+    """Returns the hash of the Python sources of a package but its rules
+
+    The rules use the helpers of the package, e.g. utils.py and the indenter,
+    so modifying them may change the results of any rule. The rules
+    directory is left out as each rule key covers its own module.
+
+    Args:
+        directory (string): package directory
+
+    Returns:
+        string: hexadecimal sha256 of the paths and content of the sources
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if name != "__pycache__" and (root != directory or name != "rules")
+        )
+        for name in sorted(files):
+            if not name.endswith(".py"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, directory).encode() + b"\0")
+            try:
+                with open(path, mode="rb") as file:
+                    digest.update(file.read())
+            except OSError:
+                continue
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Class storing the results of each rule for each file content
+
+    The cache directory contains:
+      * results/<hash[:2]>/<hash>.json - for a file content hash, a dictionary
+        of the results of each rule keyed by the rule key
+      * stat/<hash[:2]>/<hash>.json - for a file path hash, the stat of the file
+        when it was last hashed and its content hash
+
+    The rule key covers the rule id, origin, ignore and warn settings, the hash
+    of the rule module source, the hash of the j2lint helpers, the jinja2
+    extensions and the j2lint and jinja2 versions, so adding or modifying a
+    rule only invalidates the results of this rule.
+
+    Files are written atomically so the cache can be shared by the parallel
+    workers, the least recently used entries are removed by prune.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        jinja_extensions: Iterable[str] = (),
+    ) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.jinja_extensions = sorted(set(jinja_extensions))
+        self.rule_keys: dict[int, str] = {}
+
+    def _path(self, kind: str, digest: str) -> str:
+        return os.path.join(self.directory, kind, digest[:2], f"{digest}.json")
+
+    def _read_json(self, path: str) -> Any:
+        try:
+            with open(path, mode="r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path: str, data: Any) -> None:
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_file.name, path)
+        except OSError as err:
+            logger.warning("Could not write cache file %s - %s", path, err)
+
+    def rule_key(self, rule: Rule) -> str:
+        """Returns the key identifying the results of a rule
+
+        Args:
+            rule (Rule): the rule
+
+        Returns:
+            string: hexadecimal sha256 of the rule settings and source and
+                    of the source of the helpers
+        """
+        if (key := self.rule_keys.get(id(rule))) is not None:
+            return key
+        source_hash = ""
+        if rule.source_file is not None:
+            try:
+                with open(rule.source_file, mode="rb") as file:
+                    source_hash = hashlib.sha256(file.read()).hexdigest()
+            except OSError:
+                pass
+        key = hashlib.sha256(
+            json.dumps(
+                [
+                    rule.rule_id,
+                    rule.origin,
+                    rule.ignore,
+                    rule in rule.warn,
+                    source_hash,
+                    hash_package(),
+                    self.jinja_extensions,
+                    VERSION,
+                    jinja2.__version__,
+                ]
+            ).encode()
+        ).hexdigest()
+        self.rule_keys[id(rule)] = key
+        return key
+
+    def lookup_stat(self, file_path: str) -> str | None:
+        """Returns the content hash of a file if it did not change since it was
+        last hashed, without reading it
+
+        Args:
+            file_path (string): file path
+
+        Returns:
+            string: the content hash or None
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        entry = self._read_json(self._path("stat", hash_text(file_path)))
+        if entry and entry[:3] == [stat.st_mtime_ns, stat.st_size, stat.st_ino]:
+            return str(entry[3])
+        return None
+
+    def store_stat(self, file_path: str, content_hash: str) -> None:
+        """Records the stat of a file along its content hash
+
+        Args:
+            file_path (string): file path
+            content_hash (string): hash of the file content as read
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        if time.time_ns() - stat.st_mtime_ns < RACY_STAT_DELAY:
+            return
+        entry: StatEntry = [stat.st_mtime_ns, stat.st_size, stat.st_ino, content_hash]
+        self._write_json(self._path("stat", hash_text(file_path)), entry)
+
+    def load(self, content_hash: str) -> dict[str, list[CachedError]]:
+        """Returns the cached results for a file content
+
+        Args:
+            content_hash (string): hash of the file content
+
+        Returns:
+            dict: the results keyed by rule key
+        """
+        path = self._path("results", content_hash)
+        results = self._read_json(path)
+        if not isinstance(results, dict):
+            return {}
+        try:
+            # Mark the entry as recently used for prune
+            os.utime(path)
+        except OSError:
+            pass
+        return {
+            key: [tuple(cached_error) for cached_error in value]
+            for key, value in results.items()
+        }
+
+    def store(self, content_hash: str, results: dict[str, list[CachedError]]) -> None:
+        """Adds results to the cached results for a file content
+
+        Args:
+            content_hash (string): hash of the file content
+            results (dict): the new results keyed by rule key
+        """
+        path = self._path("results", content_hash)
+        cached = self._read_json(path)
+        if not isinstance(cached, dict):
+            cached = {}
+        cached.update(results)
+        self._write_json(path, cached)
+
+    def prune(self) -> None:
+        """Removes the least recently used entries until the cache is smaller
+        than max_size
+        """
+        entries = []
+        total_size = 0
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+        logger.debug("Pruned cache %s to %s bytes", self.directory, total_size)
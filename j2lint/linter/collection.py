@@ -14,10 +14,17 @@ from rich.console import Group
 from rich.tree import Tree
 
 from j2lint.logger import logger
-from j2lint.utils import is_rule_disabled, load_plugins
+from j2lint.utils import load_plugins
 
+from .cache import CachedError, ResultCache, hash_text
+from .context import FileContext
+from .diff import DiffIndex
+from .environment import DEFAULT_JINJA_EXTENSIONS
 from .error import LinterError
+from .git import GitBlobReader
+from .reader import read_file
 from .rule import Rule
+from .watchdog import LintTimeout, Watchdog
 
 DEFAULT_RULE_DIR = pathlib.Path(__file__).parent.parent / "rules"
 
@@ -28,6 +35,15 @@ class RulesCollection:
     def __init__(self, verbose: bool = False) -> None:
         self.rules: list[Rule] = []
         self.verbose = verbose
+        self.cache: ResultCache | None = None
+        self.watchdog: Watchdog | None = None
+        # The jinja2 extensions the files are parsed with
+        self.jinja_extensions: tuple[str, ...] = DEFAULT_JINJA_EXTENSIONS
+        # Reads the files from git instead of the disk when set
+        self.git_reader: GitBlobReader | None = None
+        # Only the errors on the lines changed by this diff are reported
+        # when set
+        self.diff: DiffIndex | None = None
 
     def __iter__(self) -> Iterable[Rule]:
         return iter(self.rules)
@@ -45,46 +61,253 @@ class RulesCollection:
         """
         self.rules.extend(more)
 
-    def run(self, file_path: str) -> tuple[list[LinterError], list[LinterError]]:
+    def _lookup_unchanged(
+        self, file_path: str
+    ) -> tuple[str | None, dict[str, list[CachedError]]]:
+        """Returns the content hash and cached results of a file which did not
+        change since it was last hashed and for which all the rules are cached,
+        otherwise (None, {}) and the file must be read
+        """
+        if self.cache is None or not (
+            content_hash := self.cache.lookup_stat(file_path)
+        ):
+            return None, {}
+        cached = self.cache.load(content_hash)
+        if any(
+            self.cache.rule_key(rule) not in cached
+            for rule in self.rules
+            if not rule.ignore
+        ):
+            return None, {}
+        return content_hash, cached
+
+    def _load(
+        self, file_path: str, text: str | None
+    ) -> tuple[str | None, str | None, dict[str, list[CachedError]]]:
+        """Returns the content of a file, its hash and its cached results
+
+        The files without a line changed by the diff are not read when a diff
+        is set. The file is read from git when git_reader is set, from the
+        disk otherwise. The content is None if the file was not read because all
+        the results are cached, or if it could not be read, the hash is None
+        as well then.
+        """
+        if self.diff is not None and not self.diff.get(file_path):
+            logger.debug("Skipping file %s, no line is changed by the diff", file_path)
+            return None, None, {}
+        if text is None and self.git_reader is not None:
+            # The stat of the file on the disk says nothing about its content
+            # in git
+            if (text := self.git_reader.read(file_path)) is None:
+                return None, None, {}
+        content_hash, cached = (
+            self._lookup_unchanged(file_path) if text is None else (None, {})
+        )
+        if content_hash is not None:
+            return None, content_hash, cached
+        if text is None and (text := read_file(file_path)) is None:
+            return None, None, {}
+        if self.cache is not None:
+            content_hash = hash_text(text)
+            cached = self.cache.load(content_hash)
+            if self.git_reader is None:
+                self.cache.store_stat(file_path, content_hash)
+        return text, content_hash, cached
+
+    def _run_rule(
+        self, rule: Rule, context: FileContext
+    ) -> tuple[list[LinterError], LintTimeout | None]:
+        """Runs a rule on a file unless it is disabled in the file
+
+        The errors on the lines where the rule is disabled are removed. When
+        the rule exceeds the watchdog time limits, it is interrupted and a
+        single error reporting the timeout is returned with the exception.
+        """
+        file_path = context.filename
+        suppressions = context.suppressions
+        if suppressions.is_disabled(rule):
+            logger.debug("Skipping linting rule %s on file %s", rule, file_path)
+            return [], None
+        logger.debug("Running linting rule %s on file %s", rule, file_path)
+        if self.watchdog is None:
+            return suppressions.filter(rule, rule.checkfile(context)), None
+        try:
+            with self.watchdog.limit():
+                errors = rule.checkfile(context)
+        except LintTimeout as exc:
+            logger.warning("Rule %s timed out on file %s - %s", rule, file_path, exc)
+            return [
+                LinterError(
+                    exc.line_number or 1,
+                    exc.line if exc.line is not None else context.lines[0],
+                    file_path,
+                    rule,
+                    exc.describe(),
+                )
+            ], exc
+        return suppressions.filter(rule, errors), None
+
+    def _untriggered_rules(self, text: str | None) -> set[Rule]:
+        """Returns the rules which cannot find an error in a file because none
+        of their triggers is in its content
+
+        Each trigger is searched once in the content, even when several rules
+        declare it.
+        """
+        if text is None:
+            return set()
+        triggers = {trigger for rule in self.rules for trigger in rule.triggers}
+        found = {trigger for trigger in triggers if trigger in text}
+        return {
+            rule
+            for rule in self.rules
+            if rule.triggers and found.isdisjoint(rule.triggers)
+        }
+
+    def _run_order(self, file_path: str) -> list[Rule]:
+        """Returns the rules to run on a file, the rules required by a rule
+        coming before it, and logs the ignored rules which are left out
+        """
+        rules = {rule.rule_id: rule for rule in self.rules if not rule.ignore}
+        ordered: dict[Rule, None] = {}
+
+        def add(rule: Rule, required_by: set[str]) -> None:
+            # required_by stops cycles
+            for rule_id in rule.requires:
+                if rule_id in rules and rule_id not in required_by:
+                    add(rules[rule_id], required_by | {rule.rule_id})
+            ordered.setdefault(rule)
+
+        for rule in self.rules:
+            if rule.ignore:
+                logger.debug(
+                    "Ignoring rule %s:%s for file %s",
+                    rule.rule_id,
+                    rule.short_description,
+                    file_path,
+                )
+            else:
+                add(rule, set())
+        return list(ordered)
+
+    def _check_rule(
+        self,
+        rule: Rule,
+        file_path: str,
+        context: FileContext | None,
+        cached: dict[str, list[CachedError]],
+        untriggered: set[Rule],
+    ) -> tuple[list[LinterError], LintTimeout | None]:
+        """Returns the cached results of a rule on a file or runs it unless it
+        is in untriggered
+        """
+        rule_key = self.cache.rule_key(rule) if self.cache is not None else ""
+        if rule_key in cached:
+            logger.debug("Using cached results of rule %s on file %s", rule, file_path)
+            return [
+                LinterError(line_number, line, file_path, rule, message)
+                for line_number, line, message in cached[rule_key]
+            ], None
+        if rule in untriggered:
+            logger.debug(
+                "Skipping linting rule %s on file %s, none of its triggers is in the file",
+                rule,
+                file_path,
+            )
+            return [], None
+        assert context is not None
+        return self._run_rule(rule, context)
+
+    def run(
+        self, file_path: str, text: str | None = None
+    ) -> tuple[list[LinterError], list[LinterError]]:
         """Runs the linting rules for given file
 
+        The rules with triggers are only run if one of them is in the file.
+        When a cache is set, the results of the rules already cached for the
+        file content are replayed and only the other rules are run. If the file
+        did not change since it was last hashed and all the rules are cached,
+        the file is not even read.
+
+        When a diff is set, only the errors on the lines it changes are
+        reported and the files it does not change are skipped. The rules
+        required by another rule still prevent it from running when they found
+        errors on the other lines.
+
         Args:
-            file_dict (dict): file path and file type
+            file_path (string): file path
+            text (string, optional): content of the file if already read,
+                                     otherwise the file is read from disk
 
         Returns:
             tuple(list, list): a tuple containing the list of linting errors
                                and the list of linting warnings found
         """
-        text = ""
+        # pylint: disable=too-many-locals
         errors: list[LinterError] = []
         warnings: list[LinterError] = []
 
-        try:
-            with open(file_path, mode="r", encoding="utf-8") as file:
-                text = file.read()
-        except IOError as err:
-            logger.warning("Could not open %s - %s", file_path, err.strerror)
+        text, content_hash, cached = self._load(file_path, text)
+        if text is None and content_hash is None:
             return errors, warnings
 
-        for rule in self.rules:
-            if rule.ignore:
+        if self.watchdog is not None:
+            self.watchdog.start_file()
+        new_results: dict[str, list[CachedError]] = {}
+        untriggered = self._untriggered_rules(text)
+        changed_lines = self.diff.get(file_path) if self.diff is not None else None
+        # Shared by the rules so that what they derive from the file is only
+        # computed once
+        context = (
+            FileContext(file_path, text, self.jinja_extensions, changed_lines)
+            if text is not None
+            else None
+        )
+        # Ids of the rules which found errors, the rules requiring them are
+        # skipped
+        failed: set[str] = set()
+        for rule in self._run_order(file_path):
+            if failed_required := sorted(failed.intersection(rule.requires)):
                 logger.debug(
-                    "Ignoring rule %s:%s for file %s",
-                    rule.rule_id,
-                    rule.short_description,
+                    "Skipping linting rule %s on file %s, the rules it requires found errors: %s",
+                    rule,
                     file_path,
+                    ", ".join(failed_required),
                 )
                 continue
-            if is_rule_disabled(text, rule):
-                logger.debug("Skipping linting rule %s on file %s", rule, file_path)
-                continue
 
-            logger.debug("Running linting rule %s on file %s", rule, file_path)
+            rule_key = self.cache.rule_key(rule) if self.cache is not None else ""
+            results, timeout = self._check_rule(
+                rule, file_path, context, cached, untriggered
+            )
+            # The results of a rule which timed out or only checked the
+            # changed lines are not cached
+            if (
+                self.cache is not None
+                and rule_key not in cached
+                and timeout is None
+                and changed_lines is None
+            ):
+                new_results[rule_key] = [
+                    (result.line_number, result.line, result.message)
+                    for result in results
+                ]
+
+            if results:
+                failed.add(rule.rule_id)
+            reported = (
+                changed_lines.filter(results) if changed_lines is not None else results
+            )
             if rule in rule.warn:
-                warnings.extend(rule.checkrule(file_path, text))
-
+                warnings.extend(reported)
             else:
-                errors.extend(rule.checkrule(file_path, text))
+                errors.extend(reported)
+
+            if timeout is not None and timeout.scope == "file":
+                break
+
+        if self.cache is not None and content_hash is not None and new_results:
+            self.cache.store(content_hash, new_results)
 
         for error in errors:
             logger.error(error.to_rich())
@@ -0,0 +1,107 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""context.py - Class holding what the rules need to know about a file.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from functools import cached_property
+
+import jinja2
+from jinja2 import nodes
+
+from j2lint.linter.diff import ChangedLines
+from j2lint.linter.environment import AST_CACHE, DEFAULT_JINJA_EXTENSIONS, ParseResult
+from j2lint.utils import (
+    JinjaTokens,
+    LineIndex,
+    Statement,
+    SuppressionIndex,
+    get_jinja_comments,
+    get_jinja_statements,
+    get_jinja_variables,
+    get_line_index,
+    get_suppressions,
+    scan_jinja,
+)
+
+
+class FileContext:
+    """Class giving the rules the content of a file and what is derived from it
+
+    Each artifact is computed the first time a rule reads it and is then
+    shared by all the rules checking the file.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        text: str,
+        jinja_extensions: Iterable[str] = DEFAULT_JINJA_EXTENSIONS,
+        changed_lines: ChangedLines | None = None,
+    ) -> None:
+        """
+        Args:
+            filename (string): file path
+            text (string): content of the file
+            jinja_extensions (iterable): jinja2 extensions to parse the file with
+            changed_lines (ChangedLines, optional): the only lines on which
+                                                    the errors are reported
+        """
+        self.filename = filename
+        self.text = text
+        self.jinja_extensions = tuple(jinja_extensions)
+        self.changed_lines = changed_lines
+
+    @cached_property
+    def line_index(self) -> LineIndex:
+        """The LineIndex of the file"""
+        return get_line_index(self.text)
+
+    @cached_property
+    def lines(self) -> list[str]:
+        """The lines of the file, not to be modified"""
+        return self.line_index.lines
+
+    @cached_property
+    def tokens(self) -> JinjaTokens:
+        """The JinjaToken of the file from scan_jinja"""
+        return scan_jinja(self.text)
+
+    @cached_property
+    def statements(self) -> list[Statement]:
+        """The statements of the file with their indentation"""
+        return get_jinja_statements(self.text, indentation=True)
+
+    @cached_property
+    def variables(self) -> list[str]:
+        """The content of the variables of the file"""
+        return get_jinja_variables(self.text)
+
+    @cached_property
+    def comments(self) -> list[str]:
+        """The content of the comments of the file"""
+        return get_jinja_comments(self.text)
+
+    @cached_property
+    def suppressions(self) -> SuppressionIndex:
+        """The j2lint: disable directives of the file"""
+        return get_suppressions(self.text)
+
+    @cached_property
+    def _parsed(self) -> ParseResult:
+        """Parses the file once for both ast and syntax_error, the AST of a
+        content already parsed by this process is reused"""
+        return AST_CACHE.parse(self.text, self.jinja_extensions)
+
+    @property
+    def ast(self) -> nodes.Template | None:
+        """The jinja2 AST of the file, None if it has a syntax error, shared
+        with the files of the same content and not to be modified"""
+        return self._parsed[0]
+
+    @property
+    def syntax_error(self) -> jinja2.TemplateSyntaxError | None:
+        """The syntax error raised when parsing the file, if any"""
+        return self._parsed[1]
@@ -0,0 +1,248 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""diff.py - Functions and classes to find the lines changed by a diff.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+from bisect import bisect_right
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+from j2lint.utils import is_path_under, is_valid_file_type
+
+if TYPE_CHECKING:
+    from .error import LinterError
+
+_HUNK_HEADER = re.compile(r"@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class ChangedLines:
+    """Sorted intervals of the lines added or modified in a file"""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, line_numbers: list[int]) -> None:
+        """
+        Args:
+            line_numbers (list): the changed lines, starting at 1, in order
+        """
+        # The first and last line of each run of consecutive lines
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        for line_number in line_numbers:
+            if self.ends and line_number <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], line_number)
+            else:
+                self.starts.append(line_number)
+                self.ends.append(line_number)
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def __contains__(self, line_number: object) -> bool:
+        if not isinstance(line_number, int):
+            return False
+        index = bisect_right(self.starts, line_number) - 1
+        return index >= 0 and line_number <= self.ends[index]
+
+    def __repr__(self) -> str:
+        ranges = ", ".join(
+            f"{start}-{end}" if start != end else str(start)
+            for start, end in zip(self.starts, self.ends)
+        )
+        return f"ChangedLines({ranges})"
+
+    def filter(self, errors: list[LinterError]) -> list[LinterError]:
+        """Returns the errors on the changed lines
+
+        Args:
+            errors (list): the errors found in the file
+
+        Returns:
+            list: the errors on the changed lines
+        """
+        return [error for error in errors if error.line_number in self]
+
+    def ranges(self, last: int) -> Iterator[tuple[int, int]]:
+        """Yields the runs of consecutive changed lines up to a line
+
+        Args:
+            last (int): the last line, usually the number of lines of the file
+
+        Returns:
+            a generator that yields the first and last line of each run, in
+            order
+        """
+        for start, end in zip(self.starts, self.ends):
+            if start > last:
+                return
+            yield start, min(end, last)
+
+    def lines(self, last: int) -> Iterator[int]:
+        """Yields the changed lines up to a line
+
+        Args:
+            last (int): the last line, usually the number of lines of the file
+
+        Returns:
+            a generator that yields the changed line numbers in order
+        """
+        for start, end in self.ranges(last):
+            yield from range(start, end + 1)
+
+
+class DiffIndex:
+    """The lines changed in each file of a unified diff
+
+    The paths are relative to the current directory, as in the diffs
+    generated by git from the root of the repository.
+    """
+
+    def __init__(self, files: dict[str, ChangedLines]) -> None:
+        """
+        Args:
+            files (dict): the changed lines keyed by file path
+        """
+        self.files = {os.path.relpath(path): lines for path, lines in files.items()}
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def get(self, file_path: str) -> ChangedLines:
+        """Returns the lines changed in a file, no line if it is not in the diff
+
+        Args:
+            file_path (string): file path
+
+        Returns:
+            ChangedLines: the changed lines
+        """
+        return self.files.get(os.path.relpath(file_path), _NO_CHANGE)
+
+    def select_files(
+        self, file_or_dir_names: list[str], extensions: list[str]
+    ) -> list[str]:
+        """Gets the files with changed lines, without walking the directories
+
+        Args:
+            file_or_dir_names (list): list of directories and files
+            extensions (list): list of file extensions to look for
+
+        Returns:
+            list: the sorted paths of the files with changed lines which are
+                  under the given directories and files
+        """
+        roots = [os.path.relpath(name) for name in file_or_dir_names]
+        return sorted(
+            path
+            for path, lines in self.files.items()
+            if lines
+            and is_valid_file_type(path, extensions)
+            and is_path_under(path, roots)
+        )
+
+
+_NO_CHANGE = ChangedLines([])
+
+
+def _new_path(line: str) -> str | None:
+    """Returns the path of the file of a +++ line, None for a deleted file"""
+    # `diff -u` adds the modification time after a tab
+    path = line[4:].rstrip("\n").split("\t")[0]
+    if path == "/dev/null":
+        return None
+    # git prefixes the new paths with b/ unless --no-prefix is given
+    return path[2:] if path.startswith("b/") else path
+
+
+def parse_diff(text: str) -> DiffIndex:
+    """Finds the lines added or modified by a unified diff
+
+    The removed lines are not in the new files, the line now at the place of
+    each removal is changed instead, or the line before it at the end of a
+    hunk, so that the errors introduced by a removal are reported.
+
+    Args:
+        text (string): unified diff, as generated by `git diff` or `diff -u`
+
+    Returns:
+        DiffIndex: the changed lines of each file
+
+    Raises:
+        ValueError: if a hunk header is malformed
+    """
+    changed: dict[str, list[int]] = {}
+    path: str | None = None
+    # Lines left in the current hunk, in the old and the new file
+    old_left = new_left = 0
+    line_number = 0
+    # Not splitlines, which also splits on the form feeds and the other line
+    # boundaries which can be in the diffed lines, the trailing \r of CRLF
+    # line endings is stripped
+    for line in text.replace("\r\n", "\n").split("\n"):
+        if old_left > 0 or new_left > 0:
+            if line.startswith("+"):
+                if path is not None:
+                    changed[path].append(line_number)
+                line_number += 1
+                new_left -= 1
+                continue
+            if line.startswith("-"):
+                if path is not None:
+                    changed[path].append(
+                        line_number if new_left > 0 else max(line_number - 1, 1)
+                    )
+                old_left -= 1
+                continue
+            if line.startswith("\\"):
+                # \ No newline at end of file
+                continue
+            if line.startswith(" ") or not line:
+                # context line, the leading space may have been stripped
+                line_number += 1
+                old_left -= 1
+                new_left -= 1
+                continue
+            # The hunk is shorter than its header says
+            old_left = new_left = 0
+        if line.startswith("+++ "):
+            path = _new_path(line)
+            if path is not None:
+                changed.setdefault(path, [])
+        elif line.startswith("@@ "):
+            if (match := _HUNK_HEADER.match(line)) is None:
+                raise ValueError(f"Malformed hunk header: {line}")
+            old_count, new_start, new_count = match.groups()
+            old_left = int(old_count) if old_count is not None else 1
+            new_left = int(new_count) if new_count is not None else 1
+            # A hunk without new line starts after the line before the removal
+            line_number = int(new_start) + (1 if new_left == 0 else 0)
+    return DiffIndex(
+        {
+            path: ChangedLines(sorted(line_numbers))
+            for path, line_numbers in changed.items()
+        }
+    )
+
+
+def read_diff(file_name: str) -> DiffIndex:
+    """Reads and parses a unified diff
+
+    Args:
+        file_name (string): path of the diff, - for the standard input
+
+    Returns:
+        DiffIndex: the changed lines of each file
+
+    Raises:
+        OSError: if the diff cannot be read
+        ValueError: if the diff is malformed
+    """
+    if file_name == "-":
+        return parse_diff(sys.stdin.read())
+    with open(file_name, mode="r", encoding="utf-8") as file:
+        return parse_diff(file.read())
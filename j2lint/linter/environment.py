@@ -0,0 +1,146 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""environment.py - Shared jinja2 environments and cache of the parsed templates.
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import jinja2
+import jinja2.ext
+from jinja2 import nodes
+from jinja2.utils import import_string
+
+from .cache import hash_text
+
+DEFAULT_JINJA_EXTENSIONS = ("jinja2.ext.do", "jinja2.ext.loopcontrols")
+DEFAULT_AST_CACHE_SIZE = 64
+
+# Using Tuple from typing for 3.8 support
+# (ast, syntax_error), only one of them is not None
+ParseResult = Tuple[Optional[nodes.Template], Optional[jinja2.TemplateSyntaxError]]
+
+
+def parse_jinja_extension(value: str) -> str:
+    """Checks a jinja2 extension given on the command line
+
+    Args:
+        value (string): import path of the extension class
+
+    Returns:
+        string: the import path
+
+    Raises:
+        ArgumentTypeError: if the value is not the path of a jinja2 extension
+    """
+    try:
+        extension = import_string(value)
+    except (ImportError, AttributeError, ValueError) as err:
+        raise argparse.ArgumentTypeError(
+            f"cannot import jinja2 extension '{value}' - {err}"
+        ) from err
+    if not (
+        isinstance(extension, type) and issubclass(extension, jinja2.ext.Extension)
+    ):
+        raise argparse.ArgumentTypeError(f"'{value}' is not a jinja2 extension")
+    return value
+
+
+@lru_cache(maxsize=None)
+def _create_environment(extensions: frozenset[str]) -> jinja2.Environment:
+    return jinja2.Environment(extensions=sorted(extensions))
+
+
+def get_environment(
+    extensions: Iterable[str] = DEFAULT_JINJA_EXTENSIONS,
+) -> jinja2.Environment:
+    """Returns the environment shared by this process for a set of extensions
+
+    The environment is only used to parse the templates, it must not be
+    modified.
+
+    Args:
+        extensions (iterable): import paths of the jinja2 extensions
+
+    Returns:
+        Environment: the jinja2 environment
+    """
+    return _create_environment(frozenset(extensions))
+
+
+class ASTCache:
+    """Class keeping the most recently parsed templates of this process
+
+    The templates are keyed by the hash of their content and the extensions
+    they were parsed with, so a content linted again, e.g. by the daemon, is
+    not parsed again. The syntax errors are kept as well. The hits and misses
+    are counted.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_AST_CACHE_SIZE) -> None:
+        """
+        Args:
+            max_size (int): maximum number of parsed templates kept
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[tuple[str, frozenset[str]], ParseResult] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def parse(
+        self, text: str, extensions: Iterable[str] = DEFAULT_JINJA_EXTENSIONS
+    ) -> ParseResult:
+        """Returns the AST of a template, or its syntax error
+
+        The AST is shared by all the callers parsing the same content and
+        must not be modified.
+
+        Args:
+            text (string): content of the template
+            extensions (iterable): import paths of the jinja2 extensions
+
+        Returns:
+            tuple: the AST and None, or None and the syntax error
+        """
+        extension_set = frozenset(extensions)
+        key = (hash_text(text), extension_set)
+        with self._lock:
+            if (result := self._results.get(key)) is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        try:
+            result = _create_environment(extension_set).parse(text), None
+        except jinja2.TemplateSyntaxError as error:
+            # The traceback would keep the frames of the parser alive
+            result = None, error.with_traceback(None)
+
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        """Removes the parsed templates and resets the counters"""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+AST_CACHE = ASTCache()
@@ -19,6 +19,8 @@ if TYPE_CHECKING:
 class LinterError:
     """Class for lint errors."""
 
+    __slots__ = ("line_number", "line", "filename", "rule", "message")
+
     def __init__(
         self,
         line_number: int,
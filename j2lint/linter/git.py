@@ -0,0 +1,318 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""git.py - Functions to select the files changed in a git repository and
+class to read them from git.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable
+from pathlib import PurePath
+from typing import IO, Any
+
+from j2lint.logger import logger
+from j2lint.utils import (
+    get_files,
+    get_referenced_templates,
+    is_path_under,
+    is_valid_file_type,
+)
+
+from .reader import read_file
+
+# Revision of the index, git names the index version of a file :<path>
+INDEX = ""
+
+
+class GitError(Exception):
+    """Raised when a git command fails"""
+
+
+def run_git(args: list[str]) -> bytes:
+    """Runs a git command in the current directory
+
+    Args:
+        args ([string]): git command line arguments
+
+    Returns:
+        bytes: the standard output of the command
+
+    Raises:
+        GitError: if git cannot be run or the command fails
+    """
+    logger.debug("Running git %s", args)
+    try:
+        process = subprocess.run(["git", *args], capture_output=True, check=False)
+    except OSError as err:
+        raise GitError(f"Cannot run git - {err}") from err
+    if process.returncode != 0:
+        # The first line is the reason, usage help may follow
+        message = process.stderr.decode("utf-8", "replace").strip().split("\n")[0]
+        raise GitError(f"git {' '.join(args)} failed - {message}")
+    return process.stdout
+
+
+def _check_ref(ref: str) -> str:
+    """Returns the reference unless git would take it for an option"""
+    if ref.startswith("-"):
+        raise GitError(f"Invalid git reference '{ref}'")
+    return ref
+
+
+def _split_paths(output: bytes) -> list[str]:
+    """Returns the paths of a NUL separated git output"""
+    return [os.fsdecode(path) for path in output.split(b"\0") if path]
+
+
+def get_changed_paths(ref: str | None = None, revision: str | None = None) -> list[str]:
+    """Gets the paths of the files changed in the current directory
+
+    The files deleted are left out and the paths are relative to the current
+    directory, the files changed outside of it are left out as well.
+
+    Args:
+        ref (string, optional): the commit to compare to, HEAD if not given
+        revision (string, optional): the files to compare, the working tree
+                                     if None, the index if INDEX, otherwise
+                                     a commit or a tree
+
+    Returns:
+        list: the paths of the changed files
+
+    Raises:
+        GitError: if the current directory is not in a git repository or a
+                  commit does not exist
+    """
+    args = ["diff", "--name-only", "-z", "--relative", "--diff-filter=d"]
+    if revision == INDEX:
+        args.append("--cached")
+    args.append(_check_ref(ref if ref is not None else "HEAD"))
+    if revision:
+        args.append(_check_ref(revision))
+    return _split_paths(run_git([*args, "--"]))
+
+
+def get_paths(revision: str) -> list[str]:
+    """Gets the paths of all the files of the index or of a commit in the
+    current directory
+
+    Args:
+        revision (string): INDEX or a commit or a tree
+
+    Returns:
+        list: the paths relative to the current directory
+
+    Raises:
+        GitError: if the current directory is not in a git repository or the
+                  commit does not exist
+    """
+    if revision == INDEX:
+        return _split_paths(run_git(["ls-files", "-z", "--"]))
+    return _split_paths(
+        run_git(["ls-tree", "-r", "-z", "--name-only", _check_ref(revision), "--"])
+    )
+
+
+class GitBlobReader:
+    """Class reading the files of the index or of a commit from git
+
+    The files are read through a single `git cat-file --batch` process, which
+    is started on the first read so the reader can be created in each worker
+    process. The paths are relative to the current directory when the
+    process is started.
+    """
+
+    def __init__(self, revision: str = INDEX) -> None:
+        """
+        Args:
+            revision (string): INDEX or a commit or a tree
+        """
+        self.revision = revision
+        self.process: subprocess.Popen[bytes] | None = None
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> GitBlobReader:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _request(self, object_name: str) -> bytes | None:
+        """Returns the content of a blob, None if it does not exist"""
+        if self.process is None:
+            try:
+                self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+                    ["git", "cat-file", "--batch"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            except OSError as err:
+                raise GitError(f"Cannot run git - {err}") from err
+        stdin: IO[bytes] | None = self.process.stdin
+        stdout: IO[bytes] | None = self.process.stdout
+        assert stdin is not None and stdout is not None
+        stdin.write(os.fsencode(object_name) + b"\n")
+        stdin.flush()
+        # <oid> <type> <size> or <object> missing
+        header = stdout.readline().split()
+        if len(header) != 3:
+            if not header:
+                raise GitError("git cat-file stopped unexpectedly")
+            return None
+        content = stdout.read(int(header[2]) + 1)[:-1]
+        return content if header[1] == b"blob" else None
+
+    def read(self, file_path: str) -> str | None:
+        """Reads the content of a file
+
+        The line endings are translated as when reading the file from the
+        disk.
+
+        Args:
+            file_path (string): path relative to the current directory
+
+        Returns:
+            string: the file content or None if the file could not be read
+        """
+        object_name = f"{self.revision}:./{PurePath(file_path).as_posix()}"
+        if "\n" in object_name:
+            logger.warning("Could not read %s from git - newline in path", file_path)
+            return None
+        with self.lock:
+            content = self._request(object_name)
+        if content is None:
+            logger.warning("Could not read %s from git - not found", object_name)
+            return None
+        try:
+            text = content.decode("utf-8")
+        except UnicodeDecodeError as err:
+            logger.warning("Could not read %s from git - %s", object_name, err)
+            return None
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def close(self) -> None:
+        """Stops the git process"""
+        with self.lock:
+            if self.process is not None:
+                assert self.process.stdin is not None
+                self.process.stdin.close()
+                self.process.wait()
+                if self.process.stdout is not None:
+                    self.process.stdout.close()
+                self.process = None
+
+
+def _path_suffixes(path: str) -> list[str]:
+    """Returns the names a template at this path may be loaded with,
+    e.g. a/b.j2 and b.j2 for a/b.j2"""
+    parts = PurePath(path).parts
+    return ["/".join(parts[start:]) for start in range(len(parts))]
+
+
+def find_dependents(
+    changed: Iterable[str],
+    candidates: Iterable[str],
+    read: Callable[[str], str | None] = read_file,
+) -> list[str]:
+    """Finds the templates which include, import or extend a changed file,
+    directly or through other templates
+
+    The template names are relative to the template search path, which is
+    not known, so a name references all the files whose path ends with it.
+
+    Args:
+        changed (iterable): paths of the changed files
+        candidates (iterable): paths of the templates which may depend on them
+        read (callable): reads the content of a candidate
+
+    Returns:
+        list: the paths of the dependent templates which are not changed
+    """
+    referenced_by: dict[str, list[str]] = {}
+    for file_path in candidates:
+        if (text := read(file_path)) is None:
+            continue
+        for name in get_referenced_templates(text):
+            referenced_by.setdefault(name, []).append(os.path.relpath(file_path))
+
+    seen = {os.path.relpath(path) for path in changed}
+    pending = deque(seen)
+    dependents: list[str] = []
+    while pending:
+        path = pending.popleft()
+        for name in _path_suffixes(path):
+            for dependent in referenced_by.get(name, []):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    pending.append(dependent)
+                    dependents.append(dependent)
+    return dependents
+
+
+def _get_dependents(
+    changed: list[str],
+    file_or_dir_names: list[str],
+    extensions: list[str],
+    revision: str | None,
+) -> list[str]:
+    """Finds the dependents of the changed files among the files of the
+    working tree or of the revision"""
+    if revision is None:
+        return find_dependents(changed, get_files(file_or_dir_names, extensions))
+    candidates = get_changed_files(file_or_dir_names, extensions, revision=revision)
+    with GitBlobReader(revision) as reader:
+        return find_dependents(changed, candidates, reader.read)
+
+
+def get_changed_files(
+    file_or_dir_names: list[str],
+    extensions: list[str],
+    ref: str | None = None,
+    revision: str | None = None,
+    include_dependents: bool = False,
+) -> list[str]:
+    """Gets the files to lint from the git repository
+
+    Only the changed paths are listed, the directories are not walked unless
+    the dependents of the files of the working tree are included.
+
+    Args:
+        file_or_dir_names (list): list of directories and files
+        extensions (list): list of file extensions to look for
+        ref (string, optional): the commit to compare to, all the files of the
+                                revision are returned if not given
+        revision (string, optional): the files to compare, the working tree
+                                     if None, the index if INDEX, otherwise
+                                     a commit or a tree
+        include_dependents (bool): add the templates which include, import or
+                                   extend a changed file
+
+    Returns:
+        list: the sorted file paths
+
+    Raises:
+        GitError: if the files cannot be listed
+    """
+    roots = [os.path.relpath(name) for name in file_or_dir_names]
+    if ref is None and revision is not None:
+        changed = [os.path.relpath(path) for path in get_paths(revision)]
+    else:
+        changed = [os.path.relpath(path) for path in get_changed_paths(ref, revision)]
+        if include_dependents:
+            changed.extend(
+                _get_dependents(changed, file_or_dir_names, extensions, revision)
+            )
+    file_paths = sorted(
+        {
+            path
+            for path in changed
+            if is_valid_file_type(path, extensions) and is_path_under(path, roots)
+        }
+    )
+    logger.debug("Linting files from git %s", file_paths)
+    return file_paths
@@ -11,19 +11,18 @@ from typing import NoReturn, Tuple
 from j2lint.linter.error import JinjaLinterError
 from j2lint.linter.indenter.statement import JINJA_STATEMENT_TAG_NAMES, JinjaStatement
 from j2lint.logger import logger
-from j2lint.utils import Statement, delimit_jinja_statement, flatten, get_tuple
+from j2lint.utils import Statement, delimit_jinja_statement, flatten
 
 BEGIN_TAGS = [item[0] for item in JINJA_STATEMENT_TAG_NAMES]
 END_TAGS = [item[-1] for item in JINJA_STATEMENT_TAG_NAMES]
 MIDDLE_TAGS = list(flatten([[i[1:-1] for i in JINJA_STATEMENT_TAG_NAMES]]))
+# The tags of the block opened by each begin tag
+BLOCK_TAGS = {item[0]: item for item in JINJA_STATEMENT_TAG_NAMES}
 
 INDENT_SHIFT = 4
 DEFAULT_WHITESPACES = 1
 JINJA_START_DELIMITERS = ["{%-", "{%+"]
 
-jinja_node_stack: list[Node] = []
-jinja_delimiter_stack: list[str] = []
-
 # Using Tuple from typing for 3.8 support
 NodeIndentationError = Tuple[int, str, str]
 
@@ -31,18 +30,34 @@ NodeIndentationError = Tuple[int, str, str]
 class Node:
     """Node class which represents a jinja file as a tree"""
 
-    # pylint: disable=too-many-instance-attributes
-    # Eight arguments is reasonable in this case
+    __slots__ = (
+        "statement",
+        "tag",
+        "parent",
+        "node_start",
+        "node_end",
+        "_children",
+        "expected_indent",
+    )
+
     def __init__(self) -> None:
         self.statement: JinjaStatement | None = None
         self.tag: str | None = None
         self.parent: Node = self
         self.node_start: int = 0
         self.node_end: int = 0
-        self.children: list[Node] = []
-        self.block_start_indent: int = 0
+        # Most nodes are statements without children, the list is only
+        # created for the nodes opening a section
+        self._children: list[Node] | None = None
         self.expected_indent: int = 0
 
+    @property
+    def children(self) -> list[Node]:
+        """The nodes of the statements within the section of this node"""
+        if self._children is None:
+            self._children = []
+        return self._children
+
     # pylint: disable=fixme
     # TODO - This should be called create_child_node
     def create_node(self, line: Statement, line_no: int, indent_level: int = 0) -> Node:
@@ -92,174 +107,169 @@ class Node:
             message,
         )
 
-    def check_indent_level(
-        self, result: list[NodeIndentationError], node: Node
-    ) -> None:
+
+class IndentationChecker:
+    """Class checking the indentation of the Jinja statements of a file
+
+    The statements are read once in order and the blocks which are open are
+    kept on an explicit stack, hence the check is linear in the number of
+    statements whatever the depth of the blocks. All the state is held by the
+    checker, a new checker is created for each file.
+    """
+
+    def __init__(self, lines: list[Statement]) -> None:
+        """
+        Args:
+            lines (list): the statements of the file from get_jinja_statements
+        """
+        self.lines = lines
+        self.root = Node()
+        self.errors: list[NodeIndentationError] = []
+        # The open blocks with their begin node and the node of their current
+        # section, which is the begin node or the last middle node
+        self.blocks: list[tuple[Node, Node]] = []
+
+    def check(self) -> list[NodeIndentationError]:
+        """Checks the indentation of the statements and builds the tree
+
+        The indentation of a begin or middle tag is checked once its section
+        is closed, so the errors are in the same order as the nodes of the tree
+        are closed.
+
+        Raises:
+            JinjaLinterError: Raised when the tags are not properly nested or
+                              are not supported by this indenter, the errors
+                              found so far are kept in the errors attribute
+
+        Returns:
+            list: the indentation error tuples
+        """
+        for line_no, line in enumerate(self.lines):
+            if not line[0].split():
+                raise JinjaLinterError(f"Line {line_no} - Empty statement")
+            if self.blocks:
+                section = self.blocks[-1][1]
+                indent_level = self.blocks[-1][0].expected_indent + INDENT_SHIFT
+            else:
+                section = self.root
+                indent_level = 0
+            node = section.create_node(line, line_no, indent_level)
+            if node.tag in BEGIN_TAGS:
+                section.children.append(node)
+                self.blocks.append((node, node))
+            elif node.tag in END_TAGS:
+                self._close_block(node, line_no)
+            elif node.tag in MIDDLE_TAGS:
+                self._open_section(node, line_no)
+            else:
+                section.children.append(node)
+                self.check_indent_level(node)
+
+        if self.blocks:
+            begin, section = self.blocks[-1]
+            raise JinjaLinterError(
+                f"Line {section.node_start} - Missing closing tag 'end{begin.tag}'"
+            )
+        return self.errors
+
+    def _append_error_and_raise(self, node: Node, message: str) -> NoReturn:
+        """Appends an error for the node and raises a JinjaLinterError
+
+        Args:
+            node (Node): the node of the faulty tag
+            message (string): error message
+
+        Raises:
+            JinjaLinterError: always
+        """
+        if (error := node.create_indentation_error(node, message)) is not None:
+            self.errors.append(error)
+        raise JinjaLinterError(message)
+
+    def _open_section(self, node: Node, line_no: int) -> None:
+        """Handles a middle tag, like else, which closes the current section of
+        the innermost block and opens a new one
+
+        Args:
+            node (Node): the node of the middle tag
+            line_no (int): index of the statement
+        """
+        if not self.blocks:
+            raise JinjaLinterError(
+                f"Line {line_no} - Tag '{node.tag}' is not in a block"
+            )
+        begin, section = self.blocks[-1]
+        if node.tag not in BLOCK_TAGS[str(begin.tag)]:
+            self._append_error_and_raise(node, f"Unsupported tag '{node.tag}' found")
+
+        if section is not begin:
+            self.check_indent_level(section)
+        node.node_end = line_no
+        node.expected_indent = begin.expected_indent
+        node.parent = begin.parent
+        begin.parent.children.append(node)
+        self.blocks[-1] = (begin, node)
+
+    def _close_block(self, node: Node, line_no: int) -> None:
+        """Handles an end tag, which closes the innermost block
+
+        Args:
+            node (Node): the node of the end tag
+            line_no (int): index of the statement
+        """
+        if not self.blocks:
+            raise JinjaLinterError(
+                f"Line {line_no} - Tag '{node.tag}' is not in a block"
+            )
+        begin, section = self.blocks[-1]
+        if node.tag != f"end{begin.tag}":
+            self._append_error_and_raise(
+                node, f"Line {line_no} - Tag is out of order '{node.tag}'"
+            )
+
+        if section is not begin:
+            self.check_indent_level(section)
+        begin.node_end = line_no
+        node.node_end = line_no
+        node.expected_indent = begin.expected_indent
+        begin.parent.children.append(node)
+        self.check_indent_level(node)
+        self.blocks.pop()
+        self.check_indent_level(begin)
+
+    def check_indent_level(self, node: Node) -> None:
         """check if the actual and expected indent level for a line match
 
+        The expected level depends on the delimiter of the outermost open block,
+        so the level of a begin tag is checked once its block is closed and the
+        level of a middle or end tag while its block is still open.
+
         Args:
-            result (list): list of tuples of indentation errors
             node (Node): Node object for which to check the level is correct
         """
         if node.statement is None:
             return
         actual = node.statement.begin
+        outermost = self.blocks[0][0].statement if self.blocks else None
         if (
-            jinja_node_stack
-            and jinja_node_stack[0].statement is not None
-            and jinja_node_stack[0].statement.start_delimiter in JINJA_START_DELIMITERS
+            outermost is not None
+            and outermost.start_delimiter in JINJA_START_DELIMITERS
         ):
-            self.block_start_indent = 1
+            block_start_indent = 1
         elif (
             node.expected_indent == 0
             and node.statement.start_delimiter in JINJA_START_DELIMITERS
         ):
-            self.block_start_indent = 1
+            block_start_indent = 1
         else:
-            self.block_start_indent = 0
+            block_start_indent = 0
 
         if node.statement.start_delimiter in JINJA_START_DELIMITERS:
-            expected = node.expected_indent + self.block_start_indent
+            expected = node.expected_indent + block_start_indent
         else:
-            expected = (
-                node.expected_indent + DEFAULT_WHITESPACES + self.block_start_indent
-            )
+            expected = node.expected_indent + DEFAULT_WHITESPACES + block_start_indent
         if actual != expected:
             message = f"Bad Indentation, expected {expected}, got {actual}"
-            if (error := self.create_indentation_error(node, message)) is not None:
-                result.append(error)
+            if (error := node.create_indentation_error(node, message)) is not None:
+                self.errors.append(error)
                 logger.debug(error)
-
-    def _assert_not_none(self, current_line_no: int, new_line_no: int | None) -> int:
-        """
-        Helper function to verify that the new_line_no is not None
-        TODO: Probably should never return None and instead raise in check_indentation
-        """
-        if new_line_no is None:
-            raise JinjaLinterError(
-                "Recursive check_indentation returned None for an opening tag "
-                f"line {current_line_no} - missing closing tag",
-            )
-        return new_line_no
-
-    # pylint: disable=inconsistent-return-statements,fixme
-    # TODO - newer version of pylint (2.17.0) catches some error here
-    #        address in refactoring
-    def check_indentation(
-        self,
-        result: list[NodeIndentationError],
-        lines: list[Statement],
-        line_no: int = 0,
-        indent_level: int = 0,
-    ) -> int | None:
-        """Checks indentation for a list of lines
-        Updates the 'result' list argument with indentation errors
-
-        Args:
-            result (list): list of indentation error tuples
-            lines (list): lines which are to be checked for indentation
-            line_no (int, optional):  the current lines number being evaluated.
-                                      Defaults to 0.
-            indent_level (int, optional): the expected indent level for the
-                                          current line. Defaults to 0.
-
-        Raises:
-            JinjaLinterError: Raises error if the text file has jinja tags
-                              which are not supported by this indenter
-            ValueError: Raised when no begin_tag_tuple can be found in a node in the stack
-
-        Returns:
-            line_no (int) or None
-        """
-
-        def _append_error_to_result_and_raise(message: str) -> NoReturn:
-            """
-            Helper function to append error to result and raise a JinjaLinterError
-            """
-            if (error := self.create_indentation_error(node, message)) is not None:
-                result.append(error)
-            raise JinjaLinterError(message)
-
-        def _handle_begin_tag(node: Node, line_no: int) -> int:
-            jinja_node_stack.append(node)
-            self.children.append(node)
-            line_no = self._assert_not_none(
-                line_no,
-                node.check_indentation(
-                    result, lines, line_no + 1, indent_level + INDENT_SHIFT
-                ),
-            )
-
-            self.check_indent_level(result, node)
-            return line_no
-
-        def _handle_middle_tag(node: Node, line_no: int) -> int:
-            matchnode = jinja_node_stack[-1]
-            node.node_end = line_no
-            node.expected_indent = matchnode.expected_indent
-            indent_level = node.expected_indent
-            matchnode.parent.children.append(node)
-            node.parent = matchnode.parent
-
-            line_no = self._assert_not_none(
-                line_no,
-                node.check_indentation(
-                    result, lines, line_no + 1, indent_level + INDENT_SHIFT
-                ),
-            )
-
-            self.check_indent_level(result, node)
-            return line_no
-
-        def _handle_end_tag(node: Node, line_no: int) -> int:
-            if f"end{jinja_node_stack[-1].tag}" == node.tag:
-                if jinja_node_stack[-1] != self:
-                    return line_no
-                matchnode = jinja_node_stack[-1]
-                matchnode.node_end = line_no
-                node.node_end = line_no
-                node.expected_indent = matchnode.expected_indent
-                self.parent.children.append(node)  # type: ignore
-                if matchnode == self:
-                    line_no += 1
-                    self.check_indent_level(result, node)
-                    jinja_node_stack.pop()
-                    return line_no
-            # End Tag not matching the begin tag - raise an error
-            message = f"Line {line_no} - Tag is out of order '{node.tag}'"
-            _append_error_to_result_and_raise(message)
-
-        while line_no < len(lines):
-            line = lines[line_no]
-            node = self.create_node(line, line_no, indent_level)
-            if node.tag in BEGIN_TAGS:
-                line_no = _handle_begin_tag(node, line_no)
-                continue
-
-            if node.tag in END_TAGS:
-                return _handle_end_tag(node, line_no)
-
-            if node.tag in MIDDLE_TAGS:
-                begin_tag_tuple = get_tuple(
-                    JINJA_STATEMENT_TAG_NAMES, jinja_node_stack[-1].tag
-                )
-                if begin_tag_tuple is None:
-                    _append_error_to_result_and_raise(
-                        f"Node {jinja_node_stack[-1]} should have been a begin_tag"
-                    )
-
-                if node.tag in begin_tag_tuple:  # type: ignore
-                    if jinja_node_stack[-1] != self:
-                        del node
-                        return line_no
-                    line_no = _handle_middle_tag(node, line_no)
-                    continue
-
-                message = f"Unsupported tag '{node.tag}' found"
-                _append_error_to_result_and_raise(message)
-
-            self.children.append(node)
-            line_no = line_no + 1
-            self.check_indent_level(result, node)
-
-        return None
@@ -6,8 +6,6 @@
 from __future__ import annotations
 
 # pylint: disable=too-few-public-methods
-import re
-
 from j2lint.utils import Statement
 
 JINJA_STATEMENT_TAG_NAMES = [
@@ -20,16 +18,35 @@ JINJA_STATEMENT_TAG_NAMES = [
 class JinjaStatement:
     """Class for representing a jinja statement."""
 
+    __slots__ = (
+        "line",
+        "start_line_no",
+        "end_line_no",
+        "start_delimiter",
+        "end_delimiter",
+        "_words",
+    )
+
     # pylint: disable = fixme
     # FIXME - this could probably be a method in Node rather than a class
     #         with no method - maybe a dataclass
     def __init__(self, line: Statement) -> None:
-        whitespaces = re.findall(r"\s*", line[0])
-
-        self.begin: int = len(whitespaces[0])
         self.line: str = line[0]
-        self.words: list[str] = line[0].split()
         self.start_line_no: int = line[1]
         self.end_line_no: int = line[2]
         self.start_delimiter: str = line[3]
         self.end_delimiter: str = line[4]
+        # Split when first read
+        self._words: list[str] | None = None
+
+    @property
+    def begin(self) -> int:
+        """The number of whitespaces before the first word of the statement"""
+        return len(self.line) - len(self.line.lstrip())
+
+    @property
+    def words(self) -> list[str]:
+        """The words of the statement"""
+        if self._words is None:
+            self._words = self.line.split()
+        return self._words
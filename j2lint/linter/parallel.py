@@ -0,0 +1,341 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""parallel.py - Class to run the rules collection on a pool of worker processes.
+"""
+from __future__ import annotations
+
+import itertools
+import math
+import multiprocessing
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing.synchronize import Event
+from typing import Any, List, Tuple
+
+from j2lint.logger import logger
+
+from .budget import LintBudget
+from .collection import RulesCollection
+from .error import LinterError
+from .reader import DEFAULT_PREFETCH_FILES, PrefetchReader
+from .schedule import SizedFiles, order_files
+
+MAX_BATCH_SIZE = 32
+BATCHES_PER_JOB = 4
+
+# Using Tuple from typing for 3.8 support
+# EncodedError is a picklable LinterError
+# (rule_index, line_number, line, filename, message)
+EncodedError = Tuple[int, int, str, str, str]
+# (file_name, errors, warnings)
+BatchResult = Tuple[str, List[EncodedError], List[EncodedError]]
+
+# Collection loaded once per worker process by the pool initializer
+_worker_collection: RulesCollection | None = None  # pylint: disable=invalid-name
+# Set by the parent process to stop the batches between two files
+_worker_stop_event: Event | None = None  # pylint: disable=invalid-name
+
+
+def _init_worker(
+    collection_factory: Callable[[], RulesCollection], stop_event: Event
+) -> None:
+    """Loads the rules collection once when the worker process starts
+
+    Args:
+        collection_factory (callable): picklable callable returning the
+                                       RulesCollection to use in the worker
+        stop_event (Event): event set when the remaining files must be skipped
+    """
+    # pylint: disable=global-statement
+    global _worker_collection, _worker_stop_event
+    _worker_collection = collection_factory()
+    _worker_stop_event = stop_event
+
+
+def encode_errors(
+    collection: RulesCollection, errors: list[LinterError]
+) -> list[EncodedError]:
+    """Converts LinterError objects to picklable tuples
+
+    Rules are loaded dynamically from their directory, hence they cannot be
+    pickled, the rule is referenced by its index in the collection instead.
+
+    Args:
+        collection (RulesCollection): collection the errors were generated with
+        errors (list): list of LinterError
+
+    Returns:
+        list: list of EncodedError tuples
+    """
+    indexes = {id(rule): index for index, rule in enumerate(collection.rules)}
+    return [
+        (
+            indexes[id(error.rule)],
+            error.line_number,
+            error.line,
+            error.filename,
+            error.message,
+        )
+        for error in errors
+    ]
+
+
+def decode_errors(
+    collection: RulesCollection, encoded_errors: list[EncodedError]
+) -> list[LinterError]:
+    """Converts tuples generated by encode_errors back to LinterError objects
+
+    Args:
+        collection (RulesCollection): collection loaded the same way as the one
+                                      used to encode the errors
+        encoded_errors (list): list of EncodedError tuples
+
+    Returns:
+        list: list of LinterError
+    """
+    return [
+        LinterError(line_number, line, filename, collection.rules[index], message)
+        for index, line_number, line, filename, message in encoded_errors
+    ]
+
+
+def _lint_batch(
+    files: list[str], prefetch: int, deadline: float | None = None
+) -> list[BatchResult]:
+    """Runs the worker collection on a batch of files
+
+    Args:
+        files (list): list of file paths
+        prefetch (int): number of files to read ahead
+        deadline (float, optional): time.monotonic() value after which the
+                                    remaining files are skipped
+
+    Returns:
+        list: a list of (file_name, errors, warnings) with encoded issues, the
+              skipped files are not in the list
+    """
+    assert _worker_collection is not None
+    results: list[BatchResult] = []
+    with PrefetchReader(files, max_files=prefetch) as reader:
+        for file_name in files:
+            if (_worker_stop_event is not None and _worker_stop_event.is_set()) or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                break
+            errors, warnings = _worker_collection.run(file_name, reader.read(file_name))
+            results.append(
+                (
+                    file_name,
+                    encode_errors(_worker_collection, errors),
+                    encode_errors(_worker_collection, warnings),
+                )
+            )
+    return results
+
+
+class ParallelRunner:
+    """Class to run the rules collection on files with a pool of processes
+
+    The worker processes are started with the rules collection already loaded
+    and the files are submitted in batches to amortize the IPC cost. The
+    largest files are submitted first, each in its own batch when it is larger
+    than a batch, and the small files are grouped in batches of similar size.
+
+    Only one batch more than the number of workers is submitted at a time, the
+    next batches are submitted as the batches complete. With a budget on the
+    number of errors, each batch holds a single file so that the workers stop
+    soon after the budget runs out.
+    """
+
+    def __init__(
+        self,
+        collection: RulesCollection,
+        collection_factory: Callable[[], RulesCollection],
+        jobs: int,
+        prefetch: int = DEFAULT_PREFETCH_FILES,
+        recent_first: bool = False,
+    ) -> None:
+        """
+        Args:
+            collection (RulesCollection): collection used to decode the results,
+                                          it must be identical to the one returned
+                                          by collection_factory
+            collection_factory (callable): picklable callable used by each worker
+                                           to load the rules collection
+            jobs (int): number of worker processes
+            prefetch (int): number of files each worker reads ahead
+            recent_first (bool): submit the most recently modified files first
+                                 instead of the largest ones
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.collection = collection
+        self.collection_factory = collection_factory
+        self.jobs = jobs
+        self.prefetch = prefetch
+        self.recent_first = recent_first
+        self.stop_event = multiprocessing.Event()
+        self.executor: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> ParallelRunner:
+        self.stop_event.clear()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_worker,
+            initargs=(self.collection_factory, self.stop_event),
+        )
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def batch_size(self, number_of_files: int) -> int:
+        """Returns the maximum number of files to send to a worker at once
+
+        Args:
+            number_of_files (int): total number of files to lint
+
+        Returns:
+            int: batch size
+        """
+        return max(
+            1,
+            min(
+                MAX_BATCH_SIZE,
+                math.ceil(number_of_files / (self.jobs * BATCHES_PER_JOB)),
+            ),
+        )
+
+    def make_batches(self, sized_files: SizedFiles) -> list[list[str]]:
+        """Groups the files in batches of similar size, keeping their order
+
+        A file larger than the target size of a batch is alone in its batch,
+        the other files are added to a batch until it reaches the target size
+        or batch_size files.
+
+        Args:
+            sized_files (list): the (file_path, size) of the files to lint
+
+        Returns:
+            list: list of batches of file paths
+        """
+        total_size = sum(size for _, size in sized_files)
+        target_size = max(1, math.ceil(total_size / (self.jobs * BATCHES_PER_JOB)))
+        max_files = self.batch_size(len(sized_files))
+        batches: list[list[str]] = []
+        batch: list[str] = []
+        batch_bytes = 0
+        for file_path, size in sized_files:
+            if size >= target_size:
+                batches.append([file_path])
+                continue
+            batch.append(file_path)
+            batch_bytes += size
+            if batch_bytes >= target_size or len(batch) >= max_files:
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _collect(
+        self,
+        batches: list[list[str]],
+        budget: LintBudget | None,
+    ) -> dict[str, tuple[list[EncodedError], list[EncodedError]]]:
+        """Submits the batches and waits for them as they complete until the
+        budget runs out
+
+        When the budget runs out, no more batch is submitted, the batches not
+        started yet are cancelled and the running ones stop after their
+        current file.
+        """
+        assert self.executor is not None
+        executor = self.executor
+        results: dict[str, tuple[list[EncodedError], list[EncodedError]]] = {}
+        deadline = budget.deadline if budget is not None else None
+        next_batches = iter(batches)
+        pending: set[Future[list[BatchResult]]] = set()
+
+        def submit(count: int) -> None:
+            for batch in itertools.islice(next_batches, count):
+                pending.add(
+                    executor.submit(_lint_batch, batch, self.prefetch, deadline)
+                )
+
+        def add_results(future: Future[list[BatchResult]]) -> None:
+            for file_name, errors, warnings in future.result():
+                results[file_name] = (errors, warnings)
+                if budget is not None:
+                    budget.add_errors(len(errors))
+
+        submit(self.jobs + 1)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=budget.remaining_time() if budget else None,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                add_results(future)
+            if not done or (budget is not None and budget.is_exhausted()):
+                break
+            submit(len(done))
+
+        if pending:
+            logger.debug("Stopping the workers, %s batches left", len(pending))
+            self.stop_event.set()
+            for future in pending:
+                if not future.cancel():
+                    add_results(future)
+        if budget is not None:
+            budget.is_exhausted()
+        return results
+
+    def run(
+        self, files: list[str], budget: LintBudget | None = None
+    ) -> Iterator[tuple[str, list[LinterError], list[LinterError]]]:
+        """Runs the lint rules collection on the files
+
+        Args:
+            files (list): list of file paths, duplicates are linted once
+            budget (LintBudget, optional): stop submitting files once the
+                                           budget runs out
+
+        Yields:
+            tuple(str, list, list): the file name, list of linting errors and
+                                    list of linting warnings, in the same order
+                                    as the files, the files which were not
+                                    linted because of the budget are skipped
+        """
+        if self.executor is None:
+            raise RuntimeError("ParallelRunner must be used as a context manager")
+
+        unique_files = list(dict.fromkeys(files))
+        sized_files = order_files(unique_files, self.recent_first)
+        batches = (
+            [[file_path] for file_path, _ in sized_files]
+            if budget is not None and budget.max_errors is not None
+            else self.make_batches(sized_files)
+        )
+        logger.debug(
+            "Submitting %s files in %s batches to %s workers",
+            len(unique_files),
+            len(batches),
+            self.jobs,
+        )
+
+        results = self._collect(batches, budget)
+        for file_name in unique_files:
+            if file_name not in results:
+                continue
+            errors, warnings = results[file_name]
+            yield (
+                file_name,
+                decode_errors(self.collection, errors),
+                decode_errors(self.collection, warnings),
+            )
@@ -0,0 +1,150 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""reader.py - Functions and class to read the files to lint.
+"""
+from __future__ import annotations
+
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from j2lint.logger import logger
+
+DEFAULT_PREFETCH_FILES = 16
+DEFAULT_PREFETCH_BYTES = 64 * 1024 * 1024
+DEFAULT_PREFETCH_WORKERS = 4
+
+
+def read_file(file_path: str) -> str | None:
+    """Reads the content of a file
+
+    Args:
+        file_path (string): file path
+
+    Returns:
+        string: the file content or None if the file could not be read
+    """
+    try:
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            return file.read()
+    except IOError as err:
+        logger.warning("Could not open %s - %s", file_path, err.strerror)
+    return None
+
+
+def _read_file_quietly(file_path: str) -> str | None:
+    """Reads the content of a file without logging errors"""
+    try:
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            return file.read()
+    except IOError:
+        return None
+
+
+class PrefetchReader:  # pylint: disable=too-many-instance-attributes
+    """Class reading the next files in a thread pool while the current one
+    is being linted.
+
+    At most `max_files` files are read ahead and reading stops while the
+    content waiting to be consumed exceeds `max_bytes`. The files are expected
+    to be consumed in the order they are given. They are taken from `files`
+    only when they are read ahead or iterated over, so a generator still
+    discovering the files can be given.
+    """
+
+    def __init__(
+        self,
+        files: Iterable[str],
+        max_files: int = DEFAULT_PREFETCH_FILES,
+        max_bytes: int = DEFAULT_PREFETCH_BYTES,
+        workers: int = DEFAULT_PREFETCH_WORKERS,
+    ) -> None:
+        self.files: Iterator[str] = iter(files)
+        # Files taken from `files`, not returned by the iterator yet
+        self.upcoming: deque[str] = deque()
+        # Files taken from `files`, not read ahead nor consumed yet
+        self.pending: deque[str] = deque()
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.futures: dict[str, Future[str | None]] = {}
+        self.buffered_bytes = 0
+        self.lock = threading.Lock()
+        # Threads are only started on the first submit
+        self.executor: ThreadPoolExecutor | None = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="j2lint-reader")
+            if max_files > 0
+            else None
+        )
+
+    def __enter__(self) -> PrefetchReader:
+        if self.executor is not None:
+            self._fill()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self.executor is not None:
+            for future in self.futures.values():
+                future.cancel()
+            self.executor.shutdown()
+            self.executor = None
+        self.futures.clear()
+
+    def __iter__(self) -> Iterator[str]:
+        """Yields the files in order, the same files which are read ahead"""
+        while self.upcoming or self._take():
+            yield self.upcoming.popleft()
+
+    def _take(self) -> bool:
+        """Takes the next file from `files`, returns False if there is none"""
+        if (file_path := next(self.files, None)) is None:
+            return False
+        self.upcoming.append(file_path)
+        self.pending.append(file_path)
+        return True
+
+    def _on_done(self, future: Future[str | None]) -> None:
+        if not future.cancelled() and (text := future.result()) is not None:
+            with self.lock:
+                self.buffered_bytes += len(text)
+
+    def _fill(self) -> None:
+        """Submits reads until the number of files or bytes budget is reached"""
+        assert self.executor is not None
+        while len(self.futures) < self.max_files:
+            with self.lock:
+                if self.buffered_bytes >= self.max_bytes:
+                    return
+            if not self.pending and not self._take():
+                return
+            file_path = self.pending.popleft()
+            if file_path in self.futures:
+                continue
+            future = self.executor.submit(_read_file_quietly, file_path)
+            future.add_done_callback(self._on_done)
+            self.futures[file_path] = future
+
+    def read(self, file_path: str) -> str | None:
+        """Returns the prefetched content of a file
+
+        Args:
+            file_path (string): file path
+
+        Returns:
+            string: the file content or None if the file was not prefetched or
+                    could not be read, in which case the caller is expected to
+                    read it with read_file to report the error
+        """
+        text = None
+        if (future := self.futures.pop(file_path, None)) is not None:
+            if (text := future.result()) is not None:
+                with self.lock:
+                    self.buffered_bytes -= len(text)
+        elif (self.pending or self._take()) and self.pending[0] == file_path:
+            # Not prefetched yet because of the budget, no need to anymore
+            self.pending.popleft()
+        if self.executor is not None:
+            self._fill()
+        return text
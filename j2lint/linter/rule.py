@@ -7,12 +7,39 @@
 from __future__ import annotations
 
 import json
+import re
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from typing import Any, ClassVar, Literal
 
 from rich.text import Text
 
+from j2lint.linter.context import FileContext
+from j2lint.linter.diff import ChangedLines
 from j2lint.linter.error import JinjaLinterError, LinterError
+from j2lint.linter.watchdog import LintTimeout
+from j2lint.utils import (
+    JinjaToken,
+    LineIndex,
+    TokenKind,
+    check_line_tokens,
+    get_line_index,
+    search_lines,
+    search_tokens,
+)
+
+
+def is_skipped_line(line: str) -> bool:
+    """Returns True for the lines which are not checked line by line
+
+    Args:
+        line (string): a single line from the file
+    """
+    # pylint: disable = fixme
+    # FIXME - parsing jinja2 templates .. lines starting with `#
+    #         should probably still be parsed somewhow as these
+    #         are not comments.
+    return line.lstrip().startswith("#")
 
 
 class Rule(ABC):
@@ -24,6 +51,30 @@ class Rule(ABC):
     short_description: ClassVar[str]
     description: ClassVar[str]
     severity: ClassVar[Literal[None, "LOW", "MEDIUM", "HIGH"]]
+    # Rules reporting an error on each line where a regex matches can set it
+    # instead of implementing checklines or checkline, the regex must not
+    # match newlines
+    line_regex: ClassVar[re.Pattern[str] | None] = None
+    # Rules checking the tokens of these kinds on each line, e.g. the
+    # statements, can set them and implement checktokens instead of checktext
+    token_kinds: ClassVar[tuple[TokenKind, ...]] = ()
+    # Rules reporting an error on each line where a regex matches a token of
+    # token_kinds, delimiters included, can set it instead of implementing
+    # checktokens. The string literals of the tokens are blanked so the regex
+    # does not match the delimiters they contain, it must not match newlines
+    token_regex: ClassVar[re.Pattern[str] | None] = None
+    # Rules which can only find errors on the lines with Jinja can set it,
+    # checkline is then only called on these lines and the rule is skipped
+    # for the files without Jinja
+    jinja_lines_only: ClassVar[bool] = False
+    # Substrings without which the rule cannot find any error, the rule is
+    # only run on the files containing at least one of them. A character
+    # class is given as its characters, e.g. ("-", "+"). Empty to always run.
+    triggers: ClassVar[tuple[str, ...]] = ()
+    # Ids of the rules which must find no error in a file for this rule to
+    # run on it, they are run before this rule. The rules which are ignored
+    # are not required.
+    requires: ClassVar[tuple[str, ...]] = ()
 
     def __init__(
         self,
@@ -34,6 +85,8 @@ class Rule(ABC):
         self.ignore = ignore
         self.warn = warn if warn is not None else []
         self.origin = origin
+        # Set by load_plugins to the module the rule was loaded from
+        self.source_file: str | None = None
 
     def __init_subclass__(cls, *args: Any, **kwargs: Any) -> None:
         super().__init_subclass__(**kwargs)
@@ -87,23 +140,113 @@ class Rule(ABC):
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         """This method is expected to be overriden by child classes"""
 
-    @abstractmethod
     def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """This method is expected to be overriden by child classes"""
+        """This method is expected to be overriden by child classes
+
+        By default, an error is reported if line_regex is set and matches.
+        """
+        if self.line_regex is None:
+            raise NotImplementedError
+        matches = self.line_regex.search(line)
+        return [LinterError(line_no, line, filename, self)] if matches else []
+
+    def checktokens(
+        self, tokens: list[JinjaToken], line_index: LineIndex
+    ) -> list[str | None]:
+        """Optional method checking the tokens of token_kinds of a line
+
+        It is called by checkrule when token_kinds is set, on each line with
+        such tokens as given by get_jinja_line_tokens.
+
+        Args:
+            tokens (list): the tokens of the line which fit on it, in order
+            line_index (LineIndex): index of the lines of the file
+
+        Returns:
+            list: a message for each error found on the line, None for the
+                  description of the rule
+        """
+        raise NotImplementedError
+
+    def checklines(
+        self, filename: str, lines: list[str], line_index: LineIndex
+    ) -> list[LinterError]:
+        """Optional method checking all the lines of a file in one call
+
+        Rules checking the text line by line can override it to avoid one
+        checkline call per line, e.g. with a single regex search over
+        line_index.text. The errors on the lines starting with `#` are
+        discarded as these lines are not passed to checkline.
+
+        By default, an error is reported on each line where line_regex
+        matches if it is set. Rule.checkrule then searches line_regex itself,
+        only in the changed lines when it is given some, without calling it.
+
+        Args:
+            filename (string): file path of the file to be checked
+            lines (list): lines of the file, shared between the rules and
+                          not to be modified
+            line_index (LineIndex): index of the lines of the file
+
+        Returns:
+            list[LinterError]: the list of LinterError generated by this rule
+        """
+        if self.line_regex is None:
+            raise NotImplementedError
+        return [
+            LinterError(line_no, lines[line_no - 1], filename, self)
+            for line_no in search_lines(self.line_regex, line_index)
+        ]
+
+    def checkfile(self, context: FileContext) -> list[LinterError]:
+        """Checks a file, this is the method called by RulesCollection
+
+        Rules can override it to use what the context derives from the file,
+        like its statements or its AST, which is computed once for all the
+        rules. By default it calls checkrule, so the rules implementing
+        checktokens, checktext, checklines or checkline work unchanged.
 
-    def checkrule(self, filename: str, text: str) -> list[LinterError]:
+        When the context has changed lines, only the errors on these lines
+        are reported by RulesCollection, the rules can skip the other lines.
+
+        Args:
+            context (FileContext): the file to check
+
+        Returns:
+            list[LinterError]: the list of LinterError generated by this rule
+        """
+        if context.changed_lines is None:
+            return self.checkrule(context.filename, context.text)
+        return self.checkrule(context.filename, context.text, context.changed_lines)
+
+    def checkrule(
+        self, filename: str, text: str, changed_lines: ChangedLines | None = None
+    ) -> list[LinterError]:
         """
         Checks the string text against the current rule by calling
-        either the checkline or checktext method depending on which one is implemented
+        either the checktokens, checktext, checklines or checkline method
+        depending on which one is implemented
+
+        Rules with jinja_lines_only are not run on the files without Jinja.
 
         Args:
             filename (string): file path of the file to be checked
             text (string): file text of the same file
+            changed_lines (ChangedLines, optional): when given, only these
+                                                    lines are checked by
+                                                    checktokens, token_regex,
+                                                    line_regex and checkline
 
         Returns:
             list: list of LinterError from issues in the given file
         """
         errors: list[LinterError] = []
+        line_index = get_line_index(text)
+        if self.jinja_lines_only and not line_index.jinja_lines:
+            return errors
+
+        if self.token_kinds:
+            return self._check_tokens(filename, line_index, changed_lines)
 
         try:
             # First try with checktext
@@ -111,16 +254,101 @@ class Rule(ABC):
             errors.extend(results)
 
         except NotImplementedError:
-            # checkline it is
-            for index, line in enumerate(text.split("\n")):
-                # pylint: disable = fixme
-                # FIXME - parsing jinja2 templates .. lines starting with `#
-                #         should probably still be parsed somewhow as these
-                #         are not comments.
-                if line.lstrip().startswith("#"):
-                    continue
-
-                results = self.checkline(filename, line, line_no=index + 1)
-                errors.extend(results)
-                # errors.append(LinterError(index + 1, line, file["path"], self))
+            lines = line_index.lines
+            try:
+                results = (
+                    self.checklines(filename, lines, line_index)
+                    if self.line_regex is None
+                    else self._search_line_regex(filename, line_index, changed_lines)
+                )
+                errors.extend(
+                    error
+                    for error in results
+                    if not 0 < error.line_number <= len(lines)
+                    or not is_skipped_line(lines[error.line_number - 1])
+                )
+            except NotImplementedError:
+                # checkline it is
+                line_numbers: Iterable[int] = (
+                    line_index.jinja_lines
+                    if self.jinja_lines_only
+                    else range(1, len(lines) + 1)
+                )
+                if changed_lines is not None:
+                    line_numbers = (
+                        [
+                            line_no
+                            for line_no in line_numbers
+                            if line_no in changed_lines
+                        ]
+                        if self.jinja_lines_only
+                        else changed_lines.lines(len(lines))
+                    )
+                errors.extend(self._checkline_by_line(filename, lines, line_numbers))
+        return errors
+
+    def _check_tokens(
+        self,
+        filename: str,
+        line_index: LineIndex,
+        changed_lines: ChangedLines | None = None,
+    ) -> list[LinterError]:
+        """Checks the tokens of token_kinds with token_regex if it is set, with
+        checktokens otherwise
+        """
+        if self.token_regex is not None:
+            return [
+                LinterError(line_no, line_index.line(line_no), filename, self)
+                for line_no in search_tokens(
+                    self.token_regex, line_index, self.token_kinds, changed_lines
+                )
+                if not is_skipped_line(line_index.line(line_no))
+            ]
+        return [
+            LinterError(line_no, line, filename, self, message)
+            for line_no, line, message in check_line_tokens(
+                line_index.text,
+                self.token_kinds,
+                lambda tokens: self.checktokens(tokens, line_index),
+                changed_lines,
+            )
+        ]
+
+    def _search_line_regex(
+        self,
+        filename: str,
+        line_index: LineIndex,
+        changed_lines: ChangedLines | None = None,
+    ) -> list[LinterError]:
+        """Reports the lines where line_regex matches, only searching the
+        changed lines when they are given
+        """
+        if self.line_regex is None:
+            raise NotImplementedError
+        ranges = (
+            changed_lines.ranges(len(line_index)) if changed_lines is not None else None
+        )
+        return [
+            LinterError(line_no, line_index.line(line_no), filename, self)
+            for line_no in search_lines(self.line_regex, line_index, ranges)
+        ]
+
+    def _checkline_by_line(
+        self, filename: str, lines: list[str], line_numbers: Iterable[int]
+    ) -> list[LinterError]:
+        """Calls checkline on each of the given lines which is not skipped"""
+        errors: list[LinterError] = []
+        for line_no in line_numbers:
+            line = lines[line_no - 1]
+            if is_skipped_line(line):
+                continue
+
+            try:
+                results = self.checkline(filename, line, line_no=line_no)
+            except LintTimeout as exc:
+                # Recording the line the rule was stuck on
+                exc.line_number = line_no
+                exc.line = line
+                raise
+            errors.extend(results)
         return errors
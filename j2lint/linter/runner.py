@@ -9,6 +9,7 @@ from j2lint.logger import logger
 
 from .collection import RulesCollection
 from .error import LinterError
+from .reader import PrefetchReader
 
 
 class Runner:
@@ -20,11 +21,16 @@ class Runner:
     """
 
     def __init__(
-        self, collection: RulesCollection, file_name: str, checked_files: list[str]
+        self,
+        collection: RulesCollection,
+        file_name: str,
+        checked_files: list[str],
+        reader: PrefetchReader | None = None,
     ) -> None:
         self.collection = collection
         self.files: set[str] = {file_name}
         self.checked_files = checked_files
+        self.reader = reader
 
     def is_already_checked(self, file_path: str) -> bool:
         """Returns true if the file is already checked once
@@ -68,7 +74,11 @@ class Runner:
         #         fortunately there is only one file currently
         for file in files:
             logger.debug("Running linting rules for %s", file)
-            errors, warnings = self.collection.run(file)
+            if self.reader is not None:
+                # text is None when not prefetched, the collection reads it then
+                errors, warnings = self.collection.run(file, self.reader.read(file))
+            else:
+                errors, warnings = self.collection.run(file)
 
         # Update list of checked files
         self.checked_files.extend(files)
@@ -0,0 +1,46 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""schedule.py - Functions to choose the order in which the files are linted.
+"""
+from __future__ import annotations
+
+import os
+from typing import List, Tuple
+
+# Using Tuple from typing for 3.8 support
+# (file_path, size) where the size in bytes is the estimated cost of the file
+SizedFile = Tuple[str, int]
+SizedFiles = List[SizedFile]
+
+
+def order_files(files: list[str], recent_first: bool = False) -> SizedFiles:
+    """Orders the files to lint by decreasing estimated cost
+
+    Linting the largest files first keeps a large file at the end of the list
+    from running alone once all the other files are done.
+
+    Args:
+        files (list): list of file paths
+        recent_first (bool): order by decreasing modification time instead,
+                             to report the issues of the files being edited
+                             first
+
+    Returns:
+        list: the (file_path, size) of the files in the order to lint them,
+              the files which cannot be read have a size of 0
+    """
+    stats = []
+    for file_path in files:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            stats.append((file_path, 0, 0))
+            continue
+        stats.append((file_path, stat.st_size, stat.st_mtime_ns))
+    # sort is stable so the files with the same key keep their order
+    if recent_first:
+        stats.sort(key=lambda stat: stat[2], reverse=True)
+    else:
+        stats.sort(key=lambda stat: stat[1], reverse=True)
+    return [(file_path, size) for file_path, size, _ in stats]
@@ -0,0 +1,301 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""shard.py - Functions to split the files to lint between several runs and to
+merge their results.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Any
+
+from .budget import LintBudget
+from .error import LinterError
+from .rule import Rule
+
+PARTIAL_RESULTS_VERSION = 2
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parses a shard given as I/N on the command line
+
+    Args:
+        value (string): shard index starting at 1 and number of shards
+
+    Returns:
+        tuple(int, int): the shard index and the number of shards
+
+    Raises:
+        ArgumentTypeError: if the value is not a valid shard
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(
+            f"invalid shard '{value}', expected I/N"
+        ) from err
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"invalid shard '{value}', I must be between 1 and N"
+        )
+    return index, count
+
+
+def get_shard(file_path: str, count: int) -> int:
+    """Returns the shard of a file
+
+    The shard only depends on the path so a file is always linted by the same
+    shard, whatever the other files and the machine are.
+
+    Args:
+        file_path (string): file path
+        count (int): number of shards
+
+    Returns:
+        int: the shard index starting at 1
+    """
+    normalized = os.path.normpath(file_path).replace(os.sep, "/")
+    digest = hashlib.sha256(normalized.encode("utf-8", "surrogatepass")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(files: list[str], index: int, count: int) -> list[str]:
+    """Returns the files of a shard
+
+    Args:
+        files (list): list of all the file paths
+        index (int): shard index starting at 1
+        count (int): number of shards
+
+    Returns:
+        list: the file paths of the shard in the same order
+    """
+    return [file_path for file_path in files if get_shard(file_path, count) == index]
+
+
+def _encode_issues(issues: list[LinterError]) -> list[list[Any]]:
+    return [
+        [issue.rule.rule_id, issue.line_number, issue.line, issue.message]
+        for issue in issues
+    ]
+
+
+def write_partial_results(
+    path: str,
+    shard: tuple[int, int],
+    files: list[str],
+    lint_errors: dict[str, list[LinterError]],
+    lint_warnings: dict[str, list[LinterError]],
+    budget: LintBudget | None = None,
+) -> None:
+    """Writes the results of a shard to be merged with merge_partial_results
+
+    Only the files with issues and the files not checked because the budget
+    ran out are recorded, with their position in the list of all the files so
+    the merged output is in the same order as a full run.
+
+    Args:
+        path (string): path of the partial results file
+        shard (tuple): the shard index and the number of shards
+        files (list): list of all the file paths, before sharding
+        lint_errors (dict): linting errors by file path
+        lint_warnings (dict): linting warnings by file path
+        budget (LintBudget, optional): the budget the shard was linted with
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    positions: dict[str, int] = {}
+    for position, file_path in enumerate(files):
+        positions.setdefault(file_path, position)
+
+    rules: dict[str, list[Any]] = {}
+    recorded_files = []
+    for file_path, errors in lint_errors.items():
+        warnings = lint_warnings.get(file_path, [])
+        if not errors and not warnings:
+            continue
+        for issue in errors + warnings:
+            rules.setdefault(
+                issue.rule.rule_id,
+                [
+                    issue.rule.short_description,
+                    issue.rule.description,
+                    issue.rule.severity,
+                ],
+            )
+        recorded_files.append(
+            [
+                positions.get(file_path, len(files)),
+                file_path,
+                _encode_issues(errors),
+                _encode_issues(warnings),
+            ]
+        )
+
+    if budget is None:
+        budget = LintBudget()
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "version": PARTIAL_RESULTS_VERSION,
+                "shard": list(shard),
+                "file_count": len(files),
+                "rules": rules,
+                "files": recorded_files,
+                "not_checked": [
+                    [positions.get(file_path, len(files)), file_path]
+                    for file_path in budget.not_checked
+                ],
+                "stop_reason": budget.reason if budget.not_checked else None,
+            },
+            file,
+            separators=(",", ":"),
+        )
+
+
+class RecordedRule(Rule):
+    """Rule of an issue read back from a partial results file, it cannot be run
+
+    The rule attributes are set on a subclass created by make_recorded_rule.
+    """
+
+    rule_id = ""
+    short_description = ""
+    description = ""
+    severity = None
+
+    def checktext(self, filename: str, text: str) -> list[LinterError]:
+        raise NotImplementedError
+
+    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
+        raise NotImplementedError
+
+
+def make_recorded_rule(
+    rule_id: str, short_description: str, description: str, severity: str | None
+) -> RecordedRule:
+    """Returns a rule with the attributes recorded in a partial results file
+
+    Args:
+        rule_id (string): rule id
+        short_description (string): rule short description
+        description (string): rule description
+        severity (string): rule severity
+
+    Returns:
+        RecordedRule: the rule
+    """
+    rule_class = type(
+        "RecordedRule",
+        (RecordedRule,),
+        {
+            "rule_id": rule_id,
+            "short_description": short_description,
+            "description": description,
+            "severity": severity,
+        },
+    )
+    rule: RecordedRule = rule_class()
+    return rule
+
+
+def _read_partial_results(paths: list[str]) -> list[dict[str, Any]]:
+    """Reads the partial results files and checks they make a complete run"""
+    partials = []
+    for path in paths:
+        try:
+            with open(path, mode="r", encoding="utf-8") as file:
+                partial = json.load(file)
+        except (OSError, ValueError) as err:
+            raise ValueError(f"Could not read partial results {path} - {err}") from err
+        if (
+            not isinstance(partial, dict)
+            or partial.get("version") != PARTIAL_RESULTS_VERSION
+        ):
+            raise ValueError(f"{path} is not a j2lint partial results file")
+        partials.append(partial)
+
+    if not partials:
+        raise ValueError("No partial results to merge")
+    count = partials[0]["shard"][1]
+    indexes = sorted(partial["shard"][0] for partial in partials)
+    if (
+        any(partial["shard"][1] != count for partial in partials)
+        or any(
+            partial["file_count"] != partials[0]["file_count"] for partial in partials
+        )
+        or indexes != list(range(1, count + 1))
+    ):
+        shards = ", ".join(
+            f"{partial['shard'][0]}/{partial['shard'][1]}" for partial in partials
+        )
+        raise ValueError(f"The partial results do not make a complete run: {shards}")
+    return partials
+
+
+def _merge_budgets(partials: list[dict[str, Any]]) -> LintBudget | None:
+    """Returns a budget with the files the shards did not check, None if all
+    the shards checked all their files"""
+    stopped = [partial for partial in partials if partial["not_checked"]]
+    if not stopped:
+        return None
+    budget = LintBudget()
+    budget.reason = ", ".join(
+        f"shard {partial['shard'][0]}/{partial['shard'][1]}: {partial['stop_reason']}"
+        for partial in sorted(stopped, key=lambda partial: partial["shard"][0])
+    )
+    budget.not_checked = [
+        file_path
+        for _, file_path in sorted(
+            recorded for partial in stopped for recorded in partial["not_checked"]
+        )
+    ]
+    return budget
+
+
+def merge_partial_results(
+    paths: list[str],
+) -> tuple[
+    dict[str, list[LinterError]], dict[str, list[LinterError]], LintBudget | None
+]:
+    """Merges the partial results files written by all the shards of a run
+
+    Args:
+        paths (list): paths of the partial results files
+
+    Returns:
+        tuple(dict, dict, LintBudget): the linting errors and warnings by file
+                                       path, in the order of a full run, and
+                                       the files not checked by the shards
+                                       which stopped early, None if none did
+
+    Raises:
+        ValueError: if a file cannot be read or the shards do not make a
+                    complete run
+    """
+    partials = _read_partial_results(paths)
+
+    rules: dict[str, Rule] = {}
+    recorded_files = []
+    for partial in partials:
+        for rule_id, rule_data in partial["rules"].items():
+            if rule_id not in rules:
+                rules[rule_id] = make_recorded_rule(rule_id, *rule_data)
+        recorded_files.extend(partial["files"])
+
+    lint_errors: dict[str, list[LinterError]] = {}
+    lint_warnings: dict[str, list[LinterError]] = {}
+    for _, file_path, errors, warnings in sorted(
+        recorded_files, key=lambda recorded: (recorded[0], recorded[1])
+    ):
+        lint_errors[file_path] = [
+            LinterError(line_number, line, file_path, rules[rule_id], message)
+            for rule_id, line_number, line, message in errors
+        ]
+        lint_warnings[file_path] = [
+            LinterError(line_number, line, file_path, rules[rule_id], message)
+            for rule_id, line_number, line, message in warnings
+        ]
+    return lint_errors, lint_warnings, _merge_budgets(partials)
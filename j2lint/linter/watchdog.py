@@ -0,0 +1,114 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""watchdog.py - Class to interrupt the rules running for too long.
+"""
+from __future__ import annotations
+
+import signal
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import FrameType
+
+
+class LintTimeout(Exception):
+    """Raised when a rule or a file runs longer than its time limit"""
+
+    def __init__(self, scope: str, limit: float) -> None:
+        """
+        Args:
+            scope (string): "rule" or "file", the limit which was exceeded
+            limit (float): the time limit in seconds
+        """
+        super().__init__(f"{scope} time limit of {limit}s exceeded")
+        self.scope = scope
+        self.limit = limit
+        # Set by Rule.checkrule and the searches of j2lint.utils for the
+        # rules checking the file line by line or token by token
+        self.line_number: int | None = None
+        self.line: str | None = None
+
+    def describe(self) -> str:
+        """Returns the message of the error reporting the timeout"""
+        if self.scope == "file":
+            return (
+                f"Timeout: the file was not linted within {self.limit:g}s, "
+                "stopped while running this rule and skipped the next rules"
+            )
+        if self.line_number is not None:
+            return f"Timeout: the rule did not check this line within {self.limit:g}s"
+        return f"Timeout: the rule did not check the file within {self.limit:g}s"
+
+
+class Watchdog:
+    """Class enforcing a time limit on each rule and on each file
+
+    The running rule is interrupted with SIGALRM, hence the limits are only
+    enforced on the platforms with SIGALRM and in the main thread, which is
+    where the serial run and the worker processes lint the files.
+    """
+
+    def __init__(
+        self, rule_timeout: float | None = None, file_timeout: float | None = None
+    ) -> None:
+        """
+        Args:
+            rule_timeout (float, optional): time limit of a rule on a file
+            file_timeout (float, optional): time limit of all the rules on a file
+        """
+        self.rule_timeout = rule_timeout
+        self.file_timeout = file_timeout
+        self.file_deadline: float | None = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Returns True if the time limits can be enforced in this thread"""
+        return (
+            hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    def start_file(self) -> None:
+        """Starts the time limit of a new file"""
+        self.file_deadline = (
+            time.monotonic() + self.file_timeout
+            if self.file_timeout is not None
+            else None
+        )
+
+    @contextmanager
+    def limit(self) -> Iterator[None]:
+        """Context manager running a rule within the rule and file time limits
+
+        Raises:
+            LintTimeout: if the rule or the file time limit is exceeded
+        """
+        limit = self.rule_timeout
+        scope = "rule"
+        if self.file_deadline is not None:
+            remaining = self.file_deadline - time.monotonic()
+            if limit is None or remaining < limit:
+                limit = remaining
+                scope = "file"
+        if limit is None or not self.is_supported():
+            yield
+            return
+        if limit <= 0:
+            raise LintTimeout("file", self.file_timeout or 0.0)
+
+        exceeded = LintTimeout(
+            scope, limit if scope == "rule" else self.file_timeout or 0.0
+        )
+
+        def on_alarm(_signum: int, _frame: FrameType | None) -> None:
+            raise exceeded
+
+        previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, limit)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
@@ -6,11 +6,11 @@
 """
 from __future__ import annotations
 
-import re
 from typing import Any
 
 from j2lint.linter.error import LinterError
 from j2lint.linter.rule import Rule
+from j2lint.utils import JinjaToken, LineIndex, get_unspaced_operators
 
 
 class JinjaOperatorHasSpacesRule(Rule):
@@ -23,25 +23,11 @@ class JinjaOperatorHasSpacesRule(Rule):
     )
     short_description = "operator-enclosed-by-spaces"
     severity = "LOW"
+    triggers = ("|", "+", "==")
+    jinja_lines_only = True
+    token_kinds = ("statement", "variable")
 
-    # pylint: disable=fixme
-    # TODO make the regex detect the operator position
-    operators = ["|", "+", "=="]
-    regexes = []
-    for operator in operators:
-        operator = "\\" + operator
-        regex = (
-            r"({[{|%](.*?)([^ |^}]"
-            + operator
-            + ")(.*?)[}|%]})|({[{|%](.*?)("
-            + operator
-            + r"[^ |^{])(.*?)[}|%]})|({[{|%](.*?)([^ |^}] \s+"
-            + operator
-            + ")(.*?)[}|%]})|({[{|%](.*?)("
-            + operator
-            + r" \s+[^ |^{])(.*?)[}|%]})"
-        )
-        regexes.append(re.compile(regex))
+    operators = ("|", "+", "==")
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
@@ -49,47 +35,30 @@ class JinjaOperatorHasSpacesRule(Rule):
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
 
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """Checks if the given line matches the error regex
+    def checktokens(
+        self, tokens: list[JinjaToken], line_index: LineIndex
+    ) -> list[str | None]:
+        """Checks if the operators of the statements and variables of a line
+        are enclosed by a single space
+
+        A line gets at most one error per operator, reporting the column of the
+        first operator of this kind which is not enclosed by a single space.
 
         Args:
-            line (string): a single line from the file
+            tokens (list): the statements and variables of the line
+            line_index (LineIndex): index of the lines of the file
 
         Returns:
-            list[LinterError]: the list of LinterError generated by this rule
+            list: the message of each error found on the line
         """
-
-        errors: list[LinterError] = []
-        # pylint: disable = fixme
-        # TODO - refactor
-        # This code removes any single quoted string
-        # and any double quoted string to avoid
-        # false positive on operators
-        if "'" in line:
-            regx = re.findall("'([^']*)'", line)
-            for match in regx:
-                line = line.replace(("'" + match + "'"), "''")
-
-        if '"' in line:
-            regx = re.findall('"([^"]*)"', line)
-            for match in regx:
-                line = line.replace(('"' + match + '"'), '""')
-
-        issues = [
-            operator
-            for regex, operator in zip(self.regexes, self.operators)
-            if regex.search(line)
+        columns: dict[str, int] = {}
+        for token in tokens:
+            content_start = token.start + len(token.start_delimiter)
+            for operator, offset in get_unspaced_operators(token.text, self.operators):
+                columns.setdefault(operator, line_index.column(content_start + offset))
+        return [
+            f"The operator {operator} at column {columns[operator]} needs"
+            " to be enclosed by a single space on each side"
+            for operator in self.operators
+            if operator in columns
         ]
-        errors.extend(
-            LinterError(
-                line_no,
-                line,
-                filename,
-                self,
-                f"The operator {issue} needs to be enclosed"
-                " by a single space on each side",
-            )
-            for issue in issues
-        )
-
-        return errors
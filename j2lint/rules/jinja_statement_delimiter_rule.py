@@ -11,7 +11,7 @@ from typing import Any
 
 from j2lint.linter.error import LinterError
 from j2lint.linter.rule import Rule
-from j2lint.utils import get_jinja_statements
+from j2lint.utils import JinjaToken, LineIndex
 
 
 class JinjaStatementDelimiterRule(Rule):
@@ -21,6 +21,9 @@ class JinjaStatementDelimiterRule(Rule):
     description = "Jinja statements should not have {%- or {%+ or -%} as delimiters"
     short_description = "jinja-statements-delimiter"
     severity = "LOW"
+    triggers = ("{%-", "{%+", "-%}")
+    jinja_lines_only = True
+    token_kinds = ("statement",)
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
@@ -28,20 +31,23 @@ class JinjaStatementDelimiterRule(Rule):
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
 
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """Checks if the given line matches the wrong delimiters
+    def checktokens(
+        self, tokens: list[JinjaToken], line_index: LineIndex
+    ) -> list[str | None]:
+        """Checks if the statements of a line have the wrong delimiters
 
         Args:
-            line (string): a single line from the file
+            tokens (list): the statements of the line
+            line_index (LineIndex): index of the lines of the file
 
         Returns:
-            list[LinterError]: the list of LinterError generated by this rule
+            list: an error for each statement with the wrong delimiters
         """
         # pylint: disable=fixme
         # TODO think about a better error message that can identify characters
-        statements = get_jinja_statements(line)
         return [
-            LinterError(line_no, line, filename, self)
-            for statement in statements
-            if statement[3] in ["{%-", "{%+"] or statement[4] == "-%}"
+            None
+            for statement in tokens
+            if statement.start_delimiter in ["{%-", "{%+"]
+            or statement.end_delimiter == "-%}"
         ]
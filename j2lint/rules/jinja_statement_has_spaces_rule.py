@@ -23,23 +23,21 @@ class JinjaStatementHasSpacesRule(Rule):
     description = "Jinja statement should have at least a single space after '{%' and a single space before '%}'"
     short_description = "jinja-statements-single-space"
     severity = "LOW"
-
-    regex = re.compile(r"{%[^ \-\+]|{%[\-\+][^ ]|[^ \-\+]%}|[^ ][\-\+]%}")
+    triggers = ("{%", "%}")
+
+    # The regex does not match newlines, it is searched in each statement.
+    # Every alternative starts with a literal character so that the regex
+    # engine only tries to match at these characters, the characters before
+    # a closing delimiter are checked with a lookbehind.
+    regex = re.compile(
+        r"{%[^ \-\+\n]|{%[\-\+][^ \n]|"
+        r"%}(?<=[^ \-\+\n]%})|-%}(?<=[^ \n]-%})|\+%}(?<=[^ \n]\+%})"
+    )
+    token_kinds = ("statement",)
+    token_regex = regex
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
 
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
-
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """Checks if the given line matches the error regex
-
-        Args:
-            line (string): a single line from the file
-
-        Returns:
-            list[LinterError]: the list of LinterError generated by this rule
-        """
-        matches = self.regex.search(line)
-        return [LinterError(line_no, line, filename, self)] if matches else []
@@ -8,11 +8,11 @@ from __future__ import annotations
 
 from typing import Any
 
+from j2lint.linter.context import FileContext
 from j2lint.linter.error import JinjaLinterError, LinterError
-from j2lint.linter.indenter.node import Node, NodeIndentationError
+from j2lint.linter.indenter.node import IndentationChecker
 from j2lint.linter.rule import Rule
 from j2lint.logger import logger
-from j2lint.utils import get_jinja_statements
 
 
 class JinjaTemplateIndentationRule(Rule):
@@ -25,44 +25,52 @@ class JinjaTemplateIndentationRule(Rule):
         "To close a control, end tag must have same indentation level."
     )
     severity = "HIGH"
+    triggers = ("{%",)
+    # The statements of a template with a syntax error are rarely nested
+    # properly, the indentation check would fail
+    requires = ("S0",)
+    jinja_lines_only = True
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
 
-    def checktext(self, filename: str, text: str) -> list[LinterError]:
-        """Checks if the given text has the error
+    def checkfile(self, context: FileContext) -> list[LinterError]:
+        """Checks if the statements of the file are properly indented
 
         Args:
-            file (string): file path
-            text (string): entire text content of the file
+            context (FileContext): the file to check
 
         Returns:
             list: Returns list of error objects
         """
-        # Collect only Jinja Statements within delimiters {% and %}
-        # and ignore the other statements
-        lines = get_jinja_statements(text, indentation=True)
-
         # Build a tree out of Jinja Statements to get the expected
         # indentation level for each statement
-        root = Node()
-        node_errors: list[NodeIndentationError] = []
+        checker = IndentationChecker(context.statements)
         try:
-            root.check_indentation(node_errors, lines, 0)
-
-        # pylint: disable=fixme
-        # TODO need to fix this index error in Node
-        except (JinjaLinterError, IndexError) as exc:
+            checker.check()
+        except JinjaLinterError as exc:
             logger.error(
                 "Indentation check failed for file %s: Error: %s",
-                filename,
+                context.filename,
                 str(exc),
             )
 
         return [
-            LinterError(line_no, section, filename, self, message)
-            for line_no, section, message in node_errors
+            LinterError(line_no, section, context.filename, self, message)
+            for line_no, section, message in checker.errors
         ]
 
+    def checktext(self, filename: str, text: str) -> list[LinterError]:
+        """Checks if the given text has the error
+
+        Args:
+            file (string): file path
+            text (string): entire text content of the file
+
+        Returns:
+            list: Returns list of error objects
+        """
+        return self.checkfile(FileContext(filename, text))
+
     def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
         raise NotImplementedError
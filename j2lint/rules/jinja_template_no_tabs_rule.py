@@ -20,23 +20,13 @@ class JinjaTemplateNoTabsRule(Rule):
     description = "Indentation should not use tabulation but 4 spaces"
     short_description = "jinja-statements-no-tabs"
     severity = "LOW"
+    triggers = ("\t",)
 
     regex = re.compile(r"\t+")
+    line_regex = regex
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
 
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
-
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """Checks if the given line matches the error regex
-
-        Args:
-            line (string): a single line from the file
-
-        Returns:
-            list[LinterError]: the list of LinterError generated by this rule
-        """
-        matches = self.regex.search(line)
-        return [LinterError(line_no, line, filename, self)] if matches else []
@@ -11,7 +11,7 @@ from typing import Any
 
 from j2lint.linter.error import LinterError
 from j2lint.linter.rule import Rule
-from j2lint.utils import get_jinja_statements
+from j2lint.utils import JinjaToken, LineIndex
 
 
 class JinjaTemplateSingleStatementRule(Rule):
@@ -23,6 +23,9 @@ class JinjaTemplateSingleStatementRule(Rule):
     description = "Jinja statements should be on separate lines"
     short_description = "single-statement-per-line"
     severity = "MEDIUM"
+    triggers = ("{%",)
+    jinja_lines_only = True
+    token_kinds = ("statement",)
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
@@ -30,17 +33,16 @@ class JinjaTemplateSingleStatementRule(Rule):
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
 
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """Checks if the given line matches the error regex
+    def checktokens(
+        self, tokens: list[JinjaToken], line_index: LineIndex
+    ) -> list[str | None]:
+        """Checks if the line has more than one statement
 
         Args:
-            line (string): a single line from the file
+            tokens (list): the statements of the line
+            line_index (LineIndex): index of the lines of the file
 
         Returns:
-            list[LinterError]: the list of LinterError generated by this rule
+            list: an error if the line has more than one statement
         """
-        return (
-            [LinterError(line_no, line, filename, self)]
-            if len(get_jinja_statements(line)) > 1
-            else []
-        )
+        return [None] if len(tokens) > 1 else []
@@ -8,8 +8,7 @@ from __future__ import annotations
 
 from typing import Any
 
-import jinja2
-
+from j2lint.linter.context import FileContext
 from j2lint.linter.error import LinterError
 from j2lint.linter.rule import Rule
 
@@ -25,6 +24,30 @@ class JinjaTemplateSyntaxErrorRule(Rule):
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
 
+    def checkfile(self, context: FileContext) -> list[LinterError]:
+        """Checks if the file has a jinja syntax error
+
+        The file is parsed by its context, once for all the rules.
+
+        Args:
+            context (FileContext): the file to check
+
+        Returns:
+            list: Returns list of error objects
+        """
+        error = context.syntax_error
+        if error is None:
+            return []
+        return [
+            LinterError(
+                error.lineno,
+                context.line_index.line(error.lineno),
+                context.filename,
+                self,
+                error.message,
+            )
+        ]
+
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         """Checks if the given text has jinja syntax error
 
@@ -35,25 +58,7 @@ class JinjaTemplateSyntaxErrorRule(Rule):
         Returns:
             list: Returns list of error objects
         """
-        result = []
-
-        env = jinja2.Environment(
-            extensions=["jinja2.ext.do", "jinja2.ext.loopcontrols"]
-        )
-        try:
-            env.parse(text)
-        except jinja2.TemplateSyntaxError as error:
-            result.append(
-                LinterError(
-                    error.lineno,
-                    text.split("\n")[error.lineno - 1],
-                    filename,
-                    self,
-                    error.message,
-                )
-            )
-
-        return result
+        return self.checkfile(FileContext(filename, text))
 
     def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
         raise NotImplementedError
@@ -27,25 +27,19 @@ class JinjaVariableHasSpaceRule(Rule):
 
     short_description = "single-space-decorator"
     severity = "LOW"
+    triggers = ("{{",)
+    jinja_lines_only = True
 
+    # The regex does not match newlines, it is searched in each variable
     regex = re.compile(
-        r"{{[^ \-\+\d][^}]+}}|{{[-\+][^ ][^}]+}}|{{[^}]+[^ \-\+\d]}}|{{[^}]+[^ {][-\+\d]}}|{{ \s+[^ \-\+]}}|{{[^}]+[^ \-\+] \s+}}"
+        r"{{[^ \-\+\d\n][^}\n]+}}|{{[-\+][^ \n][^}\n]+}}|{{[^}\n]+[^ \-\+\d\n]}}|"
+        r"{{[^}\n]+[^ {\n][-\+\d]}}|{{ [^\S\n]+[^ \-\+\n]}}|{{[^}\n]+[^ \-\+\n] [^\S\n]+}}"
     )
+    token_kinds = ("variable",)
+    token_regex = regex
 
     def __init__(self, ignore: bool = False, warn: list[Any] | None = None) -> None:
         super().__init__()
 
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
-
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
-        """Checks if the given line matches the error regex
-
-        Args:
-            line (string): a single line from the file
-
-        Returns:
-            list[LinterError]: the list of LinterError generated by this rule
-        """
-        matches = self.regex.search(line)
-        return [LinterError(line_no, line, filename, self)] if matches else []
@@ -11,7 +11,7 @@ from typing import Any
 
 from j2lint.linter.error import LinterError
 from j2lint.linter.rule import Rule
-from j2lint.utils import get_jinja_variables
+from j2lint.utils import JinjaToken, LineIndex
 
 # pylint: disable=duplicate-code
 
@@ -26,6 +26,9 @@ class JinjaVariableNameFormatRule(Rule):
     )
     short_description = "jinja-variable-format"
     severity = "LOW"
+    triggers = ("-",)
+    jinja_lines_only = True
+    token_kinds = ("variable",)
 
     regex = re.compile(r"[a-zA-Z0-9-_\"']+[-][a-zA-Z0-9-_\"']+")
 
@@ -35,26 +38,24 @@ class JinjaVariableNameFormatRule(Rule):
     def checktext(self, filename: str, text: str) -> list[LinterError]:
         raise NotImplementedError
 
-    def checkline(self, filename: str, line: str, line_no: int) -> list[LinterError]:
+    def checktokens(
+        self, tokens: list[JinjaToken], line_index: LineIndex
+    ) -> list[str | None]:
         """
-        Checks if the given line matches the error regex, which matches
+        Checks if the variables of a line match the error regex, which matches
         variables using `-` in their name
 
         Args:
-            line (string): a single line from the file
+            tokens (list): the variables of the line
+            line_index (LineIndex): index of the lines of the file
 
         Returns:
-            list[LinterError]: the list of LinterError generated by this rule
+            list: the message of each error found on the line
         """
-        variables = get_jinja_variables(line)
         matches = []
-        for var in variables:
-            matches = re.findall(self.regex, var)
+        for var in tokens:
+            matches = re.findall(self.regex, var.text)
             matches = [
                 match for match in matches if ("'" not in match) and ('"' not in match)
             ]
-
-        return [
-            LinterError(line_no, line, filename, self, f"{self.description}: {match}")
-            for match in matches
-        ]
+        return [f"{self.description}: {match}" for match in matches]
@@ -8,13 +8,19 @@ from __future__ import annotations
 import glob
 import importlib.util
 import os
+import posixpath
 import re
-from collections.abc import Generator, Iterable
-from typing import TYPE_CHECKING, Any, Tuple
+from bisect import bisect_right
+from collections.abc import Callable, Container, Generator, Iterable, Iterator
+from functools import cached_property, lru_cache
+from itertools import groupby
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, Tuple
 
+from j2lint.linter.watchdog import LintTimeout
 from j2lint.logger import logger
 
 if TYPE_CHECKING:
+    from .linter.error import LinterError
     from .linter.rule import Rule
 
 # Using Tuple from typing for 3.8 support
@@ -22,6 +28,47 @@ if TYPE_CHECKING:
 # (line_without_delimiter, start_line, end_line, start_delimiter, end_delimiter)
 Statement = Tuple[str, int, int, str, str]
 
+TokenKind = Literal["text", "raw", "statement", "variable", "comment"]
+
+
+class JinjaToken(NamedTuple):
+    """A section of a template found by scan_jinja
+
+    The kind is "statement" for {% %}, "variable" for {{ }}, "comment" for {# #},
+    "raw" for the content of a {% raw %} block and "text" for the rest.
+    """
+
+    kind: TokenKind
+    # content of the token without the delimiters
+    text: str
+    # offsets of the token in the template, delimiters included
+    start: int
+    end: int
+    # lines of the start and of the end of the content, starting at 1
+    start_line: int
+    end_line: int
+    # empty for the text and raw tokens, the statement delimiters include
+    # the whitespace control characters: {%-, {%+ and -%}
+    start_delimiter: str
+    end_delimiter: str
+
+
+JinjaTokens = Tuple[JinjaToken, ...]
+
+_NEWLINE = re.compile(r"\n")
+_NON_SPACE = re.compile(r"\S")
+_JINJA_OPENING = re.compile(r"\{[{%#]")
+_OPENING_DELIMITER = re.compile(r"\{%[-+]?|\{\{|\{#")
+_VARIABLE_END = re.compile(r"\}\}|['\"]")
+_STATEMENT_END = re.compile(r"%\}|['\"]")
+_RAW_BLOCK = re.compile(r"\s*raw\s*[-+]?")
+_ENDRAW_STATEMENT = re.compile(r"\{%[-+]?\s*endraw\s*[-+]?%\}")
+_TEMPLATE_REFERENCE = re.compile(r"\s*(?:include|import|from|extends)\b")
+_QUOTE = re.compile(r"['\"]")
+_NOT_NEWLINE = re.compile(r"[^\n]")
+_STRING_LITERAL = re.compile(r"\"([^\"]*)\"|'([^']*)'")
+_DISABLE_COMMENT = re.compile(r"j2lint\s*:\s*disable(-line|-next-line)?\s*=\s*([\w-]+)")
+
 
 def load_plugins(directory: str) -> list[Rule]:
     """Loads and executes all the Rule modules from the specified directory
@@ -47,6 +94,7 @@ def load_plugins(directory: str) -> list[Rule]:
                 if spec.loader is not None:
                     spec.loader.exec_module(module)
                     obj = getattr(module, class_name)()
+                    obj.source_file = plugin_file
                     result.append(obj)
         except AttributeError:
             logger.warning("Failed to load plugin %s", plugin_name)
@@ -70,6 +118,79 @@ def is_valid_file_type(file_name: str, extensions: list[str]) -> bool:
     return extension in extensions
 
 
+def is_path_under(path: str, roots: list[str]) -> bool:
+    """Checks if a path is one of the roots or in one of them
+
+    Args:
+        path (string): normalized relative path
+        roots (list): normalized relative paths of files and directories
+
+    Returns:
+        boolean: True if the path is under one of the roots
+    """
+    return any(
+        root == os.curdir or path == root or path.startswith(root + os.sep)
+        for root in roots
+    )
+
+
+def _has_extension(name: str, extensions: frozenset[str]) -> bool:
+    """Checks the extension of a file name as is_valid_file_type does, without
+    splitting and lowering the names without a dot"""
+    dot = name.rfind(".")
+    # The leading dots of a hidden file do not start an extension
+    return dot > 0 and name[dot:].lower() in extensions and name[:dot].strip(".") != ""
+
+
+def iter_files(
+    file_or_dir_names: Iterable[str], extensions: Iterable[str]
+) -> Iterator[str]:
+    """Yields the files of directories recursively as they are found
+
+    The directories are listed with os.scandir, whose entries know their type
+    without a stat on most platforms. The entries of each directory are
+    sorted by name and its files are yielded before the files of its
+    subdirectories, so the order does not depend on the file system. As with
+    os.walk, the symbolic links to directories are not followed and the
+    directories which cannot be listed are skipped.
+
+    Args:
+        file_or_dir_names (iterable): directories and files
+        extensions (iterable): file extensions to look for
+
+    Returns:
+        a generator that yields the file paths
+    """
+    extension_set = frozenset(extensions)
+    for file_or_dir in file_or_dir_names:
+        if not os.path.isdir(file_or_dir):
+            if _has_extension(os.path.basename(file_or_dir), extension_set):
+                yield file_or_dir
+            continue
+        directories = [file_or_dir]
+        while directories:
+            directory = directories.pop()
+            try:
+                with os.scandir(directory) as scanner:
+                    entries = sorted(scanner, key=lambda entry: entry.name)
+            except OSError as err:
+                logger.debug("Could not list %s - %s", directory, err)
+                continue
+            subdirectories = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    if _has_extension(entry.name, extension_set):
+                        yield entry.path
+                elif not entry.is_symlink():
+                    subdirectories.append(entry.path)
+            # Popped in order from the end of the stack
+            directories.extend(reversed(subdirectories))
+
+
 def get_files(file_or_dir_names: list[str], extensions: list[str]) -> list[str]:
     """Get files from a directory recursively
 
@@ -78,28 +199,29 @@ def get_files(file_or_dir_names: list[str], extensions: list[str]) -> list[str]:
         extensions (list): list of file extensions to look for
 
     Returns:
-        list: list of file paths
+        list: list of file paths, in the order of iter_files
     """
-    file_paths: list[str] = []
-
     if not isinstance(file_or_dir_names, (list, set)):
         raise TypeError(
             f"get_files expects a list or a set and got {file_or_dir_names}"
         )
 
-    for file_or_dir in file_or_dir_names:
-        if os.path.isdir(file_or_dir):
-            for root, _, files in os.walk(file_or_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if is_valid_file_type(file_path, extensions):
-                        file_paths.append(file_path)
-        elif is_valid_file_type(file_or_dir, extensions):
-            file_paths.append(file_or_dir)
+    file_paths = list(iter_files(file_or_dir_names, extensions))
     logger.debug("Linting directory %s: files %s", file_or_dir_names, file_paths)
     return file_paths
 
 
+def available_cpus() -> int:
+    """Returns the number of CPUs the current process can run on
+
+    Returns:
+        int: number of usable CPUs, at least 1
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
 def flatten(nested_list: Iterable[Any]) -> Generator[Any, Any, Any]:
     """Flattens an iterable
 
@@ -135,11 +257,503 @@ def get_tuple(
     return next((entry for entry in list_of_tuples if item in entry), None)
 
 
+class LineIndex:
+    """Index of the offsets where the lines of a text start
+
+    The index is built once per text, the conversions between offsets and
+    line numbers are then a binary search. Line numbers and columns start
+    at 1 like the line numbers reported by the rules.
+    """
+
+    def __init__(self, text: str) -> None:
+        """
+        Args:
+            text (string): text to index
+        """
+        self.text = text
+        self.line_starts = [0] + [match.end() for match in _NEWLINE.finditer(text)]
+
+    @cached_property
+    def lines(self) -> list[str]:
+        """The lines of the text as returned by text.split("\\n")"""
+        return self.text.split("\n")
+
+    @cached_property
+    def jinja_lines(self) -> list[int]:
+        """The numbers of the lines which can contain Jinja, in order
+
+        These are the lines with a {{, {% or {# and the lines within a
+        statement, variable or comment spanning multiple lines.
+        """
+        line_numbers = {
+            self.line_number(match.start())
+            for match in _JINJA_OPENING.finditer(self.text)
+        }
+        for token in scan_jinja(self.text):
+            if token.start_line != token.end_line and token.kind not in (
+                "text",
+                "raw",
+            ):
+                line_numbers.update(range(token.start_line, token.end_line + 1))
+        return sorted(line_numbers)
+
+    def __len__(self) -> int:
+        """Returns the number of lines, a text ending with a newline has an
+        empty last line like with text.split("\\n")
+        """
+        return len(self.line_starts)
+
+    def line_number(self, offset: int) -> int:
+        """Returns the number of the line containing the character at offset
+
+        Args:
+            offset (int): offset in the text, the offset of a newline is on
+                          the line the newline ends
+        """
+        return bisect_right(self.line_starts, offset)
+
+    def line_offset(self, line_number: int) -> int:
+        """Returns the offset of the first character of a line
+
+        Raises:
+            IndexError: if the line is not in the text
+        """
+        if not 1 <= line_number <= len(self.line_starts):
+            raise IndexError(f"Line {line_number} is not in the text")
+        return self.line_starts[line_number - 1]
+
+    def column(self, offset: int) -> int:
+        """Returns the column of the character at offset in its line"""
+        return offset - self.line_starts[self.line_number(offset) - 1] + 1
+
+    def line(self, line_number: int) -> str:
+        """Returns the text of a line without its newline
+
+        Raises:
+            IndexError: if the line is not in the text
+        """
+        start = self.line_offset(line_number)
+        if line_number == len(self.line_starts):
+            return self.text[start:]
+        end = self.line_starts[line_number] - 1
+        return self.text[start:end]
+
+
+@lru_cache(maxsize=16)
+def get_line_index(text: str) -> LineIndex:
+    """Returns the LineIndex of a text
+
+    The index of the last texts is cached so the utilities and the rules
+    checking the same file share it.
+    """
+    return LineIndex(text)
+
+
+def search_lines(
+    regex: re.Pattern[str],
+    line_index: LineIndex,
+    ranges: Iterable[tuple[int, int]] | None = None,
+) -> Generator[int, None, None]:
+    """Searches a regex in each line of a text with a single pass over the text
+
+    The search resumes at the start of the next line after each match, this
+    gives the lines where regex.search(line) matches as long as the regex
+    cannot match a newline.
+
+    Args:
+        regex (re.Pattern): compiled regex which does not match newlines
+        line_index (LineIndex): index of the text to search
+        ranges (iterable, optional): the first and last line of each run of
+                                     lines to search, in order, the text
+                                     outside of them is not searched
+
+    Returns:
+        a generator that yields the numbers of the lines where the regex matches
+
+    Raises:
+        LintTimeout: with the first line of the search which was interrupted
+    """
+    text = line_index.text
+    for start, end in ranges if ranges is not None else [(1, len(line_index))]:
+        pos = line_index.line_offset(start)
+        endpos = line_index.line_offset(end + 1) if end < len(line_index) else len(text)
+        try:
+            while (match := regex.search(text, pos, endpos)) is not None:
+                line_number = line_index.line_number(match.start())
+                yield line_number
+                if line_number >= end:
+                    break
+                pos = line_index.line_offset(line_number + 1)
+        except LintTimeout as exc:
+            exc.line_number = line_index.line_number(pos)
+            exc.line = line_index.line(exc.line_number)
+            raise
+
+
+def _find_string_end(text: str, pos: int) -> int:
+    """Finds the end of the string literal starting with the quote at pos
+
+    Args:
+        text (string): template text
+        pos (int): offset of the opening quote
+
+    Returns:
+        int: offset after the closing quote, -1 if the string is not closed
+    """
+    quote = text[pos]
+    index = pos
+    while True:
+        index = text.find(quote, index + 1)
+        if index == -1:
+            return -1
+        backslashes = 0
+        while text[index - 1 - backslashes] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return index + 1
+
+
+def _find_tag_end(text: str, pattern: re.Pattern[str], pos: int) -> int:
+    """Finds the closing delimiter of a statement or a variable
+
+    The closing delimiters within string literals are skipped, like the
+    Jinja lexer does.
+
+    Args:
+        text (string): template text
+        pattern (re.Pattern): matches the closing delimiter or a quote
+        pos (int): offset of the content of the tag
+
+    Returns:
+        int: offset of the closing delimiter, -1 if the tag is not closed
+    """
+    while True:
+        match = pattern.search(text, pos)
+        if match is None:
+            return -1
+        if match.group() not in ("'", '"'):
+            return match.start()
+        string_end = _find_string_end(text, match.start())
+        # An unclosed quote is not a string literal
+        pos = string_end if string_end != -1 else match.end()
+
+
+def _find_closing_delimiter(
+    text: str, start_delimiter: str, pos: int, unclosed: dict[str, int]
+) -> tuple[TokenKind, int, str]:
+    """Finds the closing delimiter of a tag
+
+    Once a tag is not closed, the next tags of the same kind are not searched
+    for their closing delimiter again, which keeps the scan linear.
+
+    Args:
+        text (string): template text
+        start_delimiter (string): opening delimiter of the tag
+        pos (int): offset of the content of the tag
+        unclosed (dict): offset of the first unclosed tag of each opening
+                         delimiter, updated by this function
+
+    Returns:
+        tuple: the kind of the tag, the offset of the closing delimiter or -1
+               if the tag is not closed, and the closing delimiter
+    """
+    kind: TokenKind
+    if start_delimiter == "{#":
+        kind, end_delimiter, pattern = "comment", "#}", None
+    elif start_delimiter == "{{":
+        kind, end_delimiter, pattern = "variable", "}}", _VARIABLE_END
+    else:
+        kind, end_delimiter, pattern = "statement", "%}", _STATEMENT_END
+    if pos >= unclosed.get(end_delimiter, len(text) + 1):
+        return kind, -1, end_delimiter
+
+    if pattern is None:
+        close = text.find(end_delimiter, pos)
+    else:
+        close = _find_tag_end(text, pattern, pos)
+    if close == -1:
+        unclosed[end_delimiter] = pos
+    elif kind == "statement" and close > pos and text[close - 1] == "-":
+        return kind, close - 1, "-%}"
+    return kind, close, end_delimiter
+
+
+@lru_cache(maxsize=16)
+def scan_jinja(text: str) -> JinjaTokens:
+    """Splits a template into tokens in a single pass
+
+    Closing delimiters within the string literals of statements and variables
+    do not close the tag and the content of a {% raw %} block is a single raw
+    token. An opening delimiter which is never closed is left in the text.
+
+    The tokens of the last templates are cached so the rules checking the
+    same file share a single scan.
+
+    Args:
+        text (string): template text
+
+    Returns:
+        tuple: the JinjaToken of the template in order
+    """
+    tokens: list[JinjaToken] = []
+    unclosed: dict[str, int] = {}
+    line_index = get_line_index(text)
+
+    def add_token(
+        kind: TokenKind,
+        start: int,
+        end: int,
+        start_delimiter: str = "",
+        end_delimiter: str = "",
+    ) -> None:
+        content_start = start + len(start_delimiter)
+        content_end = end - len(end_delimiter)
+        tokens.append(
+            JinjaToken(
+                kind,
+                text[content_start:content_end],
+                start,
+                end,
+                line_index.line_number(content_start),
+                line_index.line_number(content_end),
+                start_delimiter,
+                end_delimiter,
+            )
+        )
+
+    pos = text_start = 0
+    while (opening := _OPENING_DELIMITER.search(text, pos)) is not None:
+        kind, close, end_delimiter = _find_closing_delimiter(
+            text, opening.group(), opening.end(), unclosed
+        )
+        if close == -1:
+            pos = opening.end()
+            continue
+
+        if opening.start() > text_start:
+            add_token("text", text_start, opening.start())
+        end = close + len(end_delimiter)
+        add_token(kind, opening.start(), end, opening.group(), end_delimiter)
+        pos = text_start = end
+        if kind == "statement" and _RAW_BLOCK.fullmatch(tokens[-1].text):
+            endraw = _ENDRAW_STATEMENT.search(text, end)
+            # An unclosed raw block runs to the end of the template
+            pos = endraw.start() if endraw is not None else len(text)
+            if pos > end:
+                add_token("raw", end, pos)
+            text_start = pos
+    if len(text) > text_start:
+        add_token("text", text_start, len(text))
+    return tuple(tokens)
+
+
+def get_jinja_line_tokens(
+    text: str, *kinds: TokenKind
+) -> Generator[tuple[int, str, list[JinjaToken]], None, None]:
+    """Groups by line the tokens of some kinds which fit on a single line
+
+    The lines starting with `#` are skipped, as Rule.checkrule skips them
+    for the rules checking the text line by line.
+
+    Args:
+        text (string): template text
+        kinds (string): kinds of the tokens, "statement", "variable"...
+
+    Returns:
+        a generator that yields the (line_number, line, tokens) of the lines
+        with at least one token
+    """
+    line_index = get_line_index(text)
+    tokens = (
+        token
+        for token in scan_jinja(text)
+        if token.kind in kinds and token.start_line == token.end_line
+    )
+    for line_number, line_tokens in groupby(tokens, key=lambda token: token.start_line):
+        line = line_index.line(line_number)
+        if not line.lstrip().startswith("#"):
+            yield line_number, line, list(line_tokens)
+
+
+def check_line_tokens(
+    text: str,
+    kinds: tuple[TokenKind, ...],
+    check: Callable[[list[JinjaToken]], Iterable[str | None]],
+    line_numbers: Container[int] | None = None,
+) -> Generator[tuple[int, str, str | None], None, None]:
+    """Checks the tokens of some kinds of each line with a single function
+
+    This is the loop shared by the rules checking the tokens line by line,
+    the lines are the ones given by get_jinja_line_tokens.
+
+    Args:
+        text (string): template text
+        kinds (tuple): kinds of the tokens to check
+        check (callable): called with the tokens of each line, returns a
+                          message for each error found on the line
+        line_numbers (container, optional): when given, only the tokens of
+                                            these lines are checked
+
+    Returns:
+        a generator that yields the (line_number, line, message) of each error
+
+    Raises:
+        LintTimeout: with the line which was being checked
+    """
+    for line_number, line, tokens in get_jinja_line_tokens(text, *kinds):
+        if line_numbers is not None and line_number not in line_numbers:
+            continue
+        try:
+            messages = list(check(tokens))
+        except LintTimeout as exc:
+            exc.line_number = line_number
+            exc.line = line
+            raise
+        for message in messages:
+            yield line_number, line, message
+
+
+def blank_string_literals(source: str) -> str:
+    """Replaces the characters within the string literals of a token by
+    underscores, so that a regex cannot match the delimiters they contain
+
+    The quotes and the newlines are kept, the offsets are unchanged.
+
+    Args:
+        source (string): token with its delimiters
+
+    Returns:
+        string: the token with its string literals blanked
+    """
+    parts = []
+    pos = 0
+    while (match := _QUOTE.search(source, pos)) is not None:
+        string_start, string_end = match.end(), _find_string_end(source, match.start())
+        if string_end == -1:
+            break
+        content = source[string_start:string_end][:-1]
+        parts.extend(
+            [source[pos:string_start], _NOT_NEWLINE.sub("_", content), match.group()]
+        )
+        pos = string_end
+    parts.append(source[pos:])
+    return "".join(parts)
+
+
+def search_tokens(
+    regex: re.Pattern[str],
+    line_index: LineIndex,
+    kinds: tuple[TokenKind, ...],
+    line_numbers: Container[int] | None = None,
+) -> Generator[int, None, None]:
+    """Searches a regex in the tokens of some kinds of a text
+
+    The tokens are searched with their delimiters and their string literals
+    blanked, see blank_string_literals, hence the regex never matches the
+    text of a raw block or the delimiters quoted in a token.
+
+    Args:
+        regex (re.Pattern): compiled regex which does not match newlines
+        line_index (LineIndex): index of the text to search
+        kinds (tuple): kinds of the tokens to search
+        line_numbers (container, optional): when given, only the tokens on
+                                            these lines are searched
+
+    Returns:
+        a generator that yields the numbers of the lines where the regex
+        matches, in order and once per line
+
+    Raises:
+        LintTimeout: with the first line of the token which was being searched
+    """
+    text = line_index.text
+    last_line_number = 0
+    for token in scan_jinja(text):
+        if token.kind not in kinds or (
+            line_numbers is not None
+            and not any(
+                line_number in line_numbers
+                for line_number in range(token.start_line, token.end_line + 1)
+            )
+        ):
+            continue
+        start, end = token.start, token.end
+        source = blank_string_literals(text[start:end])
+        try:
+            matches = list(regex.finditer(source))
+        except LintTimeout as exc:
+            exc.line_number = line_index.line_number(start)
+            exc.line = line_index.line(exc.line_number)
+            raise
+        for match in matches:
+            line_number = line_index.line_number(start + match.start())
+            if line_number > last_line_number and (
+                line_numbers is None or line_number in line_numbers
+            ):
+                last_line_number = line_number
+                yield line_number
+
+
+@lru_cache(maxsize=None)
+def _operator_pattern(operators: tuple[str, ...]) -> re.Pattern[str]:
+    """Compiles the regex finding the next quote or operator"""
+    longest_first = sorted(operators, key=len, reverse=True)
+    return re.compile("|".join(["['\"]"] + [re.escape(op) for op in longest_first]))
+
+
+def get_unspaced_operators(
+    expression: str, operators: tuple[str, ...]
+) -> Generator[tuple[str, int], None, None]:
+    """Finds the operators which are not enclosed by a single space
+
+    The expression is scanned once from left to right and the operators within
+    string literals are skipped, hence the time is linear in its length. The
+    spaces are not checked on a side of an operator without operand, like the
+    whitespace control `+` at the start of `{{+ var }}`.
+
+    Args:
+        expression (string): content of a Jinja statement or variable
+        operators (tuple): the operators to check, e.g. ("|", "+")
+
+    Returns:
+        a generator that yields the (operator, offset) of each operator not
+        enclosed by a single space, the offset being within the expression
+    """
+    pattern = _operator_pattern(operators)
+    # Offset after the last string literal or operator
+    previous_end = 0
+    pos = 0
+    while (match := pattern.search(expression, pos)) is not None:
+        start = match.start()
+        if match.group() in "'\"":
+            pos = _find_string_end(expression, start)
+            if pos == -1:
+                # An unclosed quote is an ordinary character
+                pos = start + 1
+            else:
+                previous_end = pos
+            continue
+
+        before = expression[previous_end:start]
+        operand_end = len(before.rstrip())
+        end = match.end()
+        following = _NON_SPACE.search(expression, end)
+        after = following.start() if following is not None else len(expression)
+        if (
+            (previous_end > 0 or operand_end > 0)
+            and before[operand_end:] != " "
+            or after < len(expression)
+            and expression[end:after] != " "
+        ):
+            yield match.group(), start
+        previous_end = pos = end
+
+
 def get_jinja_statements(text: str, indentation: bool = False) -> list[Statement]:
     """Gets jinja statements with {%[-/+] [-]%} delimiters
 
-    The regex `regex_pattern` will return multiple groups when it matches
-    Note that this is a multiline regex
+    The statements are read from the tokens of scan_jinja, a statement can
+    span multiple lines
 
     Args:
         text (string): multiline text to search the jinja statements in
@@ -176,24 +790,24 @@ def get_jinja_statements(text: str, indentation: bool = False) -> list[Statement
     # TODO - should probably return a JinjaStatement object..
     """
     statements: list[Statement] = []
-    count = 0
-    regex_pattern = re.compile("(\\{%[-|+]?)((.|\n)*?)([-]?\\%})", re.MULTILINE)
-    newline_pattern = re.compile(r"\n")
-    lines = text.split("\n")
-    for match in regex_pattern.finditer(text):
-        count += 1
-        start_line = len(newline_pattern.findall(text, 0, match.start(2))) + 1
-        end_line = len(newline_pattern.findall(text, 0, match.end(2))) + 1
-        if indentation and lines[start_line - 1].split()[0] not in ["{%", "{%-", "{%+"]:
+    line_index = get_line_index(text)
+    for token in scan_jinja(text):
+        if token.kind != "statement":
+            continue
+        if indentation and line_index.line(token.start_line).split()[0] not in [
+            "{%",
+            "{%-",
+            "{%+",
+        ]:
             continue
 
         statements.append(
             (
-                str(match.group(2)),
-                start_line,
-                end_line,
-                str(match.group(1)),
-                str(match.group(4)),
+                token.text,
+                token.start_line,
+                token.end_line,
+                token.start_delimiter,
+                token.end_delimiter,
             )
         )
     logger.debug("Found jinja statements %s", statements)
@@ -221,9 +835,7 @@ def get_jinja_comments(text: str) -> list[str]:
     Returns:
         [list]: returns list of jinja comments
     """
-    regex_pattern = re.compile("(\\{#)((.|\n)*?)(\\#})", re.MULTILINE)
-
-    return [line.group(2) for line in regex_pattern.finditer(text)]
+    return [token.text for token in scan_jinja(text) if token.kind == "comment"]
 
 
 def get_jinja_variables(text: str) -> list[str]:
@@ -235,8 +847,104 @@ def get_jinja_variables(text: str) -> list[str]:
     Returns:
         [list]: returns list of jinja variables
     """
-    regex_pattern = regex_pattern = re.compile("(\\{{)((.|\n)*?)(\\}})", re.MULTILINE)
-    return [line.group(2) for line in regex_pattern.finditer(text)]
+    return [token.text for token in scan_jinja(text) if token.kind == "variable"]
+
+
+def get_referenced_templates(text: str) -> set[str]:
+    """Gets the names of the templates a template includes, imports or extends
+
+    All the string literals of the include, import, from and extends
+    statements are returned, so none of the templates a statement may
+    reference is missed.
+
+    Args:
+        text (string): template text
+
+    Returns:
+        set: the normalized template names
+    """
+    return {
+        posixpath.normpath(name)
+        for token in scan_jinja(text)
+        if token.kind == "statement" and _TEMPLATE_REFERENCE.match(token.text)
+        for match in _STRING_LITERAL.finditer(token.text)
+        if (name := match.group(1) or match.group(2))
+    }
+
+
+class SuppressionIndex:
+    """Index of the j2lint: disable directives in the comments of a text
+
+    `j2lint: disable=RULE` disables a rule on the whole file,
+    `j2lint: disable-line=RULE` on the line of the directive and
+    `j2lint: disable-next-line=RULE` on the line after the comment. RULE is
+    the id or the short description of the rule.
+    """
+
+    def __init__(self, text: str) -> None:
+        """
+        Args:
+            text (string): text to index
+        """
+        # Rules disabled on the whole file
+        self.disabled: set[str] = set()
+        # Rules disabled on each line
+        self.line_disabled: dict[int, set[str]] = {}
+        # Most files have no directive, they are not scanned
+        if "j2lint" not in text:
+            return
+        for token in scan_jinja(text):
+            if token.kind != "comment":
+                continue
+            content_start = token.start + len(token.start_delimiter)
+            for match in _DISABLE_COMMENT.finditer(token.text):
+                scope, name = match.groups()
+                if scope is None:
+                    self.disabled.add(name)
+                    continue
+                if scope == "-line":
+                    offset = content_start + match.start()
+                    line_number = get_line_index(text).line_number(offset)
+                else:
+                    line_number = token.end_line + 1
+                self.line_disabled.setdefault(line_number, set()).add(name)
+
+    def is_disabled(self, rule: Rule) -> bool:
+        """Returns True if the rule is disabled on the whole file"""
+        return rule.rule_id in self.disabled or rule.short_description in self.disabled
+
+    def is_suppressed(self, rule: Rule, line_number: int) -> bool:
+        """Returns True if the rule is disabled on a line"""
+        names = self.line_disabled.get(line_number)
+        return names is not None and (
+            rule.rule_id in names or rule.short_description in names
+        )
+
+    def filter(self, rule: Rule, errors: list[LinterError]) -> list[LinterError]:
+        """Removes the errors of a rule on the lines where it is disabled
+
+        Args:
+            rule (Rule): the rule which found the errors
+            errors (list): the errors found by the rule
+
+        Returns:
+            list[LinterError]: the errors on the lines where the rule is enabled
+        """
+        if not self.line_disabled:
+            return errors
+        return [
+            error for error in errors if not self.is_suppressed(rule, error.line_number)
+        ]
+
+
+@lru_cache(maxsize=16)
+def get_suppressions(text: str) -> SuppressionIndex:
+    """Returns the SuppressionIndex of a text
+
+    The index of the last texts is cached so the directives are only parsed
+    once per file, whatever the number of rules.
+    """
+    return SuppressionIndex(text)
 
 
 def is_rule_disabled(text: str, rule: Rule) -> bool:
@@ -249,12 +957,4 @@ def is_rule_disabled(text: str, rule: Rule) -> bool:
     Returns:
         [boolean]: True if rule is disabled
     """
-    comments = get_jinja_comments(text)
-    regex = re.compile(r"j2lint\s*:\s*disable\s*=\s*([\w-]+)")
-    for comment in comments:
-        for line in regex.finditer(comment):
-            if rule.short_description == line.group(1):
-                return True
-            if rule.rule_id == line.group(1):
-                return True
-    return False
+    return get_suppressions(text).is_disabled(rule)
@@ -12,6 +12,7 @@ from unittest.mock import create_autospec
 import pytest
 
 from j2lint.cli import create_parser
+from j2lint.client import DEFAULT_SOCKET
 from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
 from j2lint.linter.error import LinterError
 from j2lint.linter.rule import Rule
@@ -43,6 +44,9 @@ class TestRule(Rule):
     def checkline(self, filename, line, line_no):
         pass
 
+    def checktokens(self, tokens, line_index):
+        pass
+
 
 @pytest.fixture
 def collection():
@@ -265,6 +269,28 @@ def default_namespace():
         log=False,
         version=False,
         stdout=False,
+        jobs=None,
+        prefetch=16,
+        cache=False,
+        cache_dir=".j2lint_cache",
+        cache_size=100,
+        daemon=False,
+        client=False,
+        socket=DEFAULT_SOCKET,
+        idle_timeout=600,
+        shard=None,
+        partial_results=None,
+        recent_first=False,
+        max_errors=None,
+        time_budget=None,
+        rule_timeout=None,
+        file_timeout=None,
+        jinja_extensions=[],
+        changed_since=None,
+        staged=False,
+        revision=None,
+        diff=None,
+        include_dependents=False,
     )
 
 
@@ -4,9 +4,13 @@
 """
 Tests for j2lint.cli.py
 """
+import io
+import json
 import logging
 import os
 import re
+import subprocess
+import tempfile
 from argparse import Namespace
 from unittest.mock import patch
 
@@ -19,8 +23,10 @@ from j2lint.cli import (
     print_json_output,
     print_string_output,
     run,
+    shard_files,
     sort_issues,
 )
+from j2lint.utils import get_files
 
 from .utils import (
     NO_ERROR_NO_WARNING_JSON,
@@ -58,6 +64,38 @@ CONSOLE.size = ConsoleDimensions(width=80, height=74)
             },
             id="set all debug flags",
         ),
+        pytest.param(
+            ["--shard", "2/3", "--partial-results", "shard2.json"],
+            {
+                "shard": (2, 3),
+                "partial_results": "shard2.json",
+                "extensions": [".j2", ".jinja", ".jinja2"],
+            },
+            id="shard",
+        ),
+        pytest.param(
+            ["--jinja-extension", "jinja2.ext.i18n"],
+            {
+                "jinja_extensions": ["jinja2.ext.i18n"],
+                "extensions": [".j2", ".jinja", ".jinja2"],
+            },
+            id="jinja extension",
+        ),
+        pytest.param(
+            ["--changed-since", "main", "--staged", "--include-dependents"],
+            {
+                "changed_since": "main",
+                "staged": True,
+                "include_dependents": True,
+                "extensions": [".j2", ".jinja", ".jinja2"],
+            },
+            id="changed files",
+        ),
+        pytest.param(
+            ["--diff", "-"],
+            {"diff": "-", "extensions": [".j2", ".jinja", ".jinja2"]},
+            id="diff",
+        ),
     ],
 )
 def test_create_parser(default_namespace, argv, namespace_modifications):
@@ -429,3 +467,314 @@ def test_run_stdin(capsys):
         mocked_os_unlink.assert_called_with(matches.groups()[0])
         assert os.path.exists(matches.groups()[0]) is False
         assert run_return_value == 2
+
+
+@pytest.mark.parametrize(
+    "jobs, schedule_argv",
+    [
+        pytest.param("2", [], id="parallel"),
+        pytest.param("2", ["--recent-first"], id="parallel recent first"),
+        pytest.param("1", ["--recent-first"], id="serial recent first"),
+        pytest.param(
+            "2",
+            ["--rule-timeout", "30", "--file-timeout", "60"],
+            id="parallel with time limits",
+        ),
+    ],
+)
+def test_run_parallel(capsys, jobs, schedule_argv):
+    """
+    Test j2lint.cli.run with --jobs, --recent-first and the time limits
+
+    The output must be identical to the output of a serial run in the files
+    order
+    """
+    argv = ["tests/test_rules/data"]
+    try:
+        serial_return_value = run(["--jobs", "1", *argv])
+        serial_output = capsys.readouterr().out
+        parallel_return_value = run(["--jobs", jobs, *schedule_argv, *argv])
+        parallel_output = capsys.readouterr().out
+    finally:
+        # run disables logging when neither --log nor --stdout is used
+        logging.disable(logging.NOTSET)
+
+    assert serial_output
+    assert parallel_output == serial_output
+    assert parallel_return_value == serial_return_value == 2
+
+
+def test_run_cache(capsys):
+    """
+    Test j2lint.cli.run with --cache
+
+    The output must be identical with a cold and a warm cache
+    """
+    argv = ["--jobs", "1", "tests/test_rules/data"]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            outputs = []
+            for _ in range(2):
+                assert run(["--cache", "--cache-dir", cache_dir, *argv]) == 2
+                outputs.append(capsys.readouterr().out)
+            assert run(argv) == 2
+            outputs.append(capsys.readouterr().out)
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+        assert os.listdir(cache_dir)
+    assert outputs[0] == outputs[1] == outputs[2]
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_run_jinja_extension(capsys, jobs):
+    """
+    Test j2lint.cli.run with --jinja-extension
+
+    The tags of the extension are not syntax errors
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        templates = [os.path.join(tmp_dir, name) for name in ("a.j2", "b.j2")]
+        for template in templates:
+            with open(template, "w", encoding="utf-8") as file:
+                file.write("{% trans %}\nHello\n{% endtrans %}\n")
+        try:
+            assert run(["--jobs", jobs, "--json", *templates]) == 2
+            assert "Encountered unknown tag 'trans'" in capsys.readouterr().out
+            argv = ["--jobs", jobs, "--jinja-extension", "jinja2.ext.i18n"]
+            assert run([*argv, *templates]) == 0
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+
+
+def test_run_changed_since_not_a_repository(capsys, monkeypatch):
+    """
+    Test j2lint.cli.run with --changed-since outside of a git repository
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.chdir(tmp_dir)
+        monkeypatch.setenv("GIT_CEILING_DIRECTORIES", os.path.dirname(tmp_dir))
+        try:
+            assert run(["--changed-since", "main", "."]) == 1
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+    assert "Not a git repository" in " ".join(capsys.readouterr().out.split())
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_run_git_revision(capsys, monkeypatch, jobs):
+    """
+    Test j2lint.cli.run with --staged and --revision reads the files from git
+    """
+    git = ["git", "-c", "user.name=j2lint", "-c", "user.email=j2lint@example.com"]
+
+    def write_templates(text):
+        for name in ("a.j2", "b.j2"):
+            with open(name, "w", encoding="utf-8") as file:
+                file.write(text)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.chdir(tmp_dir)
+        subprocess.run([*git, "init", "-q"], check=True)
+        write_templates("{{ ok }}\n")
+        subprocess.run([*git, "add", "."], check=True)
+        subprocess.run([*git, "commit", "-q", "-m", "initial"], check=True)
+        write_templates("{{not_ok}}\n")
+        subprocess.run([*git, "add", "."], check=True)
+        write_templates("{{ ok }}\n")
+        try:
+            assert run(["--jobs", jobs, "--json", "--staged", "."]) == 2
+            output = json.loads(capsys.readouterr().out)
+            assert [error["filename"] for error in output["ERRORS"]] == [
+                "a.j2",
+                "b.j2",
+            ]
+            assert run(["--jobs", jobs, "--revision", "HEAD", "."]) == 0
+            assert run(["--jobs", jobs, "--changed-since", "HEAD", "."]) == 0
+            # --staged and --revision cannot be used together
+            with pytest.raises(SystemExit):
+                run(["--staged", "--revision", "HEAD", "."])
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_run_diff(capsys, monkeypatch, jobs):
+    """
+    Test j2lint.cli.run with --diff only reports the issues on the changed lines
+    """
+    diff = (
+        "--- a/a.j2\n+++ b/a.j2\n@@ -2,0 +3 @@\n+{{cc}}\n"
+        "--- a/b.j2\n+++ b/b.j2\n@@ -1 +1 @@\n-{{ aa }}\n+{{aa}}\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.chdir(tmp_dir)
+        for name, text in [
+            ("a.j2", "{{aa}}\n{{bb}}\n{{cc}}\n"),
+            ("b.j2", "{{aa}}\n{{bb}}\n"),
+            ("c.j2", "{{aa}}\n"),
+        ]:
+            with open(name, "w", encoding="utf-8") as file:
+                file.write(text)
+        with open("changes.diff", "w", encoding="utf-8") as file:
+            file.write(diff)
+        try:
+            assert run(["--jobs", jobs, "--json", "--diff", "changes.diff", "."]) == 2
+            output = json.loads(capsys.readouterr().out)
+            with patch("sys.stdin", io.StringIO(diff)):
+                assert run(["--jobs", jobs, "--json", "--diff", "-", "."]) == 2
+            assert json.loads(capsys.readouterr().out) == output
+            assert run(["--diff", "missing.diff", "."]) == 1
+            # --diff - and --stdin both read the standard input
+            with pytest.raises(SystemExit):
+                run(["--stdin", "--diff", "-", "."])
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+    assert [
+        (error["filename"], error["line_number"]) for error in output["ERRORS"]
+    ] == [("a.j2", 3), ("b.j2", 1)]
+
+
+@pytest.mark.parametrize(
+    "shard, partial_results, expected_all_files",
+    [
+        pytest.param(None, None, [], id="not listed"),
+        pytest.param(None, "results.json", ["a.j2", "b.j2", "c.j2"], id="partial"),
+        pytest.param((1, 1), None, ["a.j2", "b.j2", "c.j2"], id="shard"),
+    ],
+)
+def test_shard_files(shard, partial_results, expected_all_files):
+    """
+    Test j2lint.cli.shard_files only lists the files found when needed
+    """
+    found_files = iter(["a.j2", "b.j2", "c.j2"])
+    options = Namespace(shard=shard, partial_results=partial_results)
+    all_files, files = shard_files(found_files, options)
+    assert all_files == expected_all_files
+    assert list(files) == ["a.j2", "b.j2", "c.j2"]
+
+
+@pytest.mark.parametrize(
+    "output_argv",
+    [pytest.param([], id="text"), pytest.param(["--json"], id="json")],
+)
+def test_run_shard_merge(capsys, output_argv):
+    """
+    Test j2lint.cli.run with --shard and the merge command
+
+    The merged output and exit code must be the ones of a full run
+    """
+    argv = ["--jobs", "1", *output_argv, "tests/test_rules/data"]
+    shard_count = 3
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        partial_results = [
+            os.path.join(tmp_dir, f"shard{index}.json")
+            for index in range(1, shard_count + 1)
+        ]
+        try:
+            expected_exit_code = run(argv)
+            expected_output = capsys.readouterr().out
+            for index, partial_result in enumerate(partial_results, start=1):
+                run(
+                    [
+                        "--shard",
+                        f"{index}/{shard_count}",
+                        "--partial-results",
+                        partial_result,
+                        *argv,
+                    ]
+                )
+            capsys.readouterr()
+            assert run(["merge", *output_argv, *partial_results]) == expected_exit_code
+            assert capsys.readouterr().out == expected_output
+            assert run(["merge", *partial_results[1:]]) == 1
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+
+
+def test_run_shard_merge_budget(capsys):
+    """
+    Test the merge command exits with 3 when a shard stopped early, and lists
+    the files the shards did not check
+    """
+    argv = ["--jobs", "1", "--json", "--max-errors", "1", "tests/test_rules/data"]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        partial_results = [
+            os.path.join(tmp_dir, f"shard{index}.json") for index in (1, 2)
+        ]
+        try:
+            exit_codes = [
+                run(["--shard", f"{index}/2", "--partial-results", path, *argv])
+                for index, path in enumerate(partial_results, start=1)
+            ]
+            capsys.readouterr()
+            assert 3 in exit_codes
+            assert run(["merge", "--json", *partial_results]) == 3
+        finally:
+            # run disables logging when neither --log nor --stdout is used
+            logging.disable(logging.NOTSET)
+    output = json.loads(capsys.readouterr().out)
+    assert output["NOT_CHECKED"]
+    assert not {error["filename"] for error in output["ERRORS"]} & set(
+        output["NOT_CHECKED"]
+    )
+
+
+@pytest.mark.parametrize(
+    "jobs, budget_argv, expected_not_checked",
+    [
+        pytest.param("1", ["--max-errors", "1"], None, id="serial max errors"),
+        pytest.param("2", ["--max-errors", "1"], None, id="parallel max errors"),
+        pytest.param("1", ["--time-budget", "0"], "all", id="serial time budget"),
+        pytest.param("2", ["--time-budget", "0"], "all", id="parallel time budget"),
+        pytest.param("1", ["--max-errors", "100000"], [], id="not reached"),
+    ],
+)
+def test_run_budget(capsys, jobs, budget_argv, expected_not_checked):
+    """
+    Test j2lint.cli.run with --max-errors and --time-budget
+
+    The files not checked are listed in the JSON output
+    """
+    argv = ["--jobs", jobs, "--json", "tests/test_rules/data"]
+    try:
+        return_value = run([*budget_argv, *argv])
+        output = json.loads(capsys.readouterr().out)
+        files = get_files(["tests/test_rules/data"], [".j2", ".jinja", ".jinja2"])
+    finally:
+        # run disables logging when neither --log nor --stdout is used
+        logging.disable(logging.NOTSET)
+
+    not_checked = output.get("NOT_CHECKED", [])
+    if expected_not_checked == "all":
+        assert sorted(not_checked) == sorted(files)
+        assert not output["ERRORS"]
+    elif expected_not_checked is None:
+        assert not_checked
+        assert output["ERRORS"]
+        assert not {error["filename"] for error in output["ERRORS"]} & set(not_checked)
+    else:
+        assert not_checked == expected_not_checked
+    assert return_value == (3 if not_checked else 2)
+
+
+def test_run_budget_text_output(capsys):
+    """
+    Test j2lint.cli.run reports the files not checked in the text output
+    """
+    try:
+        return_value = run(
+            ["--jobs", "1", "--time-budget", "0", "tests/test_rules/data"]
+        )
+    finally:
+        # run disables logging when neither --log nor --stdout is used
+        logging.disable(logging.NOTSET)
+    output = capsys.readouterr().out
+    assert return_value == 3
+    assert "Linting stopped early (time budget exceeded)" in output
+    assert "jinja_variable_has_space_rule.j2" in output
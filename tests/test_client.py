@@ -0,0 +1,131 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.client.py
+"""
+import os
+import socket
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from j2lint.client import (
+    DEFAULT_SOCKET,
+    forward,
+    get_default_socket,
+    get_socket_path,
+    main,
+    reads_stdin,
+)
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        pytest.param([], DEFAULT_SOCKET, id="default"),
+        pytest.param(["--socket", "/tmp/a.sock", "a.j2"], "/tmp/a.sock", id="separate"),
+        pytest.param(["--socket=/tmp/b.sock", "a.j2"], "/tmp/b.sock", id="equal"),
+        pytest.param(["a.j2", "--socket"], DEFAULT_SOCKET, id="missing value"),
+    ],
+)
+def test_get_socket_path(argv, expected):
+    """
+    Test j2lint.client.get_socket_path
+    """
+    assert get_socket_path(argv) == expected
+
+
+@pytest.mark.parametrize(
+    "runtime_dir, expected",
+    [
+        pytest.param("/run/user/1000", "/run/user/1000/j2lint.sock", id="runtime"),
+        pytest.param(
+            "",
+            os.path.join(tempfile.gettempdir(), f"j2lint-{os.getuid()}", "j2lint.sock"),
+            id="temporary",
+        ),
+        pytest.param(
+            "relative",
+            os.path.join(tempfile.gettempdir(), f"j2lint-{os.getuid()}", "j2lint.sock"),
+            id="relative runtime",
+        ),
+    ],
+)
+def test_get_default_socket(monkeypatch, runtime_dir, expected):
+    """
+    Test j2lint.client.get_default_socket is in a directory of the user
+    """
+    monkeypatch.setenv("XDG_RUNTIME_DIR", runtime_dir)
+    assert get_default_socket() == expected
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        pytest.param(["a.j2"], False, id="files"),
+        pytest.param(["--stdin"], True, id="stdin"),
+        pytest.param(["-vs"], True, id="short stdin"),
+        pytest.param(["--diff", "-", "."], True, id="diff stdin"),
+        pytest.param(["--diff=-", "."], True, id="diff stdin equal"),
+        pytest.param(["--diff", "a.diff", "-"], False, id="diff file"),
+        pytest.param(["a.j2", "--diff"], False, id="missing diff"),
+    ],
+)
+def test_reads_stdin(argv, expected):
+    """
+    Test j2lint.client.reads_stdin
+    """
+    assert reads_stdin(argv) == expected
+
+
+def test_forward_other_user(capsys, monkeypatch):
+    """
+    Test j2lint.client.forward does not connect to a socket of another user
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "j2lint.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(socket_path)
+            server.listen()
+            monkeypatch.setattr(os, "getuid", lambda: os.stat(socket_path).st_uid + 1)
+            assert forward(["a.j2"], socket_path) is None
+    assert "not owned by the current user" in capsys.readouterr().err
+
+
+def test_forward_no_daemon():
+    """
+    Test j2lint.client.forward when no daemon is listening
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        assert forward(["a.j2"], os.path.join(tmp_dir, "j2lint.sock")) is None
+
+
+@pytest.mark.parametrize(
+    "argv, forward_return, expected_run_args",
+    [
+        pytest.param(["a.j2"], None, ["a.j2"], id="local"),
+        pytest.param(["--client", "a.j2"], 2, None, id="forwarded"),
+        pytest.param(
+            ["--client", "a.j2"], None, ["--client", "a.j2"], id="no daemon fallback"
+        ),
+    ],
+)
+def test_main(argv, forward_return, expected_run_args):
+    """
+    Test j2lint.client.main
+
+    The linter is only run locally when the command is not forwarded
+    """
+    with patch(
+        "j2lint.client.forward", return_value=forward_return
+    ) as mocked_forward, patch("j2lint.cli.run", return_value=0) as mocked_run:
+        exit_code = main(argv)
+    if expected_run_args is None:
+        assert exit_code == forward_return
+        mocked_run.assert_not_called()
+    else:
+        assert exit_code == 0
+        mocked_run.assert_called_once_with(expected_run_args)
+    assert mocked_forward.called == ("--client" in argv)
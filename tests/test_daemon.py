@@ -0,0 +1,213 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.daemon.py
+"""
+import logging
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from j2lint.cli import create_parser, run
+from j2lint.client import forward
+from j2lint.daemon import LintDaemon, get_rules_signature, is_same_user
+
+# pylint: disable=consider-using-with, redefined-outer-name
+
+REQUEST = {"cwd": os.getcwd(), "stdin": None, "isatty": False, "width": 80}
+
+
+@pytest.fixture
+def socket_path():
+    """
+    Path of a socket in a temporary directory
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yield os.path.join(tmp_dir, "j2lint.sock")
+
+
+def test_get_rules_signature():
+    """
+    Test j2lint.daemon.get_rules_signature
+
+    The signature changes when a rule module is modified
+    """
+    with tempfile.TemporaryDirectory() as rules_dir:
+        rule_file = os.path.join(rules_dir, "my_rule.py")
+        with open(rule_file, "w", encoding="utf-8") as file:
+            file.write("# rule\n")
+        with open(os.path.join(rules_dir, "README.md"), "w", encoding="utf-8"):
+            pass
+        signature = get_rules_signature([rules_dir])
+        assert [path for path, _, _ in signature] == [rule_file]
+
+        with open(rule_file, "a", encoding="utf-8") as file:
+            file.write("# modified\n")
+        assert get_rules_signature([rules_dir]) != signature
+
+
+def test_get_collection(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.get_collection
+
+    The collection is reused until its rules change
+    """
+    daemon = LintDaemon(socket_path)
+    options = create_parser().parse_args([])
+    collection = daemon.get_collection(options)
+    assert daemon.get_collection(options) is collection
+    assert (
+        daemon.get_collection(create_parser().parse_args(["-w", "S3"]))
+        is not collection
+    )
+    with patch("j2lint.daemon.get_rules_signature", return_value=(("rule.py", 1, 1),)):
+        assert daemon.get_collection(options) is not collection
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        pytest.param(["--jobs", "1", "tests/test_rules/data"], id="text"),
+        pytest.param(["--jobs", "1", "--json", "tests/test_rules/data"], id="json"),
+        pytest.param(["--list"], id="list"),
+    ],
+)
+def test_handle(capsys, socket_path, argv):
+    """
+    Test j2lint.daemon.LintDaemon.handle
+
+    The output must be identical to a local run
+    """
+    try:
+        expected_exit_code = run(argv)
+        expected_output = capsys.readouterr().out
+    finally:
+        # run disables logging when neither --log nor --stdout is used
+        logging.disable(logging.NOTSET)
+    daemon = LintDaemon(socket_path)
+    for _ in range(2):
+        response = daemon.handle({"argv": argv, **REQUEST})
+        assert response["exit_code"] == expected_exit_code
+        assert response["stdout"] == expected_output
+    assert not logging.root.manager.disable
+
+
+def test_handle_in_process(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.handle lints in the daemon process with the
+    loaded collection instead of starting a pool
+    """
+    daemon = LintDaemon(socket_path)
+    with patch("j2lint.cli.ParallelRunner") as mocked_runner:
+        response = daemon.handle(
+            {"argv": ["--jobs", "4", "tests/test_rules/data"], **REQUEST}
+        )
+    mocked_runner.assert_not_called()
+    assert response["exit_code"] == 2
+    assert len(daemon.collections) == 1
+
+
+def test_handle_daemon(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.handle refuses to start a daemon
+    """
+    response = LintDaemon(socket_path).handle({"argv": ["--daemon"], **REQUEST})
+    assert response["exit_code"] == 1
+    assert "--daemon" in response["stderr"]
+
+
+def test_handle_argparse_error(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.handle with invalid arguments
+    """
+    response = LintDaemon(socket_path).handle({"argv": ["--jobs", "x"], **REQUEST})
+    assert response["exit_code"] == 2
+    assert "invalid int value" in response["stderr"]
+
+
+def test_serve(capsys, socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.serve with a client
+
+    The daemon removes its socket when it exits after the idle timeout
+    """
+    daemon = LintDaemon(socket_path, idle_timeout=1)
+    thread = threading.Thread(target=daemon.serve)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        exit_code = forward(
+            ["--client", "--jobs", "1", "tests/test_rules/data"], socket_path
+        )
+    finally:
+        thread.join()
+    assert exit_code == 2
+    assert "JINJA2 LINT ERRORS" in capsys.readouterr().out
+    assert not os.path.exists(socket_path)
+
+
+def test_serve_stale_socket(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.serve replaces a socket nobody listens on
+    """
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    assert os.path.exists(socket_path)
+    assert LintDaemon(socket_path, idle_timeout=0.01).serve() == 0
+    assert not os.path.exists(socket_path)
+
+
+def test_serve_already_running(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.serve when another daemon is listening
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as other:
+        other.bind(socket_path)
+        other.listen()
+        assert LintDaemon(socket_path, idle_timeout=0.01).serve() == 1
+        assert os.path.exists(socket_path)
+
+
+def test_serve_other_user(monkeypatch, socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.serve does not replace the socket of
+    another user
+    """
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    real_uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: real_uid + 1)
+    assert LintDaemon(socket_path, idle_timeout=0.01).serve() == 1
+    assert os.path.exists(socket_path)
+
+
+def test_serve_create_directory(socket_path):
+    """
+    Test j2lint.daemon.LintDaemon.serve creates the socket directory only the
+    user can access
+    """
+    nested_path = os.path.join(os.path.dirname(socket_path), "j2lint", "j2lint.sock")
+    assert LintDaemon(nested_path, idle_timeout=0.01).serve() == 0
+    assert stat.S_IMODE(os.stat(os.path.dirname(nested_path)).st_mode) & 0o077 == 0
+
+
+def test_is_same_user():
+    """
+    Test j2lint.daemon.is_same_user with the peer credentials of a connection
+    """
+    left, right = socket.socketpair()
+    with left, right:
+        assert is_same_user(left)
+        with patch("os.getuid", return_value=os.getuid() + 1):
+            assert is_same_user(left) == (not hasattr(socket, "SO_PEERCRED"))
@@ -0,0 +1,41 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.budget.py
+"""
+import pytest
+
+from j2lint.linter.budget import LintBudget
+
+
+@pytest.mark.parametrize(
+    "max_errors, time_budget, errors, expected_reason",
+    [
+        pytest.param(None, None, 100, None, id="no limit"),
+        pytest.param(3, None, 2, None, id="below max errors"),
+        pytest.param(3, None, 4, "4 error(s) found", id="max errors"),
+        pytest.param(None, 3600, 0, None, id="within time budget"),
+        pytest.param(None, 0, 0, "time budget exceeded", id="time budget"),
+    ],
+)
+def test_is_exhausted(max_errors, time_budget, errors, expected_reason):
+    """
+    Test j2lint.linter.budget.LintBudget.is_exhausted
+    """
+    budget = LintBudget(max_errors, time_budget)
+    budget.add_errors(errors)
+    assert budget.is_exhausted() == (expected_reason is not None)
+    assert budget.reason == expected_reason
+    # The first reason is kept
+    budget.add_errors(1)
+    assert budget.reason == expected_reason or budget.is_exhausted()
+
+
+def test_remaining_time():
+    """
+    Test j2lint.linter.budget.LintBudget.remaining_time
+    """
+    assert LintBudget().remaining_time() is None
+    assert LintBudget(time_budget=0).remaining_time() == 0
+    assert 0 < LintBudget(time_budget=3600).remaining_time() <= 3600
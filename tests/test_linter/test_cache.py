@@ -0,0 +1,216 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.cache.py
+"""
+import os
+import pathlib
+import tempfile
+from unittest import mock
+
+import pytest
+
+from j2lint.linter.cache import ResultCache, hash_package, hash_text
+from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from j2lint.linter.diff import ChangedLines, DiffIndex
+
+TEST_DATA_DIR = pathlib.Path(__file__).parent.parent / "test_rules" / "data"
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def cache_dir():
+    """
+    Temporary cache directory
+
+    Not using tmp_path as template_tmp_dir changes its base directory
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yield tmp_dir
+
+
+@pytest.fixture
+def template(cache_dir):
+    """
+    A template file old enough for its stat to be trusted
+    """
+    path = pathlib.Path(cache_dir) / "template.j2"
+    path.write_text((TEST_DATA_DIR / "jinja_operator_has_spaces_rule.j2").read_text())
+    os.utime(path, (1, 1))
+    return str(path)
+
+
+class TestResultCache:
+    def test_rule_key(self, cache_dir, test_rule, test_other_rule):
+        """
+        Test ResultCache.rule_key changes with the rule settings
+        """
+        cache = ResultCache(cache_dir)
+        keys = {cache.rule_key(test_rule), cache.rule_key(test_other_rule)}
+        test_rule.warn.append(test_rule)
+        keys.add(ResultCache(cache_dir).rule_key(test_rule))
+        test_rule.ignore = True
+        keys.add(ResultCache(cache_dir).rule_key(test_rule))
+        test_rule.source_file = __file__
+        keys.add(ResultCache(cache_dir).rule_key(test_rule))
+        keys.add(
+            ResultCache(cache_dir, jinja_extensions=["jinja2.ext.i18n"]).rule_key(
+                test_rule
+            )
+        )
+        with mock.patch("j2lint.linter.cache.hash_package", return_value="modified"):
+            keys.add(ResultCache(cache_dir).rule_key(test_rule))
+        assert len(keys) == 7
+
+    def test_hash_package(self):
+        """
+        Test hash_package changes with the helpers but not with the rules
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["utils.py", "rules/rule.py", "linter/indenter/node.py"]:
+                path = pathlib.Path(tmp_dir, name)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text("pass\n")
+            hashes = [hash_package.__wrapped__(tmp_dir)]
+            pathlib.Path(tmp_dir, "rules/rule.py").write_text("modified\n")
+            pathlib.Path(tmp_dir, "notes.txt").write_text("modified\n")
+            hashes.append(hash_package.__wrapped__(tmp_dir))
+            pathlib.Path(tmp_dir, "linter/indenter/node.py").write_text("modified\n")
+            hashes.append(hash_package.__wrapped__(tmp_dir))
+        assert hashes[0] == hashes[1] != hashes[2]
+
+    def test_store_load(self, cache_dir):
+        """
+        Test ResultCache.store merges the results and ResultCache.load returns them
+        """
+        cache = ResultCache(cache_dir)
+        assert not cache.load("abcd")
+        cache.store("abcd", {"rule0": [(1, "line", "message")]})
+        cache.store("abcd", {"rule1": []})
+        assert cache.load("abcd") == {"rule0": [(1, "line", "message")], "rule1": []}
+
+    def test_stat(self, cache_dir, template):
+        """
+        Test ResultCache.lookup_stat only returns the hash for unchanged files
+        """
+        cache = ResultCache(cache_dir)
+        assert cache.lookup_stat(template) is None
+        cache.store_stat(template, "abcd")
+        assert cache.lookup_stat(template) == "abcd"
+        os.utime(template, (2, 2))
+        assert cache.lookup_stat(template) is None
+        # Recently modified files are not recorded
+        os.utime(template)
+        cache.store_stat(template, "abcd")
+        assert cache.lookup_stat(template) is None
+        assert cache.lookup_stat("dummy.j2") is None
+
+    def test_prune(self, cache_dir):
+        """
+        Test ResultCache.prune removes the least recently used entries
+        """
+        cache = ResultCache(cache_dir, max_size=100)
+        for index in range(5):
+            content_hash = hash_text(str(index))
+            cache.store(content_hash, {"rule": [(index, "x" * 20, "message")]})
+            os.utime(cache._path("results", content_hash), (index, index))
+        cache.prune()
+        remaining = [
+            index
+            for index in range(5)
+            if os.path.exists(cache._path("results", hash_text(str(index))))
+        ]
+        assert remaining == [3, 4]
+
+
+class TestRulesCollectionCache:
+    @pytest.fixture
+    def cached_collection(self, cache_dir):
+        """
+        The default rules with a cache
+        """
+        collection = RulesCollection.create_from_directory(DEFAULT_RULE_DIR, [], [])
+        collection.cache = ResultCache(os.path.join(cache_dir, "cache"))
+        return collection
+
+    @staticmethod
+    def to_tuples(issues):
+        return [
+            (issue.rule.rule_id, issue.line_number, issue.line, issue.message)
+            for issue in issues
+        ]
+
+    def test_replay(self, collection, cached_collection, template):
+        """
+        Test the cached results are identical and no rule runs on a hit,
+        without reading the file
+        """
+        expected_errors, expected_warnings = collection.run(template)
+        errors, warnings = cached_collection.run(template)
+        assert self.to_tuples(errors) == self.to_tuples(expected_errors)
+
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkrule"
+        ) as patched_checkrule, mock.patch(
+            "j2lint.linter.collection.read_file"
+        ) as patched_read_file:
+            errors, warnings = cached_collection.run(template)
+            patched_checkrule.assert_not_called()
+            patched_read_file.assert_not_called()
+        assert self.to_tuples(errors) == self.to_tuples(expected_errors)
+        assert self.to_tuples(warnings) == self.to_tuples(expected_warnings)
+        assert all(error.filename == template for error in errors)
+
+    def test_new_rule(self, cached_collection, template, test_rule):
+        """
+        Test only a new rule runs when the other results are cached
+        """
+        cached_collection.run(template)
+        cached_collection.extend([test_rule])
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkrule", return_value=[]
+        ) as patched_checkrule:
+            cached_collection.run(template)
+            patched_checkrule.assert_called_once()
+
+    def test_git_reader(self, cached_collection, template):
+        """
+        Test the files read from git are hashed on each run, their stat on the
+        disk is neither used nor recorded
+        """
+        cached_collection.git_reader = mock.Mock()
+        cached_collection.git_reader.read.return_value = "{{ a|b }}\n"
+        errors, _ = cached_collection.run(template)
+        assert [error.rule.rule_id for error in errors] == ["S2"]
+        assert cached_collection.cache.lookup_stat(template) is None
+        errors, _ = cached_collection.run(template)
+        assert [error.rule.rule_id for error in errors] == ["S2"]
+        assert cached_collection.git_reader.read.call_count == 2
+        cached_collection.git_reader.read.return_value = None
+        assert cached_collection.run(template) == ([], [])
+
+    def test_diff(self, collection, cached_collection, template):
+        """
+        Test the results of the rules checking only the changed lines are not
+        cached and the cached results are filtered
+        """
+        expected_errors, _ = collection.run(template)
+        line_number = expected_errors[0].line_number
+        cached_collection.diff = DiffIndex({template: ChangedLines([line_number])})
+        errors, _ = cached_collection.run(template)
+        assert errors
+        assert all(error.line_number == line_number for error in errors)
+        assert not os.path.exists(
+            os.path.join(cached_collection.cache.directory, "results")
+        )
+
+        cached_collection.diff = None
+        cached_collection.run(template)
+        cached_collection.diff = DiffIndex({template: ChangedLines([line_number])})
+        with mock.patch("j2lint.linter.rule.Rule.checkrule") as patched_checkrule:
+            assert self.to_tuples(cached_collection.run(template)[0]) == (
+                self.to_tuples(errors)
+            )
+            patched_checkrule.assert_not_called()
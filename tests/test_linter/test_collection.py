@@ -10,7 +10,9 @@ from unittest import mock
 
 import pytest
 
-from j2lint.linter.collection import RulesCollection
+from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from j2lint.linter.diff import ChangedLines, DiffIndex
+from j2lint.linter.error import LinterError
 from j2lint.rules.jinja_operator_has_spaces_rule import JinjaOperatorHasSpacesRule
 from j2lint.rules.jinja_statement_delimiter_rule import JinjaStatementDelimiterRule
 from j2lint.rules.jinja_template_syntax_error_rule import JinjaTemplateSyntaxErrorRule
@@ -125,6 +127,148 @@ class TestRulesCollection:
                 "Skipping linting rule T3" in message for message in caplog.messages
             )
 
+    def test_run_triggers(self, caplog, test_collection, make_rules):
+        """
+        Test the RuleCollection.run method skips the rules whose triggers are
+        not in the file
+        """
+        caplog.set_level(logging.DEBUG)
+        rules = make_rules(3)
+        rules[0].triggers = ("\t", "{%")
+        rules[1].triggers = ("\t",)
+        test_collection.rules = rules
+        checked = []
+
+        def checks_side_effect(self, file_path, text):
+            checked.append(self.rule_id)
+            return []
+
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkrule",
+            side_effect=checks_side_effect,
+            autospec=True,
+        ):
+            assert test_collection.run("dummy.j2", "{% if a %}{% endif %}") == ([], [])
+        assert checked == ["T0", "T2"]
+        assert any(
+            "Skipping linting rule T1: test rule 1 on file dummy.j2, none of its triggers"
+            in message
+            for message in caplog.messages
+        )
+
+    def test_run_suppressions(self, test_collection, make_rules):
+        """
+        Test the RuleCollection.run method removes the errors on the lines
+        where the rule is disabled
+        """
+        rules = make_rules(2)
+        test_collection.rules = rules
+        text = (
+            "{{ a }} {# j2lint: disable-line=T0 #}\n"
+            "{# j2lint: disable-next-line=T1 #}\n"
+            "{{ b }}\n"
+        )
+
+        def checks_side_effect(self, file_path, text):
+            return [
+                LinterError(line_number, "", file_path, self)
+                for line_number in range(1, 4)
+            ]
+
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkrule",
+            side_effect=checks_side_effect,
+            autospec=True,
+        ):
+            errors, _ = test_collection.run("dummy.j2", text)
+        assert [(error.rule.rule_id, error.line_number) for error in errors] == [
+            ("T0", 2),
+            ("T0", 3),
+            ("T1", 1),
+            ("T1", 2),
+        ]
+
+    def test_run_shares_context(self, test_collection, make_rules):
+        """
+        Test the RuleCollection.run method gives the same context to all the
+        rules
+        """
+        test_collection.rules = make_rules(3)
+        contexts = []
+
+        def checkfile_side_effect(self, context):
+            contexts.append(context)
+            return []
+
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkfile",
+            side_effect=checkfile_side_effect,
+            autospec=True,
+        ):
+            assert test_collection.run("dummy.j2", "{{ a }}") == ([], [])
+        assert len(contexts) == 3
+        assert all(context is contexts[0] for context in contexts)
+        assert (contexts[0].filename, contexts[0].text) == ("dummy.j2", "{{ a }}")
+
+    def test_run_requires(self, caplog, test_collection, make_rules):
+        """
+        Test the RuleCollection.run method runs the required rules first and
+        skips the rules whose required rules found errors
+        """
+        caplog.set_level(logging.DEBUG)
+        rules = make_rules(4)
+        rules[0].requires = ("T2",)
+        rules[1].requires = ("T3",)
+        test_collection.rules = rules
+        checked = []
+
+        def checks_side_effect(self, file_path, text):
+            checked.append(self.rule_id)
+            if self.rule_id == "T2":
+                return [LinterError(1, text, file_path, self)]
+            return []
+
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkrule",
+            side_effect=checks_side_effect,
+            autospec=True,
+        ):
+            errors, _ = test_collection.run("dummy.j2", "{{ a }}")
+        assert checked == ["T2", "T3", "T1"]
+        assert [error.rule.rule_id for error in errors] == ["T2"]
+        assert (
+            "Skipping linting rule T0: test rule 0 on file dummy.j2, the rules it "
+            "requires found errors: T2" in caplog.messages
+        )
+
+        # An ignored rule is not required
+        checked.clear()
+        rules[2].ignore = True
+        with mock.patch(
+            "j2lint.linter.rule.Rule.checkrule",
+            side_effect=checks_side_effect,
+            autospec=True,
+        ):
+            assert test_collection.run("dummy.j2", "{{ a }}") == ([], [])
+        assert checked == ["T0", "T3", "T1"]
+
+    def test_run_diff(self):
+        """
+        Test the RuleCollection.run method only reports the errors on the
+        lines changed by the diff and skips the files it does not change
+        """
+        collection = RulesCollection.create_from_directory(DEFAULT_RULE_DIR, [], [])
+        collection.diff = DiffIndex({"changed.j2": ChangedLines([2, 3])})
+        text = "{{aa}}\n{{bb}}\n{% if c %}\n{{dd}}\n{% endfor %}\n"
+        errors, _ = collection.run("changed.j2", text)
+        # S0 finds the syntax error on line 5, S3 requiring it is not run
+        assert [(error.rule.rule_id, error.line_number) for error in errors] == [
+            ("S1", 2)
+        ]
+        with mock.patch("j2lint.linter.collection.read_file") as patched_read_file:
+            assert collection.run("unchanged.j2") == ([], [])
+            patched_read_file.assert_not_called()
+
     def test__repr__(self, test_collection, test_other_rule):
         """
         Test the RuleCollection.extend method
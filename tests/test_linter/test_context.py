@@ -0,0 +1,62 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.context.py
+"""
+from unittest import mock
+
+import jinja2
+
+from j2lint.linter.context import FileContext
+from j2lint.linter.environment import AST_CACHE
+
+
+class TestFileContext:
+    def test_artifacts(self):
+        """
+        Test the artifacts derived from the file
+        """
+        context = FileContext(
+            "dummy.j2", "{# j2lint: disable=S1 #}\n{% if a %}\n{{ b }}\n{% endif %}"
+        )
+        assert context.lines == [
+            "{# j2lint: disable=S1 #}",
+            "{% if a %}",
+            "{{ b }}",
+            "{% endif %}",
+        ]
+        assert context.line_index.line(3) == "{{ b }}"
+        assert [token.kind for token in context.tokens] == [
+            "comment",
+            "text",
+            "statement",
+            "text",
+            "variable",
+            "text",
+            "statement",
+        ]
+        assert context.statements == [
+            (" if a ", 2, 2, "{%", "%}"),
+            (" endif ", 4, 4, "{%", "%}"),
+        ]
+        assert context.variables == [" b "]
+        assert context.comments == [" j2lint: disable=S1 "]
+        assert context.suppressions.disabled == {"S1"}
+        assert isinstance(context.ast, jinja2.nodes.Template)
+        assert context.syntax_error is None
+
+    def test_parse_once(self):
+        """
+        Test that the file is parsed once for the AST and the syntax error
+        """
+        AST_CACHE.clear()
+        context = FileContext("dummy.j2", "{% if a %}\n{% endfor %}")
+        parse = jinja2.Environment.parse
+        with mock.patch.object(
+            jinja2.Environment, "parse", side_effect=parse, autospec=True
+        ) as mocked_parse:
+            assert context.syntax_error is not None
+            assert context.syntax_error.lineno == 2
+            assert context.ast is None
+        mocked_parse.assert_called_once()
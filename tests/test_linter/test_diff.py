@@ -0,0 +1,205 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.diff.py
+"""
+import io
+import os
+import tempfile
+from unittest import mock
+
+import pytest
+
+from j2lint.linter.diff import ChangedLines, DiffIndex, parse_diff, read_diff
+from j2lint.linter.error import LinterError
+
+GIT_DIFF = """\
+diff --git a/templates/interfaces.j2 b/templates/interfaces.j2
+index 3b18e51..a4f5c2e 100644
+--- a/templates/interfaces.j2
++++ b/templates/interfaces.j2
+@@ -1,5 +1,6 @@
+ {% for interface in interfaces %}
+-interface {{interface.name}}
++interface {{ interface.name }}
++   description {{interface.description}}
+ {% if interface.shutdown %}
+     shutdown
+ {% endif %}
+@@ -10 +11,0 @@ end
+-{# removed #}
+@@ -20,3 +20,3 @@ hunk shorter than its header
+ a
+--- not a header
++++ not a header either
+\\ No newline at end of file
+diff --git a/templates/new.j2 b/templates/new.j2
+new file mode 100644
+index 0000000..f2ad6c7
+--- /dev/null
++++ b/templates/new.j2
+@@ -0,0 +1,2 @@
++{{ new }}
++{{ template }}
+diff --git a/templates/deleted.j2 b/templates/deleted.j2
+deleted file mode 100644
+index f2ad6c7..0000000
+--- a/templates/deleted.j2
++++ /dev/null
+@@ -1 +0,0 @@
+-{{ deleted }}
+diff --git a/templates/renamed.j2 b/templates/moved.j2
+similarity index 100%
+rename from templates/renamed.j2
+rename to templates/moved.j2
+"""
+
+PLAIN_DIFF = """\
+--- old/a.j2\t2024-01-01 00:00:00.000000000 +0000
++++ new/a.j2\t2024-01-02 00:00:00.000000000 +0000
+@@ -3,2 +3,2 @@
+ {{ a }}
+-{{b}}
++{{ b }}
+"""
+
+
+class TestChangedLines:
+    def test_contains(self):
+        """
+        Test the ChangedLines intervals
+        """
+        changed_lines = ChangedLines([2, 3, 4, 4, 8, 10, 11])
+        assert (changed_lines.starts, changed_lines.ends) == ([2, 8, 10], [4, 8, 11])
+        assert [line for line in range(13) if line in changed_lines] == [
+            2,
+            3,
+            4,
+            8,
+            10,
+            11,
+        ]
+        assert list(changed_lines.lines(10)) == [2, 3, 4, 8, 10]
+        assert list(changed_lines.lines(1)) == []
+        assert list(changed_lines.ranges(10)) == [(2, 4), (8, 8), (10, 10)]
+        assert repr(changed_lines) == "ChangedLines(2-4, 8, 10-11)"
+        assert changed_lines
+        assert not ChangedLines([])
+        assert 1 not in ChangedLines([])
+
+    def test_filter(self, test_rule):
+        """
+        Test ChangedLines.filter keeps the errors on the changed lines
+        """
+        errors = [
+            LinterError(line_number, "line", "dummy.j2", test_rule)
+            for line_number in range(1, 5)
+        ]
+        assert [error.line_number for error in ChangedLines([2, 4]).filter(errors)] == [
+            2,
+            4,
+        ]
+
+
+def test_parse_diff():
+    """
+    Test j2lint.linter.diff.parse_diff with a git diff
+    """
+    diff = parse_diff(GIT_DIFF)
+    assert list(diff.get("templates/interfaces.j2").lines(100)) == [2, 3, 11, 21]
+    assert list(diff.get("./templates/new.j2").lines(100)) == [1, 2]
+    assert list(diff.get(os.path.abspath("templates/new.j2")).lines(100)) == [1, 2]
+    assert not diff.get("templates/deleted.j2")
+    assert not diff.get("templates/moved.j2")
+    assert not diff.get("templates/unknown.j2")
+    assert len(diff) == 2
+
+
+def test_parse_diff_plain():
+    """
+    Test j2lint.linter.diff.parse_diff with a diff -u diff
+    """
+    diff = parse_diff(PLAIN_DIFF)
+    assert list(diff.get("new/a.j2").lines(100)) == [4]
+
+
+@pytest.mark.parametrize(
+    "hunk, expected",
+    [
+        pytest.param(
+            "@@ -1,4 +1,3 @@\n {{ a }}\n-{{ b }}\n {{ c }}\n {{ d }}\n",
+            [2],
+            id="removal",
+        ),
+        pytest.param(
+            "@@ -2,3 +2,2 @@\n {{ b }}\n {{ c }}\n-{{ d }}\n", [3], id="end of hunk"
+        ),
+        pytest.param("@@ -2 +1,0 @@\n-{{ b }}\n", [1], id="no context"),
+        pytest.param("@@ -1 +0,0 @@\n-{{ a }}\n", [1], id="whole file"),
+    ],
+)
+def test_parse_diff_removal(hunk, expected):
+    """
+    Test j2lint.linter.diff.parse_diff marks the line at the place of a removal
+    as changed
+    """
+    diff = parse_diff(f"--- a/a.j2\n+++ b/a.j2\n{hunk}")
+    assert list(diff.get("a.j2").lines(100)) == expected
+
+
+def test_parse_diff_line_boundaries():
+    """
+    Test j2lint.linter.diff.parse_diff only splits the diff on newlines and
+    accepts CRLF line endings
+    """
+    hunk = "@@ -1,2 +1,2 @@\n {{ a }}\x0c{{ b }}\n-{{c}}\n+{{ c }}\n"
+    assert list(parse_diff(f"+++ b/a.j2\n{hunk}").get("a.j2").lines(100)) == [2]
+    crlf = f"+++ b/a.j2\n{hunk}".replace("\n", "\r\n")
+    assert list(parse_diff(crlf).get("a.j2").lines(100)) == [2]
+
+
+def test_parse_diff_malformed():
+    """
+    Test j2lint.linter.diff.parse_diff raises ValueError on a malformed hunk
+    """
+    with pytest.raises(ValueError, match="Malformed hunk header"):
+        parse_diff("+++ b/a.j2\n@@ -1 +a @@\n")
+
+
+def test_select_files():
+    """
+    Test DiffIndex.select_files
+    """
+    diff = DiffIndex(
+        {
+            "templates/a.j2": ChangedLines([1]),
+            "templates/b.txt": ChangedLines([1]),
+            "templates/sub/c.j2": ChangedLines([1]),
+            "other/d.j2": ChangedLines([1]),
+            "templates/e.j2": ChangedLines([]),
+        }
+    )
+    assert diff.select_files(["templates"], [".j2"]) == [
+        os.path.join("templates", "a.j2"),
+        os.path.join("templates", "sub", "c.j2"),
+    ]
+    assert diff.select_files(["./templates/a.j2", "other"], [".j2"]) == [
+        os.path.join("other", "d.j2"),
+        os.path.join("templates", "a.j2"),
+    ]
+
+
+def test_read_diff():
+    """
+    Test j2lint.linter.diff.read_diff from a file and from the standard input
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "changes.diff")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(PLAIN_DIFF)
+        assert list(read_diff(path).get("new/a.j2").lines(100)) == [4]
+        with pytest.raises(OSError):
+            read_diff(os.path.join(tmp_dir, "missing.diff"))
+    with mock.patch("sys.stdin", io.StringIO(GIT_DIFF)):
+        assert len(read_diff("-")) == 2
@@ -0,0 +1,120 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.environment.py
+"""
+import argparse
+from unittest import mock
+
+import jinja2
+import pytest
+
+from j2lint.linter.context import FileContext
+from j2lint.linter.environment import (
+    DEFAULT_JINJA_EXTENSIONS,
+    ASTCache,
+    get_environment,
+    parse_jinja_extension,
+)
+
+
+@pytest.mark.parametrize(
+    "value, valid",
+    [
+        ("jinja2.ext.i18n", True),
+        ("jinja2.ext:LoopControlExtension", True),
+        pytest.param("jinja2.ext.unknown", False, id="unknown attribute"),
+        pytest.param("unknown_module.Extension", False, id="unknown module"),
+        pytest.param("jinja2.Environment", False, id="not an extension"),
+    ],
+)
+def test_parse_jinja_extension(value, valid):
+    """
+    Test j2lint.linter.environment.parse_jinja_extension
+    """
+    if valid:
+        assert parse_jinja_extension(value) == value
+    else:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_jinja_extension(value)
+
+
+def test_get_environment():
+    """
+    Test j2lint.linter.environment.get_environment shares an environment per
+    set of extensions
+    """
+    env = get_environment()
+    assert get_environment(reversed(DEFAULT_JINJA_EXTENSIONS)) is env
+    assert {type(extension) for extension in env.extensions.values()} == {
+        jinja2.ext.ExprStmtExtension,
+        jinja2.ext.LoopControlExtension,
+    }
+    other_env = get_environment(("jinja2.ext.i18n",))
+    assert other_env is not env
+    assert list(other_env.extensions) == ["jinja2.ext.InternationalizationExtension"]
+
+
+class TestASTCache:
+    def test_parse(self):
+        """
+        Test ASTCache.parse parses each content once and counts the hits and misses
+        """
+        cache = ASTCache()
+        parse = jinja2.Environment.parse
+        with mock.patch.object(
+            jinja2.Environment, "parse", side_effect=parse, autospec=True
+        ) as mocked_parse:
+            ast, error = cache.parse("{% do a.append(1) %}")
+            assert isinstance(ast, jinja2.nodes.Template)
+            assert error is None
+            assert cache.parse("{% do a.append(1) %}") == (ast, None)
+
+            ast, error = cache.parse("{% if a %}\n{% endfor %}")
+            assert ast is None
+            assert error.lineno == 2
+            assert error.__traceback__ is None
+            assert cache.parse("{% if a %}\n{% endfor %}") == (None, error)
+        assert mocked_parse.call_count == 2
+        assert (cache.hits, cache.misses) == (2, 2)
+
+        cache.clear()
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (0, 0)
+
+    def test_parse_extensions(self):
+        """
+        Test ASTCache.parse keys the templates by the extensions as well
+        """
+        cache = ASTCache()
+        assert cache.parse("{% do a.append(1) %}")[1] is None
+        _, error = cache.parse("{% do a.append(1) %}", ("jinja2.ext.i18n",))
+        assert "Encountered unknown tag 'do'" in error.message
+        assert cache.misses == 2
+
+    def test_max_size(self):
+        """
+        Test ASTCache.parse drops the least recently used templates
+        """
+        cache = ASTCache(max_size=2)
+        cache.parse("{{ a }}")
+        cache.parse("{{ b }}")
+        cache.parse("{{ a }}")
+        cache.parse("{{ c }}")
+        assert len(cache) == 2
+        cache.parse("{{ a }}")
+        assert cache.hits == 2
+        cache.parse("{{ b }}")
+        assert cache.misses == 4
+
+
+def test_file_context_extensions():
+    """
+    Test FileContext parses the file with its extensions
+    """
+    text = "{% trans %}Hello{% endtrans %}"
+    assert FileContext("dummy.j2", text).syntax_error is not None
+    context = FileContext("dummy.j2", text, ("jinja2.ext.i18n",))
+    assert context.syntax_error is None
+    assert isinstance(context.ast, jinja2.nodes.Template)
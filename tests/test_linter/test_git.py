@@ -0,0 +1,254 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.git.py
+"""
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+from j2lint.linter.git import (
+    INDEX,
+    GitBlobReader,
+    GitError,
+    find_dependents,
+    get_changed_files,
+    get_changed_paths,
+    get_paths,
+    run_git,
+)
+
+# pylint: disable=redefined-outer-name
+
+EXTENSIONS = [".j2"]
+
+
+def git(*args):
+    """
+    Runs a git command in the current directory
+    """
+    subprocess.run(
+        ["git", "-c", "user.name=j2lint", "-c", "user.email=j2lint@example.com", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+def write(path, text):
+    """
+    Writes a file, creating its directory
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+@pytest.fixture
+def repository(monkeypatch):
+    """
+    Git repository with a commit of templates, as current directory
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        monkeypatch.chdir(directory)
+        git("init", "-q")
+        write("templates/macros.j2", "{% macro m() %}{% endmacro %}\n")
+        write("templates/eos/interfaces.j2", '{% import "macros.j2" as macros %}\n')
+        write("templates/eos.j2", '{% include "eos/interfaces.j2" %}\n')
+        write("templates/other.j2", "{{ other }}\n")
+        write("templates/deleted.j2", "{{ deleted }}\n")
+        write("README.md", "templates\n")
+        git("add", ".")
+        git("commit", "-q", "-m", "initial")
+        yield directory
+
+
+def test_run_git(repository):
+    """
+    Test j2lint.linter.git.run_git raises GitError when the command fails
+    """
+    assert run_git(["rev-parse", "--show-toplevel"])
+    with pytest.raises(GitError, match="unknown-ref"):
+        run_git(["rev-parse", "--verify", "unknown-ref"])
+
+
+def test_get_changed_paths(repository):
+    """
+    Test j2lint.linter.git.get_changed_paths with the working tree and the index
+    """
+    write("templates/other.j2", "{{ changed }}\n")
+    write("README.md", "changed\n")
+    os.remove("templates/deleted.j2")
+    git("add", "README.md")
+    assert get_changed_paths() == ["README.md", "templates/other.j2"]
+    assert get_changed_paths(revision=INDEX) == ["README.md"]
+    git("commit", "-q", "-a", "-m", "second")
+    assert not get_changed_paths()
+    assert get_changed_paths("HEAD~1") == ["README.md", "templates/other.j2"]
+    assert get_changed_paths("HEAD~1", "HEAD~1") == []
+    assert get_changed_paths("HEAD", "HEAD~1") == [
+        "README.md",
+        "templates/deleted.j2",
+        "templates/other.j2",
+    ]
+    os.chdir("templates")
+    assert get_changed_paths("HEAD~1") == ["other.j2"]
+    with pytest.raises(GitError):
+        get_changed_paths("unknown-ref")
+    with pytest.raises(GitError, match="Invalid git reference"):
+        get_changed_paths("--output=file")
+
+
+def test_get_changed_paths_not_a_repository(monkeypatch):
+    """
+    Test j2lint.linter.git.get_changed_paths outside of a git repository
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        monkeypatch.chdir(directory)
+        monkeypatch.setenv("GIT_CEILING_DIRECTORIES", os.path.dirname(directory))
+        with pytest.raises(GitError):
+            get_changed_paths()
+
+
+def test_find_dependents(repository):
+    """
+    Test j2lint.linter.git.find_dependents follows the references transitively
+    """
+    candidates = [
+        "templates/eos.j2",
+        "templates/eos/interfaces.j2",
+        "templates/macros.j2",
+        "templates/other.j2",
+    ]
+    assert sorted(find_dependents(["templates/macros.j2"], candidates)) == [
+        "templates/eos.j2",
+        os.path.join("templates", "eos", "interfaces.j2"),
+    ]
+    assert find_dependents(["templates/eos.j2"], candidates) == []
+    assert find_dependents(["templates/other.j2"], candidates) == []
+
+
+@pytest.mark.parametrize(
+    "file_or_dir_names, include_dependents, expected",
+    [
+        pytest.param(["."], False, ["templates/macros.j2"], id="changed"),
+        pytest.param(
+            ["templates"],
+            True,
+            [
+                "templates/eos.j2",
+                "templates/eos/interfaces.j2",
+                "templates/macros.j2",
+            ],
+            id="dependents",
+        ),
+        pytest.param(
+            ["templates/eos"],
+            True,
+            ["templates/eos/interfaces.j2"],
+            id="dependents in a subdirectory",
+        ),
+        pytest.param(["templates/eos.j2"], False, [], id="file not changed"),
+    ],
+)
+def test_get_changed_files(repository, file_or_dir_names, include_dependents, expected):
+    """
+    Test j2lint.linter.git.get_changed_files only returns the changed files
+    with a valid extension under the given paths
+    """
+    write("templates/macros.j2", "{% macro m(a) %}{% endmacro %}\n")
+    write("README.md", "changed\n")
+    assert get_changed_files(
+        file_or_dir_names, EXTENSIONS, include_dependents=include_dependents
+    ) == [os.path.normpath(path) for path in expected]
+    git("add", "templates/macros.j2")
+    assert get_changed_files(
+        [os.path.abspath(name) for name in file_or_dir_names],
+        EXTENSIONS,
+        "HEAD",
+        INDEX,
+        include_dependents=include_dependents,
+    ) == [os.path.normpath(path) for path in expected]
+
+
+def test_get_paths(repository):
+    """
+    Test j2lint.linter.git.get_paths lists the files of the index or of a commit
+    """
+    write("templates/new.j2", "{{ new }}\n")
+    git("add", "templates/new.j2")
+    git("rm", "-q", "templates/deleted.j2")
+    os.chdir("templates")
+    assert get_paths(INDEX) == [
+        "eos.j2",
+        "eos/interfaces.j2",
+        "macros.j2",
+        "new.j2",
+        "other.j2",
+    ]
+    assert get_paths("HEAD") == [
+        "deleted.j2",
+        "eos.j2",
+        "eos/interfaces.j2",
+        "macros.j2",
+        "other.j2",
+    ]
+    with pytest.raises(GitError):
+        get_paths("unknown-ref")
+
+
+class TestGitBlobReader:
+    def test_read(self, repository):
+        """
+        Test GitBlobReader.read reads the files of the index or of a commit
+        """
+        write("templates/other.j2", "{{ staged }}\r\n")
+        git("add", "templates/other.j2")
+        write("templates/other.j2", "{{ working tree }}\n")
+        with GitBlobReader() as index_reader, GitBlobReader("HEAD") as head_reader:
+            assert index_reader.read("templates/other.j2") == "{{ staged }}\n"
+            assert head_reader.read("templates/other.j2") == "{{ other }}\n"
+            assert head_reader.read(os.path.join("templates", "eos.j2")) == (
+                '{% include "eos/interfaces.j2" %}\n'
+            )
+            assert index_reader.read("templates/unknown.j2") is None
+            assert index_reader.read("templates") is None
+            assert index_reader.read("new\nline.j2") is None
+            assert index_reader.read("templates/other.j2") == "{{ staged }}\n"
+            assert index_reader.process is not None
+        assert index_reader.process is None
+
+    def test_read_not_utf8(self, repository):
+        """
+        Test GitBlobReader.read does not return the files which are not UTF-8
+        """
+        with open("latin1.j2", "wb") as file:
+            file.write("{{ é }}".encode("latin-1"))
+        git("add", "latin1.j2")
+        with GitBlobReader() as reader:
+            assert reader.read("latin1.j2") is None
+
+
+def test_get_changed_files_revision(repository):
+    """
+    Test j2lint.linter.git.get_changed_files with the files of a revision
+    """
+    write("templates/macros.j2", "{% macro m(a) %}{% endmacro %}\n")
+    git("add", "templates/macros.j2")
+    # Not in the index
+    write("templates/new.j2", '{% import "macros.j2" as macros %}\n')
+    expected = [
+        "templates/deleted.j2",
+        "templates/eos.j2",
+        "templates/eos/interfaces.j2",
+        "templates/macros.j2",
+        "templates/other.j2",
+    ]
+    assert get_changed_files(["templates"], EXTENSIONS, revision=INDEX) == [
+        os.path.normpath(path) for path in expected
+    ]
+    assert get_changed_files(
+        ["templates"], EXTENSIONS, "HEAD", INDEX, include_dependents=True
+    ) == [os.path.normpath(path) for path in expected[1:4]]
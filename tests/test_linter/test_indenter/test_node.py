@@ -6,7 +6,8 @@ Tests for j2lint.linter.node.py
 """
 import pytest
 
-from j2lint.linter.indenter.node import Node
+from j2lint.linter.error import JinjaLinterError
+from j2lint.linter.indenter.node import IndentationChecker, Node
 
 
 class TestNode:
@@ -38,3 +39,101 @@ class TestNode:
             "{% if switch.platform_settings.tcam_profile is arista.avd.defined %}",
             "test",
         )
+
+    def test_children(self):
+        """
+        Test that the children list is only created for the nodes with children
+        """
+        root = Node()
+        node = root.create_node((" set a = 1 ", 1, 1, "{%", "%}"), 0)
+        assert node._children is None
+        root.children.append(node)
+        assert root.children == [node]
+        assert not hasattr(node, "__dict__")
+
+
+def statements(*lines):
+    """Returns the statement tuples of get_jinja_statements, one per line"""
+    return [
+        (line, line_no, line_no, "{%", "%}")
+        for line_no, line in enumerate(lines, start=1)
+    ]
+
+
+class TestIndentationChecker:
+    def test_check(self):
+        """
+        Test the IndentationChecker.check method
+
+        The begin and middle tags are checked once their section is closed
+        """
+        checker = IndentationChecker(
+            statements(" if a ", "   b ", "  else ", "     c ", "  endif ")
+        )
+        assert checker.check() == [
+            (2, "{%   b %}", "Bad Indentation, expected 5, got 3"),
+            (3, "{%  else %}", "Bad Indentation, expected 1, got 2"),
+            (5, "{%  endif %}", "Bad Indentation, expected 1, got 2"),
+        ]
+        assert [node.tag for node in checker.root.children] == ["if", "else", "endif"]
+        assert [node.tag for node in checker.root.children[0].children] == ["b"]
+
+    @pytest.mark.parametrize(
+        "lines, message, errors",
+        [
+            pytest.param(
+                (" for a in b ", "     c ", " endif "),
+                "Line 2 - Tag is out of order 'endif'",
+                [(3, "{% endif %}", "Line 2 - Tag is out of order 'endif'")],
+                id="out of order",
+            ),
+            pytest.param(
+                (" for a in b ", " elif c "),
+                "Unsupported tag 'elif' found",
+                [(2, "{% elif c %}", "Unsupported tag 'elif' found")],
+                id="unsupported",
+            ),
+            pytest.param(
+                (" if a ", " else ", "  b "),
+                "Line 1 - Missing closing tag 'endif'",
+                [(3, "{%  b %}", "Bad Indentation, expected 5, got 2")],
+                id="missing end tag",
+            ),
+            pytest.param(
+                (" endfor ",),
+                "Line 0 - Tag 'endfor' is not in a block",
+                [],
+                id="end tag without block",
+            ),
+            pytest.param(
+                ("  ",),
+                "Line 0 - Empty statement",
+                [],
+                id="empty statement",
+            ),
+        ],
+    )
+    def test_check_raises(self, lines, message, errors):
+        """
+        Test the IndentationChecker.check method on tags which are not nested
+        properly, the errors found before are kept
+        """
+        checker = IndentationChecker(statements(*lines))
+        with pytest.raises(JinjaLinterError, match=message):
+            checker.check()
+        assert checker.errors == errors
+
+    def test_check_deep_nesting(self):
+        """
+        Test the IndentationChecker.check method on more nested blocks than the
+        recursion limit, each checker starting from a clean state
+        """
+        depth = 5000
+        lines = statements(
+            *(f"{' ' * (4 * level + 1)}if a " for level in range(depth)),
+            *(f"{' ' * (4 * level + 1)}endif " for level in reversed(range(depth))),
+        )
+        assert not IndentationChecker(lines).check()
+        with pytest.raises(JinjaLinterError):
+            IndentationChecker(lines[:-1]).check()
+        assert not IndentationChecker(lines).check()
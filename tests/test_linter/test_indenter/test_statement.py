@@ -52,3 +52,5 @@ class TestJinjaStatement:
         statement = JinjaStatement(line)
         for key, value in expected_statement.items():
             assert statement.__getattribute__(key) == value
+        # The words are only split once
+        assert statement.words is statement.words
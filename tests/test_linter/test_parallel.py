@@ -0,0 +1,164 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.parallel.py
+"""
+import os
+import pathlib
+import tempfile
+from functools import partial
+
+import pytest
+
+from j2lint.linter.budget import LintBudget
+from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from j2lint.linter.error import LinterError
+from j2lint.linter.parallel import ParallelRunner, decode_errors, encode_errors
+
+TEST_DATA_DIR = pathlib.Path(__file__).parent.parent / "test_rules" / "data"
+
+
+def fields(error):
+    """Returns the attributes of a LinterError"""
+    return {name: getattr(error, name) for name in LinterError.__slots__}
+
+
+def test_encode_decode_errors(test_collection, make_issue_from_rule, test_rule):
+    """
+    Test that encode_errors / decode_errors round trip
+    """
+    errors = list(make_issue_from_rule(test_rule))
+    encoded = encode_errors(test_collection, errors)
+    assert encoded == [(0, 42, "dummy", "dummy.j2", "test rule 0")]
+    decoded = decode_errors(test_collection, encoded)
+    assert [fields(error) for error in decoded] == [fields(error) for error in errors]
+
+
+class TestParallelRunner:
+    @pytest.mark.parametrize(
+        "jobs, number_of_files, expected",
+        [
+            (2, 0, 1),
+            (2, 7, 1),
+            (2, 80, 10),
+            (4, 100000, 32),
+        ],
+    )
+    def test_batch_size(self, test_collection, jobs, number_of_files, expected):
+        """
+        Test ParallelRunner.batch_size
+        """
+        runner = ParallelRunner(test_collection, RulesCollection, jobs)
+        assert runner.batch_size(number_of_files) == expected
+
+    @pytest.mark.parametrize(
+        "jobs, sizes, expected",
+        [
+            pytest.param(2, [], [], id="no files"),
+            pytest.param(
+                2,
+                [1000, 10, 10, 10, 10],
+                [[0], [1], [2], [3], [4]],
+                id="one file per batch when few files",
+            ),
+            pytest.param(
+                1,
+                [400, 100, 50, 50, 50, 50] + [0] * 10,
+                [[0], [1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13, 14, 15]],
+                id="dedicated large files and grouped small files",
+            ),
+        ],
+    )
+    def test_make_batches(self, test_collection, jobs, sizes, expected):
+        """
+        Test ParallelRunner.make_batches
+        """
+        runner = ParallelRunner(test_collection, RulesCollection, jobs)
+        sized_files = [(f"{index}.j2", size) for index, size in enumerate(sizes)]
+        assert runner.make_batches(sized_files) == [
+            [f"{index}.j2" for index in batch] for batch in expected
+        ]
+
+    def test_run_not_started(self, test_collection):
+        """
+        Test ParallelRunner.run outside of the context manager
+        """
+        runner = ParallelRunner(test_collection, RulesCollection, 2)
+        with pytest.raises(RuntimeError):
+            list(runner.run(["test.j2"]))
+
+    @pytest.mark.parametrize("recent_first", [False, True])
+    def test_run(self, collection, recent_first):
+        """
+        Test ParallelRunner.run gives the same results as RulesCollection.run
+        """
+        files = sorted(str(path) for path in TEST_DATA_DIR.glob("*.j2"))
+        factory = partial(
+            RulesCollection.create_from_directory, DEFAULT_RULE_DIR, [], []
+        )
+        with ParallelRunner(
+            collection, factory, 2, recent_first=recent_first
+        ) as runner:
+            results = list(runner.run(files + files[:1]))
+
+        assert [file_name for file_name, _, _ in results] == files
+        for file_name, errors, warnings in results:
+            expected_errors, expected_warnings = collection.run(file_name)
+            assert [fields(error) for error in errors] == [
+                fields(error) for error in expected_errors
+            ]
+            assert [fields(warning) for warning in warnings] == [
+                fields(warning) for warning in expected_warnings
+            ]
+
+    @pytest.mark.parametrize(
+        "max_errors, time_budget",
+        [
+            pytest.param(1, None, id="max errors"),
+            pytest.param(None, 0, id="time budget"),
+        ],
+    )
+    def test_run_budget(self, collection, max_errors, time_budget):
+        """
+        Test ParallelRunner.run stops when the budget runs out
+        """
+        files = sorted(str(path) for path in TEST_DATA_DIR.glob("*.j2"))
+        factory = partial(
+            RulesCollection.create_from_directory, DEFAULT_RULE_DIR, [], []
+        )
+        budget = LintBudget(max_errors, time_budget)
+        with ParallelRunner(collection, factory, 2) as runner:
+            linted_files = [file_name for file_name, _, _ in runner.run(files, budget)]
+
+        assert budget.is_exhausted()
+        assert linted_files == [
+            file_name for file_name in files if file_name in linted_files
+        ]
+        if time_budget == 0:
+            assert not linted_files
+
+    def test_run_max_errors(self, collection):
+        """
+        Test ParallelRunner.run only lints a few files more than the workers
+        once the error budget runs out
+        """
+        factory = partial(
+            RulesCollection.create_from_directory, DEFAULT_RULE_DIR, [], []
+        )
+        budget = LintBudget(max_errors=1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = []
+            for file_no in range(100):
+                file_path = os.path.join(tmp_dir, f"{file_no}.j2")
+                with open(file_path, "w", encoding="utf-8") as file:
+                    file.write("{{aa}}\n")
+                files.append(file_path)
+            with ParallelRunner(collection, factory, 2) as runner:
+                linted_files = [
+                    file_name for file_name, _, _ in runner.run(files, budget)
+                ]
+
+        assert budget.is_exhausted()
+        # One file more than the number of workers is in flight at most
+        assert 0 < len(linted_files) <= 3
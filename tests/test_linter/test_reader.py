@@ -0,0 +1,115 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.reader.py
+"""
+import logging
+import pathlib
+import tempfile
+
+import pytest
+
+from j2lint.linter.reader import PrefetchReader, read_file
+
+TEST_DATA_DIR = pathlib.Path(__file__).parent / "data"
+
+
+@pytest.mark.parametrize(
+    "file_path, expected_content, expected_log",
+    [
+        pytest.param(
+            f"{TEST_DATA_DIR}/test.txt",
+            (TEST_DATA_DIR / "test.txt").read_text(encoding="utf-8"),
+            [],
+            id="existing file",
+        ),
+        pytest.param(
+            "dummy.j2",
+            None,
+            [
+                (
+                    "root",
+                    logging.WARNING,
+                    "Could not open dummy.j2 - No such file or directory",
+                )
+            ],
+            id="non existing file",
+        ),
+    ],
+)
+def test_read_file(caplog, file_path, expected_content, expected_log):
+    """
+    Test the reader.read_file function
+    """
+    assert read_file(file_path) == expected_content
+    assert caplog.record_tuples == expected_log
+
+
+class TestPrefetchReader:
+    @pytest.fixture
+    def files(self):
+        """
+        Create 10 files of 9 bytes
+
+        Not using tmp_path as template_tmp_dir changes its base directory
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for index in range(10):
+                path = pathlib.Path(tmp_dir) / f"file{index}.j2"
+                path.write_text(f"content {index}")
+                paths.append(str(path))
+            yield paths
+
+    @pytest.mark.parametrize(
+        "max_files, max_bytes, prefetched",
+        [
+            pytest.param(0, 1024, 0, id="disabled"),
+            pytest.param(1, 1024, 1, id="one file ahead"),
+            pytest.param(4, 1024, 4, id="four files ahead"),
+            pytest.param(4, 0, 0, id="no bytes budget"),
+        ],
+    )
+    def test_read(self, files, max_files, max_bytes, prefetched):
+        """
+        Test PrefetchReader.read returns the prefetched content and respects
+        the files and bytes limits
+        """
+        with PrefetchReader(files, max_files=max_files, max_bytes=max_bytes) as reader:
+            assert len(reader.futures) == prefetched
+            for index, file_path in enumerate(files):
+                text = reader.read(file_path)
+                assert text == (f"content {index}" if prefetched else None)
+                assert len(reader.futures) <= max_files
+        assert not reader.futures
+
+    def test_iterate(self, files):
+        """
+        Test PrefetchReader takes the files from a generator only when they
+        are read ahead or iterated over, and yields them in order
+        """
+        taken = []
+
+        def find_files():
+            for file_path in files:
+                taken.append(file_path)
+                yield file_path
+
+        with PrefetchReader(find_files(), max_files=2) as reader:
+            assert taken == files[:2]
+            for index, file_path in enumerate(reader):
+                assert file_path == files[index]
+                assert reader.read(file_path) == f"content {index}"
+                assert len(taken) <= index + 3
+        assert taken == files
+
+    def test_read_missing_file(self, files):
+        """
+        Test PrefetchReader.read returns None for unreadable files
+        """
+        files.append("dummy.j2")
+        with PrefetchReader(files) as reader:
+            assert reader.read("dummy.j2") is None
+            assert reader.read("not_in_the_list.j2") is None
+            assert reader.read(files[0]) == "content 0"
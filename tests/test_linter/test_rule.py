@@ -6,9 +6,15 @@ Tests for j2lint.linter.rule.py
 """
 import logging
 import pathlib
+import re
 
 import pytest
 
+from j2lint.linter.context import FileContext
+from j2lint.linter.diff import ChangedLines
+from j2lint.linter.error import LinterError
+from j2lint.utils import LineIndex
+
 TEST_DATA_DIR = pathlib.Path(__file__).parent / "data"
 
 
@@ -107,3 +113,192 @@ class TestRule:
         errors_ids = [(error.rule.rule_id, error.line_number) for error in errors]
         assert errors_ids == expected_errors_ids
         assert caplog.record_tuples == expected_logs
+
+    def test_checkrule_checklines(self, test_rule):
+        """
+        Test the Rule.checkrule method with a rule implementing checklines
+
+        checkline is not called and the errors on the lines starting with #
+        are discarded
+        """
+
+        def raise_NotImplementedError(*args, **kwargs):
+            raise NotImplementedError
+
+        def checklines(filename, lines, line_index):
+            assert isinstance(line_index, LineIndex)
+            assert lines == line_index.text.split("\n")
+            return [
+                LinterError(line_no, lines[line_no - 1], filename, test_rule)
+                for line_no in (1, 2, 3)
+            ]
+
+        test_rule.checktext = raise_NotImplementedError
+        test_rule.checkline = raise_NotImplementedError
+        test_rule.checklines = checklines
+
+        errors = test_rule.checkrule("dummy.j2", "{{ a }}\n  # b\n{{ c }}")
+        assert [(error.line_number, error.line) for error in errors] == [
+            (1, "{{ a }}"),
+            (3, "{{ c }}"),
+        ]
+
+    def test_checklines_line_regex(self, test_rule):
+        """
+        Test the default Rule.checklines method reporting the lines where
+        line_regex matches
+        """
+
+        def raise_NotImplementedError(*args, **kwargs):
+            raise NotImplementedError
+
+        test_rule.checktext = raise_NotImplementedError
+        test_rule.checkline = raise_NotImplementedError
+        line_index = LineIndex("a\nb b\n# b\nc")
+        with pytest.raises(NotImplementedError):
+            test_rule.checklines("dummy.j2", line_index.lines, line_index)
+
+        test_rule.line_regex = re.compile("b")
+        errors = test_rule.checkrule("dummy.j2", line_index.text)
+        assert [(error.line_number, error.line) for error in errors] == [(2, "b b")]
+
+    def test_checkrule_token_kinds(self, test_rule):
+        """
+        Test the Rule.checkrule method with a rule checking the tokens of each
+        line
+        """
+        checked = []
+
+        def checktokens(tokens, line_index):
+            checked.append([token.text for token in tokens])
+            return [None, f"{len(tokens)} tokens"] if len(tokens) > 1 else []
+
+        test_rule.token_kinds = ("variable",)
+        test_rule.checktokens = checktokens
+        text = "{{ a }}{{ b }}\n{% c %}\n# {{ d }}{{ e }}\n{{ f }}"
+        errors = test_rule.checkrule("dummy.j2", text)
+        assert checked == [[" a ", " b "], [" f "]]
+        assert [(error.line_number, error.message) for error in errors] == [
+            (1, "test rule 0"),
+            (1, "2 tokens"),
+        ]
+
+    def test_checkrule_jinja_lines_only(self, test_rule):
+        """
+        Test the Rule.checkrule method with a rule only checking the lines with
+        Jinja
+        """
+        checked = []
+
+        def raise_NotImplementedError(*args, **kwargs):
+            raise NotImplementedError
+
+        def checkline(filename, line, line_no):
+            checked.append(line_no)
+            return []
+
+        test_rule.jinja_lines_only = True
+        test_rule.checktext = raise_NotImplementedError
+        test_rule.checkline = checkline
+
+        test_rule.checkrule("dummy.j2", "a\n{{ b }}\n# {{ c }}\n{% if d\n%}\ne")
+        assert checked == [2, 4, 5]
+
+        # The files without Jinja are skipped
+        def checktext(filename, text):
+            raise AssertionError("checktext should not be called")
+
+        test_rule.checktext = checktext
+        assert test_rule.checkrule("dummy.j2", "a\nb\n") == []
+        assert checked == [2, 4, 5]
+
+    @pytest.mark.parametrize(
+        "jinja_lines_only, expected_checked",
+        [
+            pytest.param(False, [1, 2, 5], id="all lines"),
+            pytest.param(True, [2, 5], id="jinja lines only"),
+        ],
+    )
+    def test_checkrule_changed_lines(
+        self, test_rule, jinja_lines_only, expected_checked
+    ):
+        """
+        Test the Rule.checkrule method only calls checkline on the changed lines
+        """
+        checked = []
+
+        def raise_NotImplementedError(*args, **kwargs):
+            raise NotImplementedError
+
+        def checkline(filename, line, line_no):
+            checked.append(line_no)
+            return []
+
+        test_rule.jinja_lines_only = jinja_lines_only
+        test_rule.checktext = raise_NotImplementedError
+        test_rule.checkline = checkline
+
+        test_rule.checkfile(
+            FileContext(
+                "dummy.j2",
+                "a\n{{ b }}\n{{ c }}\nd\n{{ e }}",
+                changed_lines=ChangedLines([1, 2, 5, 6, 7]),
+            )
+        )
+        assert checked == expected_checked
+
+    def test_checkrule_changed_lines_not_examined(self, test_rule):
+        """
+        Test the Rule.checkrule method never examines the lines outside of the
+        changed lines with line_regex or checktokens
+        """
+        text = "{{ a }}{{ a }}\n{{ b }}{{ b }}\n{{ c }}{{ c }}\n{{ d }}{{ d }}"
+        changed_lines = ChangedLines([2, 4])
+        context = FileContext("dummy.j2", text, changed_lines=changed_lines)
+        searched = []
+
+        class RecordingRegex:
+            """Records the text searched by each call"""
+
+            pattern = re.compile("{{")
+
+            def search(self, string, pos, endpos):
+                searched.append(string[pos:endpos])
+                return self.pattern.search(string, pos, endpos)
+
+        def raise_NotImplementedError(*args, **kwargs):
+            raise NotImplementedError
+
+        test_rule.checktext = raise_NotImplementedError
+        test_rule.checklines = raise_NotImplementedError
+        test_rule.line_regex = RecordingRegex()
+        errors = test_rule.checkfile(context)
+        assert [error.line_number for error in errors] == [2, 4]
+        assert searched == ["{{ b }}{{ b }}\n", "{{ d }}{{ d }}"]
+
+        checked = []
+
+        def checktokens(tokens, line_index):
+            checked.append(line_index.line_number(tokens[0].start))
+            return [None]
+
+        test_rule.token_kinds = ("variable",)
+        test_rule.checktokens = checktokens
+        errors = test_rule.checkfile(context)
+        assert [error.line_number for error in errors] == [2, 4]
+        assert checked == [2, 4]
+
+    def test_checkfile(self, test_rule):
+        """
+        Test the default Rule.checkfile method calls checkrule with the file of
+        the context
+        """
+        calls = []
+
+        def checktext(filename, text):
+            calls.append((filename, text))
+            return []
+
+        test_rule.checktext = checktext
+        assert test_rule.checkfile(FileContext("dummy.j2", "{{ a }}")) == []
+        assert calls == [("dummy.j2", "{{ a }}")]
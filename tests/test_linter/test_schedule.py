@@ -0,0 +1,56 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.schedule.py
+"""
+import os
+import tempfile
+
+import pytest
+
+from j2lint.linter.schedule import order_files
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def sized_files():
+    """
+    Files of 10, 30 and 20 bytes, modified in this order
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = []
+        for index, size in enumerate([10, 30, 20]):
+            file_path = os.path.join(tmp_dir, f"{index}.j2")
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write("x" * size)
+            os.utime(file_path, ns=(index * 10**9, index * 10**9))
+            files.append(file_path)
+        yield files
+
+
+def test_order_files(sized_files):
+    """
+    Test j2lint.linter.schedule.order_files
+
+    The largest files come first, missing files last
+    """
+    missing = sized_files[0] + ".missing"
+    assert order_files([missing, *sized_files]) == [
+        (sized_files[1], 30),
+        (sized_files[2], 20),
+        (sized_files[0], 10),
+        (missing, 0),
+    ]
+
+
+def test_order_files_recent_first(sized_files):
+    """
+    Test j2lint.linter.schedule.order_files with recent_first
+    """
+    assert order_files(sized_files, recent_first=True) == [
+        (sized_files[2], 20),
+        (sized_files[1], 30),
+        (sized_files[0], 10),
+    ]
@@ -0,0 +1,200 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.shard.py
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import pytest
+
+from j2lint.linter.budget import LintBudget
+from j2lint.linter.shard import (
+    get_shard,
+    make_recorded_rule,
+    merge_partial_results,
+    parse_shard,
+    select_shard,
+    write_partial_results,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def tmp_dir():
+    """
+    Temporary directory for the partial results files
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        yield directory
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("1/1", (1, 1)),
+        ("2/3", (2, 3)),
+        pytest.param("0/3", None, id="index 0"),
+        pytest.param("4/3", None, id="index too big"),
+        pytest.param("1", None, id="no count"),
+        pytest.param("a/b", None, id="not int"),
+        pytest.param("1/2/3", None, id="too many parts"),
+    ],
+)
+def test_parse_shard(value, expected):
+    """
+    Test j2lint.linter.shard.parse_shard
+    """
+    if expected is None:
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(value)
+    else:
+        assert parse_shard(value) == expected
+
+
+def test_get_shard():
+    """
+    Test j2lint.linter.shard.get_shard
+
+    The shard only depends on the normalized path
+    """
+    assert get_shard("templates/a.j2", 4) == get_shard("./templates//a.j2", 4)
+    assert get_shard("templates/a.j2", 1) == 1
+    files = [f"templates/{index}.j2" for index in range(200)]
+    shards = {get_shard(file, 4) for file in files}
+    assert shards == {1, 2, 3, 4}
+
+
+def test_select_shard():
+    """
+    Test j2lint.linter.shard.select_shard
+
+    Each file is in exactly one shard and the order is kept
+    """
+    files = [f"templates/{index}.j2" for index in range(50)]
+    shards = [select_shard(files, index, 3) for index in range(1, 4)]
+    assert sorted(sum(shards, [])) == sorted(files)
+    for shard in shards:
+        assert shard == [file for file in files if file in shard]
+
+
+def test_make_recorded_rule():
+    """
+    Test j2lint.linter.shard.make_recorded_rule
+    """
+    rule = make_recorded_rule("T0", "test-rule-0", "test rule 0", "LOW")
+    assert (rule.rule_id, rule.short_description, rule.description, rule.severity) == (
+        "T0",
+        "test-rule-0",
+        "test rule 0",
+        "LOW",
+    )
+    other = make_recorded_rule("T1", "test-rule-1", "test rule 1", None)
+    assert rule.rule_id == "T0" and other.rule_id == "T1"
+    with pytest.raises(NotImplementedError):
+        rule.checktext("dummy.j2", "")
+
+
+def test_write_merge_partial_results(tmp_dir, make_issues):
+    """
+    Test j2lint.linter.shard.write_partial_results and merge_partial_results
+
+    The merged issues are ordered as the files of the full run
+    """
+    issues = make_issues(2)
+    issues[1].filename = "aaa.j2"
+    files = ["dummy.j2", "clean.j2", "aaa.j2"]
+    paths = [os.path.join(tmp_dir, f"shard{index}.json") for index in (1, 2)]
+    write_partial_results(
+        paths[0],
+        (1, 2),
+        files,
+        {"aaa.j2": [issues[1]], "clean.j2": []},
+        {"aaa.j2": [], "clean.j2": []},
+    )
+    write_partial_results(
+        paths[1], (2, 2), files, {"dummy.j2": []}, {"dummy.j2": [issues[0]]}
+    )
+
+    lint_errors, lint_warnings, budget = merge_partial_results(paths)
+    assert budget is None
+    assert list(lint_errors) == list(lint_warnings) == ["dummy.j2", "aaa.j2"]
+    assert lint_errors["dummy.j2"] == [] and lint_warnings["aaa.j2"] == []
+    for merged, issue in [
+        (lint_warnings["dummy.j2"][0], issues[0]),
+        (lint_errors["aaa.j2"][0], issues[1]),
+    ]:
+        assert merged.to_json() == issue.to_json()
+        assert merged.to_rich(True) == issue.to_rich(True)
+
+
+def test_merge_partial_results_not_checked(tmp_dir):
+    """
+    Test j2lint.linter.shard.merge_partial_results with shards which stopped
+    early
+
+    The files not checked by all the shards are combined in the order of the
+    full run
+    """
+    files = ["a.j2", "b.j2", "c.j2", "d.j2"]
+    paths = [os.path.join(tmp_dir, f"shard{index}.json") for index in (1, 2, 3)]
+    budgets = [LintBudget(max_errors=1), LintBudget(time_budget=0), None]
+    budgets[0].reason = "1 error(s) found"
+    budgets[0].not_checked = ["c.j2"]
+    budgets[1].reason = "time budget exceeded"
+    budgets[1].not_checked = ["d.j2", "a.j2"]
+    for index, (path, budget) in enumerate(zip(paths, budgets), start=1):
+        write_partial_results(path, (index, 3), files, {}, {}, budget)
+
+    _, _, budget = merge_partial_results(paths)
+    assert budget is not None
+    assert budget.not_checked == ["a.j2", "c.j2", "d.j2"]
+    assert budget.reason == (
+        "shard 1/3: 1 error(s) found, shard 2/3: time budget exceeded"
+    )
+
+
+@pytest.mark.parametrize(
+    "shards, content, expected_message",
+    [
+        pytest.param([], None, "No partial results", id="no files"),
+        pytest.param([(1, 2)], None, "complete run: 1/2", id="missing shard"),
+        pytest.param(
+            [(1, 2), (1, 2), (2, 2)], None, "complete run", id="duplicate shard"
+        ),
+        pytest.param([(1, 2), (2, 3)], None, "complete run", id="different counts"),
+        pytest.param([(1, 1)], "not json", "Could not read", id="invalid json"),
+        pytest.param([(1, 1)], "[]", "not a j2lint partial", id="not a dict"),
+    ],
+)
+def test_merge_partial_results_invalid(tmp_dir, shards, content, expected_message):
+    """
+    Test j2lint.linter.shard.merge_partial_results with invalid partial results
+    """
+    paths = []
+    for position, shard in enumerate(shards):
+        path = os.path.join(tmp_dir, f"shard{position}.json")
+        write_partial_results(path, shard, [], {}, {})
+        if content is not None:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(content)
+        paths.append(path)
+    with pytest.raises(ValueError, match=expected_message):
+        merge_partial_results(paths)
+
+
+def test_merge_partial_results_different_file_count(tmp_dir):
+    """
+    Test j2lint.linter.shard.merge_partial_results with shards of different runs
+    """
+    paths = [os.path.join(tmp_dir, f"shard{index}.json") for index in (1, 2)]
+    write_partial_results(paths[0], (1, 2), ["a.j2"], {}, {})
+    write_partial_results(paths[1], (2, 2), ["a.j2", "b.j2"], {}, {})
+    with open(paths[1], encoding="utf-8") as file:
+        assert json.load(file)["file_count"] == 2
+    with pytest.raises(ValueError, match="complete run"):
+        merge_partial_results(paths)
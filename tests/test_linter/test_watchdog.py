@@ -0,0 +1,244 @@
+# Copyright (c) 2021-2024 Arista Networks, Inc.
+# Use of this source code is governed by the MIT license
+# that can be found in the LICENSE file.
+"""
+Tests for j2lint.linter.watchdog.py
+"""
+import os
+import re
+import signal
+import tempfile
+import threading
+import time
+
+import pytest
+
+from j2lint.linter.collection import DEFAULT_RULE_DIR, RulesCollection
+from j2lint.linter.error import LinterError
+from j2lint.linter.rule import Rule
+from j2lint.linter.watchdog import LintTimeout, Watchdog
+
+# pylint: disable=redefined-outer-name
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(signal, "setitimer"), reason="SIGALRM is not available"
+)
+
+
+def busy_wait(seconds):
+    """
+    Loop without releasing the GIL like a regex backtracking
+    """
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+class SlowLineRule(Rule):
+    """
+    Rule stuck on the lines containing `slow`
+    """
+
+    rule_id = "T8"
+    description = "slow line rule"
+    short_description = "slow-line"
+    severity = "LOW"
+
+    def checktext(self, filename, text):
+        raise NotImplementedError
+
+    def checkline(self, filename, line, line_no):
+        if "slow" in line:
+            busy_wait(5)
+        return [LinterError(line_no, line, filename, self)]
+
+
+class SlowTextRule(Rule):
+    """
+    Rule stuck on the whole file
+    """
+
+    rule_id = "T9"
+    description = "slow text rule"
+    short_description = "slow-text"
+    severity = "LOW"
+
+    def checktext(self, filename, text):
+        busy_wait(5)
+        return []
+
+    def checkline(self, filename, line, line_no):
+        raise NotImplementedError
+
+
+class BacktrackingTokenRule(Rule):
+    """
+    Rule with a token_regex backtracking on the variables with many `x`
+    """
+
+    rule_id = "T10"
+    description = "backtracking token rule"
+    short_description = "backtracking-token"
+    severity = "LOW"
+    token_kinds = ("variable",)
+    token_regex = re.compile(r"(x+x+)+y")
+
+    def checktext(self, filename, text):
+        raise NotImplementedError
+
+
+class BacktrackingLineRule(Rule):
+    """
+    Rule with a line_regex backtracking on the lines with many `x`, the lines
+    with a `b` match
+    """
+
+    rule_id = "T11"
+    description = "backtracking line rule"
+    short_description = "backtracking-line"
+    severity = "LOW"
+    line_regex = re.compile(r"(x+x+)+y|b")
+
+    def checktext(self, filename, text):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def slow_file():
+    """
+    A file with a line the SlowLineRule is stuck on
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "slow.j2")
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write("first\nslow line\nlast")
+        yield file_path
+
+
+def test_limit_no_timeout():
+    """
+    Test Watchdog.limit without time limits
+    """
+    watchdog = Watchdog()
+    watchdog.start_file()
+    with watchdog.limit():
+        busy_wait(0.01)
+
+
+@pytest.mark.parametrize(
+    "rule_timeout, file_timeout, expected_scope",
+    [
+        pytest.param(0.05, None, "rule", id="rule"),
+        pytest.param(0.05, 10, "rule", id="rule before file"),
+        pytest.param(10, 0.05, "file", id="file before rule"),
+    ],
+)
+def test_limit(rule_timeout, file_timeout, expected_scope):
+    """
+    Test Watchdog.limit interrupts the code running too long and restores the
+    previous SIGALRM handler
+    """
+    previous_handler = signal.getsignal(signal.SIGALRM)
+    watchdog = Watchdog(rule_timeout, file_timeout)
+    watchdog.start_file()
+    with pytest.raises(LintTimeout) as exc_info:
+        with watchdog.limit():
+            busy_wait(5)
+    assert exc_info.value.scope == expected_scope
+    assert signal.getsignal(signal.SIGALRM) == previous_handler
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+def test_limit_file_deadline_passed():
+    """
+    Test Watchdog.limit once the file time limit is exceeded
+    """
+    watchdog = Watchdog(file_timeout=0)
+    watchdog.start_file()
+    with pytest.raises(LintTimeout, match="file time limit"):
+        with watchdog.limit():
+            pass
+
+
+def test_limit_not_main_thread():
+    """
+    Test Watchdog.limit does not enforce the limits outside of the main thread
+    """
+    watchdog = Watchdog(rule_timeout=0.01)
+    raised = []
+
+    def target():
+        try:
+            with watchdog.limit():
+                busy_wait(0.05)
+        except LintTimeout as exc:
+            raised.append(exc)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    assert not raised
+
+
+def test_collection_rule_timeout(slow_file):
+    """
+    Test RulesCollection.run reports the rule timeout on the line instead of
+    the results of the rule and runs the other rules
+    """
+    collection = RulesCollection()
+    collection.extend([SlowLineRule(), SlowTextRule()])
+    collection.watchdog = Watchdog(rule_timeout=0.1)
+    errors, _ = collection.run(slow_file)
+    assert [
+        (error.rule.rule_id, error.line_number, error.message) for error in errors
+    ] == [
+        ("T8", 2, "Timeout: the rule did not check this line within 0.1s"),
+        ("T9", 1, "Timeout: the rule did not check the file within 0.1s"),
+    ]
+    assert errors[0].line == "slow line"
+
+
+@pytest.mark.parametrize(
+    "rule_id, text",
+    [
+        pytest.param(
+            "V1", "{{ a }}\n{{ b }}\n{{ " + "a" * 4000 + " }}\n{{ c }}", id="V1"
+        ),
+        pytest.param(
+            "T10", "{{ a }}\n{{ b }}\n{{ " + "x" * 21 + " }}\n{{ c }}", id="token_regex"
+        ),
+        pytest.param("T11", "a\nb\n" + "x" * 21 + "\nc", id="line_regex"),
+    ],
+)
+def test_collection_rule_timeout_line(rule_id, text):
+    """
+    Test RulesCollection.run reports the timeout of the rules searching a
+    regex in the lines or in the tokens on the line they were stuck on
+    """
+    rules = RulesCollection.create_from_directory(DEFAULT_RULE_DIR, [], []).rules
+    rules.extend([BacktrackingTokenRule(), BacktrackingLineRule()])
+    collection = RulesCollection()
+    collection.extend([rule for rule in rules if rule.rule_id == rule_id])
+    collection.watchdog = Watchdog(rule_timeout=0.02)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "slow.j2")
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        errors, _ = collection.run(file_path)
+    assert [(error.line_number, error.message) for error in errors] == [
+        (3, "Timeout: the rule did not check this line within 0.02s")
+    ]
+    assert errors[0].line == text.split("\n")[2]
+
+
+def test_collection_file_timeout(slow_file):
+    """
+    Test RulesCollection.run skips the next rules once the file time limit is
+    exceeded
+    """
+    collection = RulesCollection()
+    collection.extend([SlowLineRule(), SlowTextRule()])
+    collection.watchdog = Watchdog(file_timeout=0.1)
+    errors, _ = collection.run(slow_file)
+    assert [(error.rule.rule_id, error.line_number) for error in errors] == [("T8", 2)]
+    assert errors[0].message.startswith("Timeout: the file was not linted within 0.1s")
@@ -6,6 +6,9 @@ import pathlib
 
 import pytest
 
+from j2lint.linter.rule import is_skipped_line
+from j2lint.utils import get_line_index
+
 TEST_DATA_DIR = pathlib.Path(__file__).parent / "data"
 
 PARAMS = [
@@ -57,30 +60,17 @@ PARAMS = [
     ),
     pytest.param(
         f"{TEST_DATA_DIR}/jinja_template_indentation_rule.JinjaLinterError.j2",
-        [("S0", 7), ("S3", 7)],
+        # S3 requires S0 and is skipped
+        [("S0", 7)],
+        [],
         [],
-        [
-            (
-                "root",
-                logging.ERROR,
-                f"Indentation check failed for file {TEST_DATA_DIR}/jinja_template_indentation_rule.JinjaLinterError.j2: "
-                "Error: Line 1 - Tag is out of order 'endfor'",
-            )
-        ],
         id="jinja_template_indentation_rule JinjaLinterError",
     ),
     pytest.param(
         f"{TEST_DATA_DIR}/jinja_template_indentation_rule.missing_end_tag.j2",
         [("S0", 6)],
         [],
-        [
-            (
-                "root",
-                logging.ERROR,
-                f"Indentation check failed for file {TEST_DATA_DIR}/jinja_template_indentation_rule.missing_end_tag.j2: "
-                "Error: Recursive check_indentation returned None for an opening tag line 0 - missing closing tag",
-            )
-        ],
+        [],
     ),
     pytest.param(
         f"{TEST_DATA_DIR}/jinja_template_indentation_rule.IndexError.j2",
@@ -112,7 +102,8 @@ PARAMS = [
     ),
     pytest.param(
         f"{TEST_DATA_DIR}/jinja_statement_delimiter_rule.j2",
-        [("S6", 6), ("S6", 8), ("S6", 10)],
+        # S3 used to be hidden by the indenter state leaking from the previous file
+        [("S6", 6), ("S3", 7), ("S6", 8), ("S3", 9), ("S6", 10)],
         [],
         [],
     ),
@@ -134,6 +125,13 @@ PARAMS = [
         [],
         [],
     ),
+    pytest.param(
+        f"{TEST_DATA_DIR}/jinja_raw_block.j2",
+        [],
+        [],
+        [],
+        id="jinja_raw_block",
+    ),
 ]
 
 
@@ -168,3 +166,108 @@ def test_rules(
 
     assert sorted(warnings_ids) == sorted(j2_warnings_ids)
     assert sorted(errors_ids) == sorted(j2_errors_ids)
+
+
+@pytest.mark.parametrize("rule_id", ["S5"])
+def test_checklines(collection, rule_id):
+    """
+    The rules implementing checklines find the same errors as checkline
+    """
+    rule = next(rule for rule in collection.rules if rule.rule_id == rule_id)
+    for filename in sorted(TEST_DATA_DIR.glob("*.j2")):
+        text = filename.read_text(encoding="utf-8")
+        line_index = get_line_index(text)
+        errors = rule.checklines(str(filename), line_index.lines, line_index)
+        expected = [
+            error
+            for line_no, line in enumerate(text.split("\n"), start=1)
+            for error in rule.checkline(str(filename), line, line_no)
+        ]
+        assert [(error.line_number, error.line) for error in errors] == [
+            (error.line_number, error.line) for error in expected
+        ]
+
+
+@pytest.mark.parametrize("rule_id", ["S1", "S4"])
+def test_token_regex(collection, rule_id):
+    """
+    The rules searching their regex in the tokens find the same errors as
+    the regex searched in each line, except in the raw blocks and the
+    delimiters within string literals
+    """
+    rule = next(rule for rule in collection.rules if rule.rule_id == rule_id)
+    for filename in sorted(TEST_DATA_DIR.glob("*.j2")):
+        if filename.name == "jinja_raw_block.j2":
+            continue
+        text = filename.read_text(encoding="utf-8")
+        errors = rule.checkrule(str(filename), text)
+        expected = [
+            line_no
+            for line_no, line in enumerate(text.split("\n"), start=1)
+            if not is_skipped_line(line) and rule.regex.search(line)
+        ]
+        assert [error.line_number for error in errors] == expected
+
+
+def test_operator_columns(collection):
+    """
+    S2 reports the column of the first unspaced operator of each kind
+    """
+    rule = next(rule for rule in collection.rules if rule.rule_id == "S2")
+    text = "{{ test+ blah| list }}\n{{ a|b }} {{ c |d }}\n{{ 'a|b' | e }}\n"
+    errors = rule.checkrule("test.j2", text)
+    assert [(error.line_number, error.message) for error in errors] == [
+        (
+            1,
+            "The operator | at column 14 needs to be enclosed by a single space"
+            " on each side",
+        ),
+        (
+            1,
+            "The operator + at column 8 needs to be enclosed by a single space"
+            " on each side",
+        ),
+        (
+            2,
+            "The operator | at column 5 needs to be enclosed by a single space"
+            " on each side",
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "filename, expected_errors_ids, expected_log",
+    [
+        pytest.param(
+            "jinja_template_indentation_rule.JinjaLinterError.j2",
+            [("S3", 7)],
+            "Line 1 - Tag is out of order 'endfor'",
+            id="JinjaLinterError",
+        ),
+        pytest.param(
+            "jinja_template_indentation_rule.missing_end_tag.j2",
+            [],
+            "Line 0 - Missing closing tag 'endif'",
+            id="missing_end_tag",
+        ),
+    ],
+)
+def test_indentation_check_failed(
+    caplog, collection, filename, expected_errors_ids, expected_log
+):
+    """
+    S3 logs the reason why the indentation could not be checked when it is
+    run on a template with a syntax error
+    """
+    rule = next(rule for rule in collection.rules if rule.rule_id == "S3")
+    file_path = f"{TEST_DATA_DIR}/{filename}"
+    text = pathlib.Path(file_path).read_text(encoding="utf-8")
+    errors = rule.checkrule(file_path, text)
+    assert [
+        (error.rule.rule_id, error.line_number) for error in errors
+    ] == expected_errors_ids
+    assert (
+        "root",
+        logging.ERROR,
+        f"Indentation check failed for file {file_path}: Error: {expected_log}",
+    ) in caplog.record_tuples
@@ -4,17 +4,34 @@
 """
 Tests for j2lint.utils.py
 """
+import os
 import pathlib
+import re
+import tempfile
 
 import pytest
 
 from j2lint.utils import (
+    LineIndex,
+    blank_string_literals,
     delimit_jinja_statement,
     flatten,
     get_files,
+    get_jinja_comments,
+    get_jinja_line_tokens,
+    get_jinja_statements,
+    get_jinja_variables,
+    get_line_index,
+    get_referenced_templates,
+    get_suppressions,
     get_tuple,
+    get_unspaced_operators,
     is_rule_disabled,
     is_valid_file_type,
+    iter_files,
+    scan_jinja,
+    search_lines,
+    search_tokens,
 )
 
 from .utils import does_not_raise
@@ -125,6 +142,38 @@ def test_get_files_dir(template_tmp_dir):
         assert sorted(get_files(template_tmp_dir, [".j2"])) == expected
 
 
+def test_iter_files():
+    """
+    Test the utils.iter_files function
+
+    The entries of each directory are sorted, the files of a directory come
+    before the files of its subdirectories and the symbolic links to
+    directories are not followed
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in [
+            "b.j2",
+            "a.J2",
+            ".hidden.j2",
+            ".j2",
+            "z/c.j2",
+            "a_dir/x.txt",
+            "a_dir/sub/e.jinja",
+            "a_dir/d.j2",
+        ]:
+            path = pathlib.Path(tmp_dir, name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("{{ a }}", encoding="utf-8")
+        os.symlink(os.path.join(tmp_dir, "a_dir"), os.path.join(tmp_dir, "link"))
+
+        files = iter_files([tmp_dir, "single.j2", "single.txt"], [".j2", ".jinja"])
+        assert next(files) == os.path.join(tmp_dir, ".hidden.j2")
+        assert list(files) == [
+            os.path.join(tmp_dir, name)
+            for name in ["a.J2", "b.j2", "a_dir/d.j2", "a_dir/sub/e.jinja", "z/c.j2"]
+        ] + ["single.j2"]
+
+
 @pytest.mark.parametrize(
     "input_list, expected, raising_context",
     [
@@ -162,12 +211,239 @@ def test_get_tuple(tuple_list, lookup_object, expected_value):
     assert get_tuple(tuple_list, lookup_object) == expected_value
 
 
-@pytest.mark.skip
-def test_get_jinja_statements():
+@pytest.mark.parametrize(
+    "text",
+    ["", "a", "a\n", "\n\n", "ab\ncd\n\nef", "{{ a }}\r\n{% b %}\n"],
+)
+def test_line_index(text):
+    """
+    Test the utils.LineIndex class against the lines of text.split
+    """
+    line_index = LineIndex(text)
+    lines = text.split("\n")
+    assert len(line_index) == len(lines)
+    assert [line_index.line(number) for number in range(1, len(lines) + 1)] == lines
+    offset = 0
+    for number, line in enumerate(lines, start=1):
+        assert line_index.line_offset(number) == offset
+        # the newline ending the line is on the line
+        for column in range(1, len(line) + 2):
+            assert line_index.line_number(offset + column - 1) == number
+            assert line_index.column(offset + column - 1) == column
+        offset += len(line) + 1
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        pytest.param("a\nb\n", [], id="no jinja"),
+        pytest.param("a\n{{ b }}\nc {% d %}\n{#\ne\n#}", [2, 3, 4, 5, 6], id="tags"),
+        pytest.param("{% if a\n   and b %}\nc\n", [1, 2], id="multi-line tag"),
+        pytest.param("{% raw %}\n{{ a\n}}{% endraw %}", [1, 2, 3], id="raw block"),
+        pytest.param("a }}\n{ b %}\n", [], id="no opening delimiter"),
+    ],
+)
+def test_line_index_jinja_lines(text, expected):
+    """
+    Test the utils.LineIndex.jinja_lines property
+    """
+    assert LineIndex(text).jinja_lines == expected
+
+
+@pytest.mark.parametrize("line_number", [0, -1, 4])
+def test_line_index_out_of_range(line_number):
+    """
+    Test the utils.LineIndex class with lines not in the text
+    """
+    line_index = LineIndex("a\nb\nc")
+    with pytest.raises(IndexError):
+        line_index.line_offset(line_number)
+    with pytest.raises(IndexError):
+        line_index.line(line_number)
+
+
+def test_get_line_index():
+    """
+    Test the utils.get_line_index function returns the same index for a text
+    """
+    text = "a\nb"
+    assert get_line_index(text) is get_line_index(text)
+    assert get_line_index(text).line(2) == "b"
+
+
+@pytest.mark.parametrize(
+    "ranges, expected",
+    [
+        pytest.param(None, [1, 3, 4, 6], id="whole text"),
+        pytest.param([(2, 3), (5, 6)], [3, 6], id="ranges"),
+        pytest.param([(1, 1), (4, 4)], [1, 4], id="single lines"),
+        pytest.param([], [], id="no range"),
+    ],
+)
+def test_search_lines(ranges, expected):
+    """
+    Test the utils.search_lines function only searches the given lines
+    """
+    line_index = LineIndex("a b\nc\nb\nbb\nd\nb")
+    assert list(search_lines(re.compile("b"), line_index, ranges)) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        pytest.param(
+            "a {{ b }}\n{%- if c -%}{# d\n#}",
+            [
+                ("text", "a ", 0, 2, 1, 1, "", ""),
+                ("variable", " b ", 2, 9, 1, 1, "{{", "}}"),
+                ("text", "\n", 9, 10, 1, 2, "", ""),
+                ("statement", " if c ", 10, 22, 2, 2, "{%-", "-%}"),
+                ("comment", " d\n", 22, 29, 2, 3, "{#", "#}"),
+            ],
+            id="all kinds",
+        ),
+        pytest.param(
+            '{{ \'}}\' ~ "\\"}}" }}',
+            [("variable", ' \'}}\' ~ "\\"}}" ', 0, 19, 1, 1, "{{", "}}")],
+            id="quoted delimiters",
+        ),
+        pytest.param(
+            "{% raw -%}{{ a }}\n{% b %}{% endraw %}",
+            [
+                ("statement", " raw ", 0, 10, 1, 1, "{%", "-%}"),
+                ("raw", "{{ a }}\n{% b %}", 10, 25, 1, 2, "", ""),
+                ("statement", " endraw ", 25, 37, 2, 2, "{%", "%}"),
+            ],
+            id="raw block",
+        ),
+        pytest.param(
+            "{{ a {% b %}",
+            [
+                ("text", "{{ a ", 0, 5, 1, 1, "", ""),
+                ("statement", " b ", 5, 12, 1, 1, "{%", "%}"),
+            ],
+            id="unclosed delimiter",
+        ),
+        pytest.param(
+            "{{ it's }}",
+            [("variable", " it's ", 0, 10, 1, 1, "{{", "}}")],
+            id="unclosed quote",
+        ),
+    ],
+)
+def test_scan_jinja(text, expected):
+    """
+    Test the utils.scan_jinja function
+    """
+    assert [tuple(token) for token in scan_jinja(text)] == expected
+
+
+def test_get_jinja_line_tokens():
+    """
+    Test the utils.get_jinja_line_tokens function
+
+    Only the tokens on a single line are grouped and the lines starting
+    with # are skipped
+    """
+    text = "{% a %}{% b %}\n{% c\n%}\n# {% d %}\n{{ e }} {% f %}"
+    result = [
+        (line_no, line, [token.text for token in tokens])
+        for line_no, line, tokens in get_jinja_line_tokens(text, "statement")
+    ]
+    assert result == [
+        (1, "{% a %}{% b %}", [" a ", " b "]),
+        (5, "{{ e }} {% f %}", [" f "]),
+    ]
+    result = [
+        (line_no, [token.text for token in tokens])
+        for line_no, _, tokens in get_jinja_line_tokens(text, "statement", "variable")
+    ]
+    assert result == [(1, [" a ", " b "]), (5, [" e ", " f "])]
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        pytest.param("{{ a }}", "{{ a }}", id="no string"),
+        pytest.param('{{ "}}" }}', '{{ "__" }}', id="double quotes"),
+        pytest.param(
+            "{% set a = '%}' ~ \"b'c\" %}",
+            "{% set a = '__' ~ \"___\" %}",
+            id="mixed quotes",
+        ),
+        pytest.param('{{ "a\\"b" }}', '{{ "____" }}', id="escaped quote"),
+        pytest.param('{{ "a\nb" }}', '{{ "_\n_" }}', id="newline"),
+        pytest.param('{{ "a }}', '{{ "a }}', id="unclosed"),
+    ],
+)
+def test_blank_string_literals(source, expected):
+    """
+    Test the utils.blank_string_literals function
+    """
+    assert blank_string_literals(source) == expected
+
+
+def test_search_tokens():
+    """
+    Test the utils.search_tokens function only searches the tokens of the
+    given kinds, once per line
+    """
+    text = '{{x}}{{y}}\n{% raw %}{{x}}{% endraw %}\n{{ "{{x" }}\n{#{{x}}#}\n{{x }}'
+    line_index = LineIndex(text)
+    regex = re.compile("{{x")
+    assert list(search_tokens(regex, line_index, ("variable",))) == [1, 5]
+    assert list(search_tokens(regex, line_index, ("variable",), [2, 5])) == [5]
+    assert not list(search_tokens(regex, line_index, ("statement",)))
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        pytest.param(" a | b + c == d ", [], id="spaced"),
+        pytest.param(" a|b ", [("|", 2)], id="no space"),
+        pytest.param(" a  + b ", [("+", 4)], id="two spaces before"),
+        pytest.param(" a ==\tb ", [("==", 3)], id="tab after"),
+        pytest.param(" a|b|c ", [("|", 2), ("|", 4)], id="several operators"),
+        pytest.param("+a ", [("+", 0)], id="no operand before"),
+        pytest.param(" a +", [], id="no operand after"),
+        pytest.param(" 'a|b' ~ \"c+d\" ", [], id="operators in strings"),
+        pytest.param(" 'a'|b ", [("|", 4)], id="string operand"),
+        pytest.param(" 'it\\'s'|b ", [("|", 8)], id="escaped quote"),
+        pytest.param(" it's|b ", [("|", 5)], id="unclosed quote"),
+    ],
+)
+def test_get_unspaced_operators(expression, expected):
+    """
+    Test the utils.get_unspaced_operators function
+    """
+    assert list(get_unspaced_operators(expression, ("|", "+", "=="))) == expected
+
+
+@pytest.mark.parametrize(
+    "text, indentation, expected",
+    [
+        (
+            "{# c #}\n{% if a %}\n  b {% set c = '%}' %}\n{%- endif -%}",
+            False,
+            [
+                (" if a ", 2, 2, "{%", "%}"),
+                (" set c = '%}' ", 3, 3, "{%", "%}"),
+                (" endif ", 4, 4, "{%-", "-%}"),
+            ],
+        ),
+        (
+            "{# c #}\n{% if a %}\n  b {% set c = '%}' %}\n{%- endif -%}",
+            True,
+            [(" if a ", 2, 2, "{%", "%}"), (" endif ", 4, 4, "{%-", "-%}")],
+        ),
+        ("{% if a\n   and b %}", False, [(" if a\n   and b ", 1, 2, "{%", "%}")]),
+    ],
+)
+def test_get_jinja_statements(text, indentation, expected):
     """
     Test the utils.get_jinja_statements function
     """
-    # TODO
+    assert get_jinja_statements(text, indentation) == expected
 
 
 @pytest.mark.parametrize(
@@ -185,20 +461,41 @@ def test_delimit_jinja_statement(line, kwargs, expected):
     assert delimit_jinja_statement(line, **kwargs) == expected
 
 
-@pytest.mark.skip
 def test_get_jinja_comments():
     """
     Test the utils.get_jinja_comments function
     """
-    # TODO
+    text = "{# a #}{{ b }}{#\nc {{ d }} #}{% raw %}{# e #}{% endraw %}"
+    assert get_jinja_comments(text) == [" a ", "\nc {{ d }} "]
 
 
-@pytest.mark.skip
 def test_get_jinja_variables():
     """
     Test the utils.get_jinja_variables function
     """
-    # TODO
+    text = "{{ a }}{# {{ b }} #}{{ c\n| d }}{% raw %}{{ e }}{% endraw %}"
+    assert get_jinja_variables(text) == [" a ", " c\n| d "]
+
+
+def test_get_referenced_templates():
+    """
+    Test the utils.get_referenced_templates function
+    """
+    text = (
+        "{% extends 'base.j2' %}\n"
+        '{%- include ["eos/a.j2", "./eos/b.j2"] ignore missing %}\n'
+        '{% import "macros.j2" as macros %}\n'
+        "{% from 'eos/../filters.j2' import f with context %}\n"
+        '{% set included = "not_a_template.j2" %}\n'
+        '{# include "comment.j2" #}{{ "variable.j2" }}{% include "" %}\n'
+    )
+    assert get_referenced_templates(text) == {
+        "base.j2",
+        "eos/a.j2",
+        "eos/b.j2",
+        "macros.j2",
+        "filters.j2",
+    }
 
 
 @pytest.mark.parametrize(
@@ -229,6 +526,11 @@ def test_get_jinja_variables():
             True,
             id="found_second_second_syntax",
         ),
+        pytest.param(
+            ["{% raw %}{# j2lint: disable=T0 #}{% endraw %}"],
+            False,
+            id="raw_block",
+        ),
     ],
 )
 def test_is_rule_disabled(make_rules, comments, expected_value):
@@ -242,3 +544,31 @@ def test_is_rule_disabled(make_rules, comments, expected_value):
     comments_string = "\n".join(comments)
     print(comments_string)
     assert is_rule_disabled(comments_string, test_rule) == expected_value
+
+
+def test_get_suppressions(make_rules):
+    """
+    Test the utils.get_suppressions function
+
+    disable-line applies to the line of the directive and disable-next-line
+    to the line after the comment
+    """
+    test_rule = make_rules(1)[0]
+    text = (
+        "{# j2lint: disable=S1 #}\n"
+        "{{ a }} {# j2lint: disable-line=T0 #}\n"
+        "{# j2lint: disable-next-line=test-rule-0\n"
+        "   j2lint: disable-line=S2 #}\n"
+        "{{ b }}\n"
+    )
+    suppressions = get_suppressions(text)
+    assert suppressions.disabled == {"S1"}
+    assert suppressions.line_disabled == {2: {"T0"}, 4: {"S2"}, 5: {"test-rule-0"}}
+    assert not suppressions.is_disabled(test_rule)
+    assert [
+        line_number
+        for line_number in range(1, 6)
+        if suppressions.is_suppressed(test_rule, line_number)
+    ] == [2, 5]
+    assert get_suppressions(text) is suppressions
+    assert not get_suppressions("{{ a }}").line_disabled